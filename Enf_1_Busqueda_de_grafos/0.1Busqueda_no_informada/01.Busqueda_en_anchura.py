@@ -14,23 +14,21 @@ from collections import deque
 # una función es un bloque de código con un nombre, 
 # que hace algo y que puedes volver a usar sin repetir todo,
 #alguna tienen parametros(a,b,c) y otras no()
-import csv
+import sys
+import tempfile
+import time
+from array import array
 from pathlib import Path
 
-DATA_PATH = Path(__file__).resolve().parent / "data" / "rutas.csv"
+from grafo_csr import (
+    GrafoCSR, bfs_idx, camino_desde_padres, cargar_grafo_csv, distancias_idx,
+    generar_aristas_aleatorias,
+)
+# grafo_csr es el grafo compacto con numeros (ver grafo_csr.py)
+# si nos pasan uno de esos, usamos la version que trabaja solo con numeros
+# cargar_grafo_csv esta ahi mismo y la usan 01, 03, 04 y 05
 
-def cargar_grafo_csv(ruta_csv, bidireccional=True):
-    grafo = {}
-    with ruta_csv.open(newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-          o = row["origen"].strip()
-          d = row["destino"].strip()
-          grafo.setdefault(o, []).append(d)
-          grafo.setdefault(d, [])
-          if bidireccional:
-              grafo.setdefault(d, []).append(o)
-    return grafo
+DATA_PATH = Path(__file__).resolve().parent / "data" / "rutas.csv"
 
 def bfs_camino_mas_corto(grafo, inicio, objetivo):
     """
@@ -55,6 +53,14 @@ def bfs_camino_mas_corto(grafo, inicio, objetivo):
     if inicio not in grafo:
         return None
 
+    # grafo compacto: mismo bfs pero con numeros en lugar de strings
+    if isinstance(grafo, GrafoCSR):
+        i, o = grafo.id_de(inicio), grafo.id_de(objetivo)
+        if o is None:
+            return None
+        padres, _, _ = bfs_idx(grafo, i, o)
+        return camino_desde_padres(grafo, padres, i, o)
+
     # visitados: lugares que ya vimos
     # esto es para no repetir el mismo lugar una y otra vez
     visitados = {inicio}
@@ -120,6 +126,11 @@ def bfs_orden_visita(grafo, inicio):
     if inicio not in grafo:
         return []
 
+    # grafo compacto: tocados ya viene en el orden en que bfs marco los lugares
+    if isinstance(grafo, GrafoCSR):
+        _, tocados, _ = bfs_idx(grafo, grafo.id_de(inicio))
+        return [grafo.nombres[i] for i in tocados]
+
     # marco el inicio como visitado
     visitados = {inicio}
 
@@ -151,6 +162,99 @@ def bfs_orden_visita(grafo, inicio):
     return orden
 
 
+def bfs_por_lotes(grafo, pares, solo_distancias=False):
+    """
+    resuelve muchas preguntas (inicio, objetivo) de una sola vez
+
+    en lugar de correr un bfs por cada par:
+    - junto los pares que salen del mismo inicio
+    - corro un solo bfs por cada inicio, que para cuando ya encontro todos sus objetivos
+    - el arreglo de padres (o distancias) se hace una vez y se limpia entre bfs,
+      solo en los lugares que se tocaron
+
+    pares: lista de (inicio, objetivo)
+    solo_distancias: si es True regresa cuantos pasos hay (en vez del camino)
+
+    regresa una lista con un resultado por par, en el mismo orden:
+    - el camino (igual al de bfs_camino_mas_corto) o None
+    - o la distancia en pasos o None si solo_distancias=True
+    """
+    # el lote trabaja con numeros, si es diccionario lo convierto una vez
+    csr = grafo if isinstance(grafo, GrafoCSR) else GrafoCSR.desde_dict(grafo)
+
+    resultados = [None] * len(pares)
+
+    # agrupo por inicio: inicio -> lista de (posicion en pares, numero del objetivo)
+    por_inicio = {}
+    for pos, (inicio, objetivo) in enumerate(pares):
+        if inicio == objetivo:
+            resultados[pos] = 0 if solo_distancias else [inicio]
+            continue
+        i, o = csr.id_de(inicio), csr.id_de(objetivo)
+        if i is None or o is None:
+            continue  # se queda en None
+        por_inicio.setdefault(i, []).append((pos, o))
+
+    # arreglo reutilizable: -1 = no visto
+    marcas = array("i", [-1]) * csr.num_nodos
+
+    for i, preguntas in por_inicio.items():
+        objetivos = {o for _, o in preguntas}
+        if solo_distancias:
+            _, tocados = distancias_idx(csr, i, marcas, objetivos)
+            for pos, o in preguntas:
+                if marcas[o] != -1:
+                    resultados[pos] = marcas[o]
+        else:
+            _, tocados, _ = bfs_idx(csr, i, padres=marcas, objetivos=objetivos)
+            for pos, o in preguntas:
+                resultados[pos] = camino_desde_padres(csr, marcas, i, o)
+
+        # limpio solo lo que se uso, para el siguiente inicio
+        for v in tocados:
+            marcas[v] = -1
+
+    return resultados
+
+def benchmark_lotes(num_nodos=10**5, grado=3, num_inicios=10, pares_por_inicio=50):
+    # grafo grande con el mismo formato de rutas.csv (origen,destino)
+    # lo escribo a un csv temporal y lo cargo con cargar_grafo_csv
+    nombres, origenes, destinos = generar_aristas_aleatorias(num_nodos, grado)
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = Path(carpeta) / "rutas_grande.csv"
+        with ruta.open("w", encoding="utf-8") as f:
+            f.write("origen,destino\n")
+            for o, d in zip(origenes, destinos):
+                f.write(nombres[o] + "," + nombres[d] + "\n")
+        csr = cargar_grafo_csv(ruta, bidireccional=True, usar_cache=False)
+    grafo = dict(csr.items())  # el diccionario de siempre, para comparar
+
+    paso = num_nodos // num_inicios
+    pares = [
+        (nombres[k * paso], nombres[(k * paso + 7919 * (j + 1)) % num_nodos])
+        for k in range(num_inicios)
+        for j in range(pares_por_inicio)
+    ]
+
+    t0 = time.perf_counter()
+    uno_por_uno = [bfs_camino_mas_corto(grafo, a, b) for a, b in pares]
+    t_uno = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    en_lote = bfs_por_lotes(csr, pares)
+    t_lote = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    bfs_por_lotes(csr, pares, solo_distancias=True)
+    t_dist = time.perf_counter() - t0
+
+    assert uno_por_uno == en_lote
+    print(f"{len(pares)} pares, {num_inicios} inicios, {num_nodos} lugares")
+    print(f"  uno por uno (diccionario): {t_uno:8.2f} s")
+    print(f"  bfs_por_lotes (caminos):   {t_lote:8.2f} s  ({t_uno / t_lote:.0f}x)")
+    print(f"  bfs_por_lotes (distancias):{t_dist:8.2f} s  ({t_uno / t_dist:.0f}x)")
+
+
 # bloque principal
 if __name__ == "__main__":
     # este es nuestro grafo de ejemplo
@@ -179,3 +283,14 @@ if __name__ == "__main__":
 
     # nota rapida:
     # si sale None significa que no hay forma de llegar
+
+    print("\nvarias preguntas de una vez con bfs_por_lotes:")
+    pares = [("Casa", "Cafeteria"), ("Casa", "Estacionamiento"), ("Salon", "Cancha")]
+    for par, camino in zip(pares, bfs_por_lotes(grafo, pares)):
+        print(" ", par, "->", camino)
+    print("  solo distancias:", bfs_por_lotes(grafo, pares, solo_distancias=True))
+
+    # para medir contra muchas llamadas sueltas: python 01.Busqueda_en_anchura.py --bench
+    if "--bench" in sys.argv:
+        print("\nbenchmark uno por uno vs por lotes:")
+        benchmark_lotes()
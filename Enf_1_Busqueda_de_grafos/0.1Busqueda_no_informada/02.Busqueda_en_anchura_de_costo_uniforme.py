@@ -9,10 +9,26 @@
 # el algoritmo tiene que decidir que sale mas barato llegar a servidor
 
 import heapq
-# heapq es una cola de prioridad
-# siempre nos da primero el camino mas barato hasta ahorita
+import pickle
+import random
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
 
-def ucs_camino_mas_barato(grafo, inicio, objetivo):
+from colas_prioridad import crear_cola
+# la cola de prioridad siempre nos da primero el camino mas barato hasta ahorita
+# hay dos (ver colas_prioridad.py) y se escoge con el parametro cola:
+# - "perezosa": heapq de siempre, si un lugar mejora se mete otra vez
+# - "indexada": si un lugar mejora se le baja la prioridad donde ya estaba
+
+def ucs_camino_mas_barato(grafo, inicio, objetivo, cola="perezosa", estadisticas=None,
+                          jerarquia=None):
+    # estadisticas: si se da un diccionario, ahi se guardan los contadores de la cola
+    # (inserciones, obsoletos, max_tamano, ...) para escoger la mejor cola
+    # jerarquia: JerarquiaContraccion ya construida para este grafo (ver abajo);
+    # si se da, la consulta se contesta con ella en lugar de recorrer el grafo
     # si inicio ya es el objetivo, listo
     if inicio == objetivo:
         return [inicio], 0
@@ -21,21 +37,49 @@ def ucs_camino_mas_barato(grafo, inicio, objetivo):
     if inicio not in grafo:
         return None, None
 
+    if jerarquia is not None:
+        return jerarquia.consultar(inicio, objetivo)
+
+    frontera = crear_cola(cola)
+    try:
+        return _ucs(grafo, inicio, objetivo, frontera)
+    finally:
+        if estadisticas is not None:
+            estadisticas.update(frontera.estadisticas)
+
+def ucs_costos(grafo, inicio, cola="perezosa", estadisticas=None):
+    # lo mismo pero sin objetivo: sigue hasta vaciar la cola y regresa
+    # un diccionario con el costo mas barato desde inicio a cada lugar alcanzable
+    # (lo usan los preprocesos de 10.Busquedas_A_y_AO.py, por ejemplo los landmarks de alt)
+    costo_hasta = {inicio: 0}
+    frontera = crear_cola(cola)
+    try:
+        _ucs(grafo, inicio, _SIN_OBJETIVO, frontera, costo_hasta)
+    finally:
+        if estadisticas is not None:
+            estadisticas.update(frontera.estadisticas)
+    return costo_hasta
+
+_SIN_OBJETIVO = object()  # nunca es igual a un lugar, asi _ucs recorre todo
+
+def _ucs(grafo, inicio, objetivo, frontera, costo_hasta=None):
+    # la busqueda en si, con la cola que se escogio
     # costo_hasta guarda el mejor costo conocido para cada lugar
     # al inicio, llegar a inicio cuesta 0
-    costo_hasta = {inicio: 0}
+    if costo_hasta is None:
+        costo_hasta = {inicio: 0}
 
     # padres guarda de donde llegue
     # ejemplo: para llegar a pasillo llegue desde salon
     padres = {inicio: None}
 
     # cola de prioridad
-    # cada elemento es (costo_total_hasta_aqui, lugar_actual)
-    cola = [(0, inicio)]
+    # cada lugar pendiente con su costo total hasta el
+    frontera.poner(inicio, 0)
 
-    while cola:
+    while frontera:
         # saco el lugar mas barato hasta ahorita
-        costo_actual, actual = heapq.heappop(cola)
+        costo_actual, actual = frontera.sacar()
 
         # si ya llegue al objetivo, reconstruyo el camino y regreso
         if actual == objetivo:
@@ -60,10 +104,396 @@ def ucs_camino_mas_barato(grafo, inicio, objetivo):
                 costo_hasta[vecino] = nuevo_costo
                 padres[vecino] = actual
                 # meto el vecino a la cola con su costo total hasta el
-                heapq.heappush(cola, (nuevo_costo, vecino))
+                frontera.poner(vecino, nuevo_costo)
 
     # si nunca pude llegar al objetivo
     return None, None
+
+# jerarquia de contraccion (contraction hierarchies)
+# sirve cuando el grafo no cambia y se hacen muchisimas consultas sobre el
+# preproceso (una sola vez):
+#   se "contraen" los lugares uno por uno, del menos importante al mas importante
+#   contraer v = quitarlo del grafo; si el camino mas barato u -> v -> w ya no
+#   tiene otra forma de hacerse igual de barato (busqueda "testigo"), se agrega
+#   un atajo u -> w con el costo de los dos pasos
+#   el orden en que se contrajo cada lugar es su rango
+#   la importancia de cada lugar se calcula una vez al inicio y despues solo se
+#   recalcula la de los vecinos del que se acaba de contraer (los demas no cambian)
+# consulta:
+#   costo uniforme desde inicio solo subiendo de rango, y desde objetivo
+#   (en el grafo al reves) tambien solo subiendo. se juntan en el lugar de mas
+#   rango del camino, asi cada lado revisa muy pocos lugares
+#   al final los atajos se "desempacan" para dar el camino con lugares normales
+
+class JerarquiaContraccion:
+    def __init__(self, grafo, limite_testigo=50, saltos_testigo=5):
+        # grafo: el mismo formato de ucs_camino_mas_barato {lugar: {vecino: costo}}
+        # limite_testigo: cuantos lugares puede sacar cada busqueda testigo
+        # saltos_testigo: cuantas aristas puede tener un camino testigo
+        # si no alcanzan se agrega un atajo de mas (no pasa nada, solo ocupa un poco mas)
+        self.nodos = list(dict.fromkeys(
+            [u for u in grafo] + [v for vecinos in grafo.values() for v in vecinos]
+        ))
+        self.ids = {v: i for i, v in enumerate(self.nodos)}
+        n = len(self.nodos)
+        self.limite_testigo = limite_testigo
+        self.saltos_testigo = saltos_testigo
+
+        # grafo que queda (solo lugares sin contraer), de ida y de regreso
+        salida = [{} for _ in range(n)]
+        entrada = [{} for _ in range(n)]
+        ids = self.ids
+        for u, vecinos in grafo.items():
+            iu = ids[u]
+            for v, costo in vecinos.items():
+                iv = ids[v]
+                if iu != iv and costo < salida[iu].get(iv, float("inf")):
+                    salida[iu][iv] = costo
+                    entrada[iv][iu] = costo
+        self._salida, self._entrada = salida, entrada
+
+        # lo que queda al final:
+        #   arriba[i]   = [(j, costo), ...] aristas i -> j con rango[j] > rango[i]
+        #   abajo[i]    = [(j, costo), ...] aristas j -> i con rango[j] > rango[i]
+        #   medio[(i, j)] = lugar que se salta el atajo i -> j
+        self.arriba = [None] * n
+        self.abajo = [None] * n
+        self.medio = {}
+        self.rango = array("i", [0]) * n
+
+        self._contraidos = [0] * n  # cuantos vecinos de cada lugar ya se contrajeron
+        self._nivel = [0] * n       # que tan "alto" queda cada lugar en la jerarquia
+
+        # cola con la importancia vigente de cada lugar; si un lugar se recalcula
+        # se mete otra vez y la entrada vieja se ignora al salir
+        vigente = [self._prioridad(i) for i in range(n)]
+        cola = [(p, i) for i, p in enumerate(vigente)]
+        heapq.heapify(cola)
+        orden = 0
+        while cola:
+            p, v = heapq.heappop(cola)
+            if p != vigente[v] or salida[v] is None:
+                continue
+
+            atajos = self._atajos(v, limite_testigo, saltos_testigo)
+            for u, w, costo in atajos:
+                if costo < salida[u].get(w, float("inf")):
+                    salida[u][w] = costo
+                    entrada[w][u] = costo
+                    self.medio[(u, w)] = v
+
+            # todo lo que le queda a v va a lugares que se contraen despues (mas rango)
+            self.arriba[v] = list(salida[v].items())
+            self.abajo[v] = list(entrada[v].items())
+            vecinos = set(salida[v])
+            vecinos.update(entrada[v])
+            for w in salida[v]:
+                del entrada[w][v]
+            for u in entrada[v]:
+                del salida[u][v]
+            salida[v] = entrada[v] = None
+            self.rango[v] = orden
+            orden += 1
+
+            # solo cambia la importancia de los vecinos de v
+            nivel = self._nivel[v] + 1
+            for w in vecinos:
+                self._contraidos[w] += 1
+                if nivel > self._nivel[w]:
+                    self._nivel[w] = nivel
+                vigente[w] = self._prioridad(w)
+                heapq.heappush(cola, (vigente[w], w))
+
+        del self._salida, self._entrada, self._contraidos, self._nivel
+        self.num_atajos = len(self.medio)
+
+    def _prioridad(self, v):
+        # "diferencia de aristas": cuantas aristas agrega contra cuantas quita,
+        # mas cuantos vecinos ya se contrajeron (asi se reparte por todo el grafo)
+        # y su nivel (asi la jerarquia no queda muy alta y las consultas sacan menos)
+        salida = self._salida
+        return (2 * (self._contar_atajos(v) - len(salida[v]) - len(self._entrada[v]))
+                + self._contraidos[v] + self._nivel[v])
+
+    def _contar_atajos(self, v):
+        # cuantos atajos haria falta si se quitara v, pero solo con testigos de un paso
+        # (u -> w directo); es una estimacion rapida, la contraccion de verdad busca mas
+        salida = self._salida
+        mios = salida[v]
+        inf = float("inf")
+        cuantos = 0
+        for u, costo_u in self._entrada[v].items():
+            directos = salida[u]
+            for w, costo_w in mios.items():
+                if w != u and directos.get(w, inf) > costo_u + costo_w:
+                    cuantos += 1
+        return cuantos
+
+    def _atajos(self, v, limite, saltos):
+        # atajos (u, w, costo) que hacen falta si se quita v
+        salida, entrada = self._salida, self._entrada
+        if not salida[v] or not entrada[v]:
+            return []
+        max_salida = max(salida[v].values())
+        atajos = []
+        for u, costo_u in entrada[v].items():
+            destinos = {w: costo_u + costo_w for w, costo_w in salida[v].items() if w != u}
+            if not destinos:
+                continue
+            dist = self._testigo(u, v, costo_u + max_salida, destinos, limite, saltos)
+            for w, por_v in destinos.items():
+                if dist.get(w, float("inf")) > por_v:
+                    atajos.append((u, w, por_v))
+        return atajos
+
+    def _testigo(self, u, evitar, tope, destinos, limite, saltos):
+        # costo uniforme corto desde u sin pasar por evitar, hasta tope de costo,
+        # hasta sacar `limite` lugares, sin caminos de mas de `saltos` aristas
+        # y para en cuanto ya salieron todos los destinos
+        salida = self._salida
+        inf = float("inf")
+        dist = {u: 0}
+        vista = dist.get
+        cola = [(0, 0, u)]  # (costo, aristas, lugar)
+        sacados = 0
+        faltan = len(destinos)
+        while cola and sacados < limite:
+            d, p, x = heapq.heappop(cola)
+            if d > dist[x]:
+                continue
+            if d > tope:
+                break
+            sacados += 1
+            if x in destinos:
+                faltan -= 1
+                if not faltan:
+                    break
+            if p == saltos:
+                continue
+            p += 1
+            for y, costo in salida[x].items():
+                nd = d + costo
+                if nd < vista(y, inf) and y != evitar:
+                    dist[y] = nd
+                    heapq.heappush(cola, (nd, p, y))
+        return dist
+
+    def consultar(self, inicio, objetivo, estadisticas=None):
+        # regresa (camino, costo) igual que ucs_camino_mas_barato, o (None, None)
+        # estadisticas: si se da un diccionario, ahi queda cuantos lugares se sacaron
+        s = self.ids.get(inicio)
+        t = self.ids.get(objetivo)
+        if s is None or t is None:
+            return None, None
+        if s == t:
+            return [inicio], 0
+
+        inf = float("inf")
+        # dos busquedas de costo uniforme: [0] desde inicio por arriba,
+        # [1] desde objetivo por abajo (o sea, aristas al reves)
+        aristas = (self.arriba, self.abajo)
+        dist = ({s: 0}, {t: 0})
+        padres = ({s: -1}, {t: -1})
+        colas = ([(0, s)], [(0, t)])
+        mejor = inf
+        encuentro = -1
+        sacados = 0
+
+        while colas[0] or colas[1]:
+            # avanzo el lado cuyo siguiente lugar es mas barato
+            if not colas[1] or (colas[0] and colas[0][0][0] <= colas[1][0][0]):
+                lado = 0
+            else:
+                lado = 1
+            cola = colas[lado]
+            d, x = heapq.heappop(cola)
+            if d >= mejor:
+                # este lado ya no puede mejorar nada
+                cola.clear()
+                continue
+            mi_dist = dist[lado]
+            if d > mi_dist[x]:
+                continue
+            sacados += 1
+
+            otro = dist[1 - lado].get(x)
+            if otro is not None and d + otro < mejor:
+                mejor = d + otro
+                encuentro = x
+
+            mis_padres = padres[lado]
+            for y, costo in aristas[lado][x]:
+                nd = d + costo
+                if nd < mi_dist.get(y, inf):
+                    mi_dist[y] = nd
+                    mis_padres[y] = x
+                    heapq.heappush(cola, (nd, y))
+
+        if estadisticas is not None:
+            estadisticas["sacados"] = sacados
+        if encuentro == -1:
+            return None, None
+
+        # camino en la jerarquia: inicio ... encuentro ... objetivo
+        tramo = [encuentro]
+        x = padres[0][encuentro]
+        while x != -1:
+            tramo.append(x)
+            x = padres[0][x]
+        tramo.reverse()
+        x = padres[1][encuentro]
+        while x != -1:
+            tramo.append(x)
+            x = padres[1][x]
+
+        camino = [tramo[0]]
+        for a, b in zip(tramo, tramo[1:]):
+            self._desempacar(a, b, camino)
+        return [self.nodos[i] for i in camino], mejor
+
+    def _desempacar(self, a, b, camino):
+        # agrega a camino los lugares de a -> b (sin a), abriendo los atajos
+        pila = [(a, b)]
+        while pila:
+            a, b = pila.pop()
+            v = self.medio.get((a, b))
+            if v is None:
+                camino.append(b)
+            else:
+                # primero a -> v y luego v -> b (por eso se meten al reves)
+                pila.append((v, b))
+                pila.append((a, v))
+
+    def guardar(self, ruta):
+        # se guarda con pickle; solo cargar archivos que uno mismo genero
+        datos = {
+            "version": 1,
+            "nodos": self.nodos,
+            "arriba": self.arriba,
+            "abajo": self.abajo,
+            "medio": self.medio,
+            "rango": self.rango,
+            "limite_testigo": self.limite_testigo,
+            "saltos_testigo": self.saltos_testigo,
+        }
+        with open(ruta, "wb") as archivo:
+            pickle.dump(datos, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, "rb") as archivo:
+            datos = pickle.load(archivo)
+        if datos.get("version") != 1:
+            raise ValueError(f"archivo de jerarquia con version desconocida: {ruta}")
+        jerarquia = cls.__new__(cls)
+        jerarquia.nodos = datos["nodos"]
+        jerarquia.ids = {v: i for i, v in enumerate(jerarquia.nodos)}
+        jerarquia.arriba = datos["arriba"]
+        jerarquia.abajo = datos["abajo"]
+        jerarquia.medio = datos["medio"]
+        jerarquia.rango = datos["rango"]
+        jerarquia.limite_testigo = datos["limite_testigo"]
+        jerarquia.saltos_testigo = datos.get("saltos_testigo", 5)
+        jerarquia.num_atajos = len(jerarquia.medio)
+        return jerarquia
+
+def grafo_denso(num_nodos, grado, semilla=0):
+    # grafo con costos donde cada lugar tiene muchos vecinos
+    rnd = random.Random(semilla)
+    return {
+        i: {rnd.randrange(num_nodos): rnd.randint(1, 100) for _ in range(grado)}
+        for i in range(num_nodos)
+    }
+
+def benchmark(casos=((2000, 50), (2000, 200), (500, 400)), consultas=20):
+    # compara las dos colas en grafos densos
+    print("nodos  grado  cola       tiempo(s)  inserciones  obsoletos  max_tamano")
+    for n, grado in casos:
+        grafo = grafo_denso(n, grado)
+        rnd = random.Random(1)
+        pares = [(rnd.randrange(n), rnd.randrange(n)) for _ in range(consultas)]
+        costos = {}
+        for cola in ("perezosa", "indexada"):
+            total = {}
+            t0 = time.perf_counter()
+            resultados = []
+            for a, b in pares:
+                est = {}
+                resultados.append(ucs_camino_mas_barato(grafo, a, b, cola, est)[1])
+                for k, v in est.items():
+                    total[k] = max(total.get(k, 0), v) if k == "max_tamano" else total.get(k, 0) + v
+            t = time.perf_counter() - t0
+            costos[cola] = resultados
+            print(f"{n:<6} {grado:<6} {cola:<10} {t:>9.2f} {total['inserciones']:>12,}"
+                  f" {total['obsoletos']:>10,} {total['max_tamano']:>11,}")
+        assert costos["perezosa"] == costos["indexada"]
+
+def grafo_rejilla_con_pesos(lado, semilla=0):
+    # rejilla lado x lado parecida a un mapa de calles: cada cruce (fila, col)
+    # se conecta con sus 4 vecinos, ida y vuelta, con costos al azar entre 1 y 10
+    rnd = random.Random(semilla)
+    grafo = {(f, c): {} for f in range(lado) for c in range(lado)}
+    for f in range(lado):
+        for c in range(lado):
+            for v in ((f + 1, c), (f, c + 1)):
+                if v in grafo:
+                    costo = rnd.randint(1, 10)
+                    grafo[(f, c)][v] = costo
+                    grafo[v][(f, c)] = costo
+    return grafo
+
+def benchmark_jerarquia(lados=(50, 100, 150), consultas=200):
+    # costo uniforme normal contra la jerarquia de contraccion en rejillas tipo calles
+    print("lugares  preproceso(s)  atajos    archivo(KB)  carga(s)"
+          "  ucs(ms/consulta)  jerarquia(us/consulta)  sacados ucs/jerarquia")
+    for lado in lados:
+        grafo = grafo_rejilla_con_pesos(lado)
+        lugares = list(grafo)
+        rnd = random.Random(1)
+        pares = [(rnd.choice(lugares), rnd.choice(lugares)) for _ in range(consultas)]
+
+        t0 = time.perf_counter()
+        jerarquia = JerarquiaContraccion(grafo)
+        t_pre = time.perf_counter() - t0
+
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = Path(carpeta) / "jerarquia.pkl"
+            jerarquia.guardar(ruta)
+            kb = ruta.stat().st_size / 1024
+            t0 = time.perf_counter()
+            jerarquia = JerarquiaContraccion.cargar(ruta)
+            t_carga = time.perf_counter() - t0
+
+        # ucs normal solo con unas cuantas consultas porque es lento
+        pocas = pares[:20]
+        sacados_ucs = 0
+        t0 = time.perf_counter()
+        referencia = []
+        for a, b in pocas:
+            est = {}
+            referencia.append(ucs_camino_mas_barato(grafo, a, b, estadisticas=est)[1])
+            sacados_ucs += est["sacados"]
+        t_ucs = (time.perf_counter() - t0) / len(pocas)
+
+        sacados_ch = 0
+        t0 = time.perf_counter()
+        resultados = [jerarquia.consultar(a, b) for a, b in pares]
+        t_ch = (time.perf_counter() - t0) / len(pares)
+        for a, b in pares:
+            est = {}
+            jerarquia.consultar(a, b, est)
+            sacados_ch += est["sacados"]
+
+        assert [costo for _, costo in resultados[:len(pocas)]] == referencia
+        for (camino, costo), (a, b) in zip(resultados, pares):
+            # el camino desempacado usa aristas del grafo y suma el costo que dice
+            assert camino[0] == a and camino[-1] == b
+            assert sum(grafo[x][y] for x, y in zip(camino, camino[1:])) == costo
+
+        print(f"{len(grafo):<8,} {t_pre:>13.2f} {jerarquia.num_atajos:>8,} {kb:>12,.0f} {t_carga:>9.2f}"
+              f" {1000 * t_ucs:>17.1f} {1e6 * t_ch:>23.0f}"
+              f" {sacados_ucs / len(pocas):>13,.0f} / {sacados_ch / len(pares):,.0f}")
+
 # ejemplo muy corto para probar
 if __name__ == "__main__":
     # grafo con costos
@@ -88,3 +518,22 @@ if __name__ == "__main__":
     # pero salon -> patio -> servidor cuesta 6 + 1 = 7
     # entonces el algoritmo elige salon -> pasillo -> servidor
     # porque 6 es mas barato que 7
+
+    # lo mismo con la cola indexada, y viendo sus contadores
+    estadisticas = {}
+    camino, costo = ucs_camino_mas_barato(grafo, "salon", "servidor", cola="indexada",
+                                          estadisticas=estadisticas)
+    print("\ncon cola indexada:", camino, costo)
+    print("contadores de la cola:", estadisticas)
+
+    # con jerarquia de contraccion: se construye una vez y luego cada consulta es rapidisima
+    jerarquia = JerarquiaContraccion(grafo)
+    camino, costo = ucs_camino_mas_barato(grafo, "salon", "servidor", jerarquia=jerarquia)
+    print("con jerarquia:", camino, costo)
+
+    # comparar las colas en grafos densos: python 02.Busqueda_en_anchura_de_costo_uniforme.py --bench
+    if "--bench" in sys.argv:
+        print("\nbenchmark de colas:")
+        benchmark()
+        print("\nbenchmark de jerarquia de contraccion:")
+        benchmark_jerarquia()
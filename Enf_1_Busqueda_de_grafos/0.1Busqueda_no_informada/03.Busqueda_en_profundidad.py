@@ -6,37 +6,33 @@
 # bfs explora lugares por niveles (lo mas cerca primero)
 # dfs se mete directo por un camino hasta el fondo
 
-import csv
+import sys
+import time
+import tracemalloc
 from pathlib import Path
 
-DATA_PATH = Path(__file__).resolve().parent / "data" / "rutas.csv"
+from grafo_csr import cargar_grafo_csv  # lector de csv compartido (ver grafo_csr.py)
 
-def cargar_grafo_csv(ruta_csv: Path, bidireccional: bool = True):
-    grafo = {}
-    with ruta_csv.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            o = row["origen"].strip()
-            d = row["destino"].strip()
-            grafo.setdefault(o, []).append(d)
-            grafo.setdefault(d, [])
-            if bidireccional:
-                grafo.setdefault(d, []).append(o)
-    return grafo
+DATA_PATH = Path(__file__).resolve().parent / "data" / "rutas.csv"
 
 def dfs_camino(grafo, inicio, objetivo, visitados=None, camino=None):
     # inicio: donde empiezo
     # objetivo: a donde quiero llegar
     # esta funcion regresa un camino (lista) desde inicio hasta objetivo
     # o regresa None si no existe camino
-    # nota: esta version usa recursion
-    # recursion significa que la funcion se llama a si misma
-    # este if es solo para la primera llamada
-    # aqui iniciamos las estructuras
+    # nota: antes esta version usaba recursion (la funcion se llamaba a si misma)
+    # con caminos de mas de ~1000 pasos python truena con RecursionError
+    # y ademas cada llamada copiaba el camino (camino + [vecino])
+    # ahora usamos una pila hecha a mano:
+    # - pila guarda, para cada lugar del camino, los vecinos que faltan por probar
+    # - camino es una sola lista: agrego al bajar y quito al regresar
+    # el orden en que se visitan los lugares es el mismo que con recursion
     if visitados is None:
         visitados = set()   # conjunto de lugares ya visitados
     if camino is None:
         camino = [inicio]   # lista con el camino que llevo hasta ahorita
+    else:
+        camino = list(camino)  # copia, para no cambiar la lista de quien llama
 
     # marcamos el nodo actual (inicio) como visitado
     visitados.add(inicio)
@@ -46,31 +42,58 @@ def dfs_camino(grafo, inicio, objetivo, visitados=None, camino=None):
     if inicio == objetivo:
         return camino
 
-    # si no he llegado todavia
-    # veo a donde puedo ir desde este lugar
-    for vecino in grafo.get(inicio, []):
-        # si ese vecino no se ha visitado aun
-        if vecino not in visitados:
-            # intento seguir por ese vecino
-            # llamada recursiva:
-            # copiamos el camino actual y le agregamos el vecino
-            resultado = dfs_camino(
-                grafo,
-                vecino,
-                objetivo,
-                visitados,
-                camino + [vecino]
-            )
-
-            # si resultado no es None
-            # significa que desde ese vecino si pude llegar al objetivo
-            if resultado is not None:
-                return resultado
-
-    # si probe todos los vecinos y ninguno llego al objetivo
-    # regreso None para decir "por aqui no hubo camino"
+    # iter(...) va dando los vecinos uno por uno y se acuerda en cual iba
+    pila = [iter(grafo.get(inicio, []))]
+
+    while pila:
+        # sigo probando vecinos del lugar de hasta arriba de la pila
+        for vecino in pila[-1]:
+            # si ese vecino no se ha visitado aun
+            if vecino not in visitados:
+                visitados.add(vecino)
+                camino.append(vecino)
+
+                if vecino == objetivo:
+                    return camino
+
+                # bajo un nivel: ahora pruebo los vecinos de este vecino
+                pila.append(iter(grafo.get(vecino, [])))
+                break
+        else:
+            # el for termino sin break: ya probe todos los vecinos de este lugar
+            # y ninguno llego al objetivo, me regreso un paso
+            pila.pop()
+            camino.pop()
+
+    # si probe todos los caminos y ninguno llego al objetivo
     return None
 
+def pasillo_largo(n):
+    # grafo de prueba: c0 - c1 - c2 - ... - c(n-1), conectado de ida y vuelta
+    grafo = {}
+    for i in range(n):
+        vecinos = []
+        if i > 0:
+            vecinos.append("c" + str(i - 1))
+        if i < n - 1:
+            vecinos.append("c" + str(i + 1))
+        grafo["c" + str(i)] = vecinos
+    return grafo
+
+def benchmark(profundidades=(10**4, 10**5, 10**6)):
+    # antes, con recursion, esto tronaba desde ~1000 pasos de profundidad
+    print("profundidad   tiempo (s)   lugares/seg   memoria pico (MB)")
+    for n in profundidades:
+        grafo = pasillo_largo(n)
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        camino = dfs_camino(grafo, "c0", "c" + str(n - 1))
+        t = time.perf_counter() - t0
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert len(camino) == n
+        print(f"{n:<13} {t:>10.3f} {n / t:>13,.0f} {pico / 2**20:>19.1f}")
+
 # ejemplo
 if __name__ == "__main__":
     # desde salon puedo ir a pasillo y patio
@@ -93,3 +116,10 @@ if __name__ == "__main__":
     # dfs se mete en un camino hasta el fondo
     # si no sirve, se regresa y prueba otro
     # dfs no promete el camino mas corto
+
+    # ahora tambien funciona con caminos muy largos
+    print("camino por un pasillo de 5000 lugares:", len(dfs_camino(pasillo_largo(5000), "c0", "c4999")), "pasos")
+
+    # memoria y velocidad con profundidades grandes: python 03.Busqueda_en_profundidad.py --bench
+    if "--bench" in sys.argv:
+        benchmark()
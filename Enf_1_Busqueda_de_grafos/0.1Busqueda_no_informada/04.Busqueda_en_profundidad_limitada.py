@@ -6,23 +6,14 @@
 # si el objetivo esta muy lejos y el limite es chiquito, no lo va a encontrar
 # si el limite es suficiente, si lo encuentra
 
-import csv
+import sys
+import time
+import tracemalloc
 from pathlib import Path
 
-DATA_PATH = Path(__file__).resolve().parent / "data" / "rutas.csv"
+from grafo_csr import cargar_grafo_csv  # lector de csv compartido (ver grafo_csr.py)
 
-def cargar_grafo_csv(ruta_csv: Path, bidireccional: bool = True):
-    grafo = {}
-    with ruta_csv.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            o = row["origen"].strip()
-            d = row["destino"].strip()
-            grafo.setdefault(o, []).append(d)
-            grafo.setdefault(d, [])
-            if bidireccional:
-                grafo.setdefault(d, []).append(o)
-    return grafo
+DATA_PATH = Path(__file__).resolve().parent / "data" / "rutas.csv"
 
 def dfs_limitada(grafo, actual, objetivo, limite, camino=None):
     # grafo: conexiones entre lugares
@@ -30,10 +21,15 @@ def dfs_limitada(grafo, actual, objetivo, limite, camino=None):
     # objetivo: a donde quiero llegar
     # limite: cuanta profundidad maxima puedo bajar
     # camino: el camino que llevo hasta ahorita
-    
+    # version sin recursion: una pila con los vecinos que faltan de cada nivel
+    # y una sola lista camino (agrego al bajar, quito al regresar)
+    # asi no truena con limites grandes y no se copia el camino en cada paso
+
     # esta parte solo corre la primera vez para iniciar el camino
     if camino is None:
         camino = [actual]
+    else:
+        camino = list(camino)  # copia, para no cambiar la lista de quien llama
 
     # si ya llegue al objetivo, regreso el camino
     if actual == objetivo:
@@ -41,30 +37,54 @@ def dfs_limitada(grafo, actual, objetivo, limite, camino=None):
 
     # si ya me gaste todo el limite, ya no puedo bajar mas
     # entonces paro aqui y digo que por aqui no se llego
-    if limite == 0:
+    if limite <= 0:
         return None
 
-    # si todavia tengo limite, intento avanzar con cada vecino
-    for vecino in grafo.get(actual, []):
-        if vecino in camino:
-         continue
-    
-        # importante: le bajo 1 al limite
-        resultado = dfs_limitada(
-            grafo,
-            vecino,
-            objetivo,
-            limite - 1,        # bajo un nivel de profundidad
-            camino + [vecino]  # agrego el vecino al camino
-        )
-
-        # si encontre un camino valido, lo regreso
-        if resultado is not None:
-            return resultado
+    # en_camino es lo mismo que camino pero como set
+    # preguntar "vecino in en_camino" es inmediato, en la lista habia que recorrerla
+    en_camino = set(camino)
+    pila = [iter(grafo.get(actual, []))]
+
+    while pila:
+        # la profundidad del siguiente vecino es len(pila)
+        for vecino in pila[-1]:
+            if vecino in en_camino:
+                continue
+
+            if vecino == objetivo:
+                camino.append(vecino)
+                return camino
+
+            # solo bajo si todavia me queda limite para ese nivel
+            if len(pila) < limite:
+                camino.append(vecino)
+                en_camino.add(vecino)
+                pila.append(iter(grafo.get(vecino, [])))
+                break
+        else:
+            # ya probe todos los vecinos de este nivel, me regreso uno
+            pila.pop()
+            en_camino.discard(camino.pop())
 
     # si ningun vecino funciono dentro del limite, regreso None
     return None
 
+def benchmark(profundidades=(10**4, 10**5, 10**6)):
+    # pasillo c0 - c1 - ... - c(n-1) y el objetivo hasta el final
+    # con recursion esto tronaba desde ~1000 de profundidad
+    print("profundidad   tiempo (s)   lugares/seg   memoria pico (MB)")
+    for n in profundidades:
+        grafo = {"c" + str(i): ["c" + str(j) for j in (i - 1, i + 1) if 0 <= j < n]
+                 for i in range(n)}
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        camino = dfs_limitada(grafo, "c0", "c" + str(n - 1), limite=n)
+        t = time.perf_counter() - t0
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert len(camino) == n
+        print(f"{n:<13} {t:>10.3f} {n / t:>13,.0f} {pico / 2**20:>19.1f}")
+
 # ejemplo
 if __name__ == "__main__":
     # salon va a pasillo y patio
@@ -90,4 +110,9 @@ if __name__ == "__main__":
 
     print("\nlimite = 10 (Casa -> Taller_CNC)")
     camino4 = dfs_limitada(grafo, "Casa", "Taller_CNC", limite=10)
-    print("  camino encontrado:", camino4)
\ No newline at end of file
+    print("  camino encontrado:", camino4)
+
+    # memoria y velocidad con limites grandes: python 04.Busqueda_en_profundidad_limitada.py --bench
+    if "--bench" in sys.argv:
+        print("\nbenchmark:")
+        benchmark()
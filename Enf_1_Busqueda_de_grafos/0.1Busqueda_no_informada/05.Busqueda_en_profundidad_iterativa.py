@@ -9,77 +9,180 @@
 # - pero tarde o temprano llego al objetivo si es alcanzable
 
 import csv
+import sys
+import time
 from pathlib import Path
 
-DATA_PATH = Path(__file__).resolve().parent / "data" / "rutas.csv"
+from grafo_csr import cargar_grafo_csv  # lector de csv compartido (ver grafo_csr.py)
 
-def cargar_grafo_csv(ruta_csv: Path, bidireccional: bool = True):
-    grafo = {}
-    with ruta_csv.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            o = row["origen"].strip()
-            d = row["destino"].strip()
-            grafo.setdefault(o, []).append(d)
-            grafo.setdefault(d, [])
-            if bidireccional:
-                grafo.setdefault(d, []).append(o)
-    return grafo
+DATA_PATH = Path(__file__).resolve().parent / "data" / "rutas.csv"
 
-def dfs_limitada(grafo, actual, objetivo, limite, camino=None):
+def dfs_limitada(grafo, actual, objetivo, limite, camino=None, tabla=None, conteo=None):
     # esta funcion es igual que en el tema anterior (profundidad limitada)
     # intenta llegar al objetivo sin pasar el limite
-
+    # version sin recursion: una pila con los vecinos que faltan de cada nivel
+    # y una sola lista camino (agrego al bajar, quito al regresar)
+    # asi no truena con limites grandes y no se copia el camino en cada paso
+    #
+    # tabla (opcional): diccionario lugar -> profundidad mas chica a la que ya llegue
+    #   si vuelvo a llegar a un lugar igual o mas abajo que antes, no lo exploro otra vez:
+    #   la vez anterior ya tenia el mismo o mas limite para seguir bajando desde ahi
+    #   en grafos con ciclos esto evita repetir muchisimo trabajo
+    # conteo (opcional): diccionario donde se suman
+    #   expandidos = lugares que abri, podados = saltados por la tabla,
+    #   cortados = vecinos que no abri porque ya no me quedaba limite
+
+    # esta parte solo corre la primera vez para iniciar el camino
     if camino is None:
-        camino = [actual]  # camino que llevo hasta ahorita
+        camino = [actual]
+    else:
+        camino = list(camino)  # copia, para no cambiar la lista de quien llama
 
     # si ya llegue al objetivo, regreso el camino
     if actual == objetivo:
         return camino
 
-    # si ya no me queda profundidad permitida, paro aqui
-    if limite == 0:
+    # si ya me gaste todo el limite, ya no puedo bajar mas
+    # entonces paro aqui y digo que por aqui no se llego
+    if limite <= 0:
+        if conteo is not None:
+            conteo["cortados"] = conteo.get("cortados", 0) + 1
         return None
 
-    # pruebo cada vecino desde el lugar actual
-    for vecino in grafo.get(actual, []):
-        if vecino in camino:
+    expandidos, podados, cortados = 1, 0, 0
+    if tabla is not None:
+        tabla[actual] = 0
+
+    # en_camino es lo mismo que camino pero como set
+    # preguntar "vecino in en_camino" es inmediato, en la lista habia que recorrerla
+    en_camino = set(camino)
+    pila = [iter(grafo.get(actual, []))]
+    resultado = None
+
+    while pila:
+        # la profundidad del siguiente vecino es len(pila)
+        for vecino in pila[-1]:
+            if vecino in en_camino:
+                continue
+
+            if vecino == objetivo:
+                camino.append(vecino)
+                resultado = camino
+                break
+
+            profundidad = len(pila)
+            if tabla is not None:
+                if tabla.get(vecino, limite + 1) <= profundidad:
+                    podados += 1
+                    continue
+
+            # solo bajo si todavia me queda limite para ese nivel
+            if profundidad < limite:
+                if tabla is not None:
+                    tabla[vecino] = profundidad
+                camino.append(vecino)
+                en_camino.add(vecino)
+                pila.append(iter(grafo.get(vecino, [])))
+                expandidos += 1
+                break
+            cortados += 1
+        else:
+            # ya probe todos los vecinos de este nivel, me regreso uno
+            pila.pop()
+            en_camino.discard(camino.pop())
             continue
-        # llamada recursiva bajando el limite
-        resultado = dfs_limitada(
-            grafo,
-            vecino,
-            objetivo,
-            limite - 1,        # bajo uno al limite
-            camino + [vecino]  # agrego el vecino al camino
-        )
-
-        # si encontre camino valido lo regreso
+
         if resultado is not None:
-            return resultado
+            break
+
+    if conteo is not None:
+        conteo["expandidos"] = conteo.get("expandidos", 0) + expandidos
+        conteo["podados"] = conteo.get("podados", 0) + podados
+        conteo["cortados"] = conteo.get("cortados", 0) + cortados
 
-    # si ninguno funciono, regreso none
-    return None
+    # si ningun vecino funciono dentro del limite, regreso None
+    return resultado
 
-def profundidad_iterativa(grafo, inicio, objetivo, limite_max):
+def profundidad_iterativa(grafo, inicio, objetivo, limite_max, con_tabla=False, estadisticas=None):
     # esta funcion hace la parte "iterativa"
     # intenta encontrar camino con limite 1
     # luego con limite 2
     # luego con limite 3
     # y sigue asi hasta limite_max
     # si lo encuentra antes de llegar al limite max, se detiene
+    #
+    # con_tabla: usa la tabla de profundidades en cada vuelta (ver dfs_limitada)
+    #            el camino que sale sigue siendo de los mas cortos en pasos
+    # estadisticas: lista a la que se le agrega un diccionario por cada limite
+    #               {"limite", "expandidos", "podados", "cortados", "segundos"}
+    #               se puede guardar con exportar_estadisticas
 
     for limite in range(1, limite_max + 1):
-        # intento con este limite
-        camino = dfs_limitada(grafo, inicio, objetivo, limite)
+        conteo = {}
+        t0 = time.perf_counter()
+
+        # intento con este limite (la tabla se empieza de cero en cada vuelta)
+        tabla = {} if con_tabla else None
+        camino = dfs_limitada(grafo, inicio, objetivo, limite, tabla=tabla, conteo=conteo)
+
+        if estadisticas is not None:
+            estadisticas.append({
+                "limite": limite,
+                "expandidos": conteo.get("expandidos", 0),
+                "podados": conteo.get("podados", 0),
+                "cortados": conteo.get("cortados", 0),
+                "segundos": time.perf_counter() - t0,
+            })
 
         # si si encontro camino, ya lo regresamos
         if camino is not None:
             return camino, limite
 
+        # si ningun camino se corto por el limite, ya vi todo lo que se puede alcanzar
+        # subir el limite no va a encontrar nada nuevo
+        if conteo.get("cortados", 0) == 0:
+            break
+
     # si acabe todos los limites y nunca encontre nada
     return None, None
 
+def exportar_estadisticas(estadisticas, ruta):
+    # guarda las estadisticas de profundidad_iterativa en un csv
+    campos = ["limite", "expandidos", "podados", "cortados", "segundos"]
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.DictWriter(f, fieldnames=campos)
+        escritor.writeheader()
+        escritor.writerows(estadisticas)
+
+def rejilla(filas, columnas):
+    # grafo de prueba con muchos ciclos: cuadricula donde cada casilla
+    # se conecta con arriba, abajo, izquierda y derecha
+    grafo = {}
+    for f in range(filas):
+        for c in range(columnas):
+            grafo[(f, c)] = [
+                (f + df, c + dc)
+                for df, dc in ((1, 0), (0, 1), (-1, 0), (0, -1))
+                if 0 <= f + df < filas and 0 <= c + dc < columnas
+            ]
+    return grafo
+
+def benchmark(lados=(6, 7, 8)):
+    # de una esquina a la otra de la cuadricula, con y sin tabla
+    print("rejilla  modo       limite  expandidos    segundos")
+    for lado in lados:
+        grafo = rejilla(lado, lado)
+        for con_tabla in (False, True):
+            estadisticas = []
+            t0 = time.perf_counter()
+            _, limite = profundidad_iterativa(
+                grafo, (0, 0), (lado - 1, lado - 1), 4 * lado, con_tabla, estadisticas
+            )
+            t = time.perf_counter() - t0
+            expandidos = sum(e["expandidos"] for e in estadisticas)
+            modo = "con tabla" if con_tabla else "normal"
+            print(f"{lado}x{lado:<5} {modo:<10} {limite:>6} {expandidos:>11,} {t:>11.3f}")
+
 # ejemplo rapido
 if __name__ == "__main__":
     # salon -> pasillo, patio
@@ -109,4 +212,18 @@ if __name__ == "__main__":
     )   
 
     print("\ncamino de Casa a Taller_CNC:", camino2)
-    print("limite que se intento:", limite2)
\ No newline at end of file
+    print("limite que se intento:", limite2)
+
+    # misma busqueda pero con tabla y guardando lo que paso en cada limite
+    estadisticas = []
+    camino3, limite3 = profundidad_iterativa(
+        grafo, "Casa", "Estacionamiento", limite_max=15, con_tabla=True, estadisticas=estadisticas
+    )
+    print("\ncon tabla, camino de Casa a Estacionamiento:", camino3)
+    for e in estadisticas:
+        print("  limite", e["limite"], "-> expandidos:", e["expandidos"], "podados:", e["podados"])
+
+    # comparar con y sin tabla en grafos con ciclos: python 05.Busqueda_en_profundidad_iterativa.py --bench
+    if "--bench" in sys.argv:
+        print("\nbenchmark:")
+        benchmark()
@@ -5,8 +5,14 @@
 # lado objetivo -> avanza al reves
 # si se encuentran, ya hay camino
 
+import random
+import sys
+import time
 from collections import deque  # cola fifo para explorar por niveles
 
+from cargar_scripts import cargar_script  # para comparar contra 01 en el benchmark
+from grafo_csr import GrafoCSR, generar_grafo_aleatorio
+
 def reconstruir_camino(padres_inicio, padres_objetivo, punto):
     # arma el camino final cuando ya sabemos
     # en que punto se encontraron las dos busquedas
@@ -29,7 +35,54 @@ def reconstruir_camino(padres_inicio, padres_objetivo, punto):
     # junto las dos partes
     return parte_a + parte_b
 
-def busqueda_bidireccional(grafo, inicio, objetivo):
+def indice_predecesores(grafo):
+    # regresa un diccionario lugar -> lista de lugares que llegan a el
+    # ejemplo: si salon -> pasillo, entonces predecesores["pasillo"] tiene a "salon"
+    # se arma recorriendo todas las conexiones: O(V + E)
+    # con un diccionario no se guarda en ningun lado (el grafo puede cambiar sin avisar):
+    # para muchas consultas se arma una vez y se pasa como predecesores=
+    if isinstance(grafo, GrafoCSR):
+        # el grafo compacto no cambia, asi que el indice se guarda en el mismo grafo
+        if getattr(grafo, "predecesores", None) is None:
+            grafo.predecesores = grafo.invertido()
+        return grafo.predecesores
+
+    predecesores = {nodo: [] for nodo in grafo}
+    for nodo, vecinos in grafo.items():
+        for vecino in vecinos:
+            predecesores.setdefault(vecino, []).append(nodo)
+    return predecesores
+
+def expandir_nivel(cola, conexiones, dist_propia, padres_propios, dist_otra):
+    # expande un nivel completo de un lado de la busqueda
+    # conexiones: el grafo (lado inicio) o los predecesores (lado objetivo)
+    # regresa el punto de encuentro con el camino total mas corto, o None
+    mejor_punto = None
+    mejor_total = None
+
+    for _ in range(len(cola)):
+        actual = cola.popleft()
+        d = dist_propia[actual] + 1
+        for vecino in conexiones.get(actual, []):
+            if vecino not in dist_propia:
+                dist_propia[vecino] = d
+                padres_propios[vecino] = actual
+                cola.append(vecino)
+
+                # si el otro lado ya vio este lugar, las busquedas se encontraron
+                # no regreso luego luego: termino el nivel por si hay un encuentro mas corto
+                if vecino in dist_otra:
+                    total = d + dist_otra[vecino]
+                    if mejor_total is None or total < mejor_total:
+                        mejor_punto, mejor_total = vecino, total
+
+    return mejor_punto
+
+def busqueda_bidireccional(grafo, inicio, objetivo, predecesores=None):
+    # predecesores: indice de "quien llega a cada lugar" (hecho con indice_predecesores)
+    # si no lo dan, se arma en cada llamada (con GrafoCSR queda guardado en el grafo);
+    # si el grafo cambia, hay que volver a armarlo
+
     # caso facil
     if inicio == objetivo:
         return [inicio]
@@ -38,10 +91,12 @@ def busqueda_bidireccional(grafo, inicio, objetivo):
     if inicio not in grafo or objetivo not in grafo:
         return None
 
-    # visitados desde inicio
-    visit_i = {inicio}
-    # visitados desde objetivo
-    visit_o = {objetivo}
+    if predecesores is None:
+        predecesores = indice_predecesores(grafo)
+
+    # distancias desde cada lado (tambien sirven como visitados)
+    dist_i = {inicio: 0}
+    dist_o = {objetivo: 0}
 
     # colas de cada lado
     cola_i = deque([inicio])
@@ -53,41 +108,50 @@ def busqueda_bidireccional(grafo, inicio, objetivo):
 
     # repetimos mientras haya nodos en ambas colas
     while cola_i and cola_o:
-
-        # paso desde el lado inicio
-        actual_i = cola_i.popleft()
-
-        for vecino in grafo.get(actual_i, []):
-            if vecino not in visit_i:
-                visit_i.add(vecino)
-                padres_i[vecino] = actual_i
-                cola_i.append(vecino)
-
-                # si este vecino ya fue visto desde el lado objetivo
-                # las dos busquedas se encontraron
-                if vecino in visit_o:
-                    return reconstruir_camino(padres_i, padres_o, vecino)
-
-        # paso desde el lado objetivo
-        actual_o = cola_o.popleft()
-
-        # aqui vamos "al reves"
-        # buscamos nodos que puedan llegar a actual_o
-        for nodo, vecinos in grafo.items():
-            if actual_o in vecinos:
-                if nodo not in visit_o:
-                    visit_o.add(nodo)
-                    padres_o[nodo] = actual_o
-                    cola_o.append(nodo)
-
-                    # si este nodo ya fue visto desde inicio
-                    # las dos mitades se encontraron
-                    if nodo in visit_i:
-                        return reconstruir_camino(padres_i, padres_o, nodo)
+        # siempre avanzo el lado que tenga la frontera mas chica
+        # asi las dos busquedas crecen parejo y se revisan muchos menos lugares
+        if len(cola_i) <= len(cola_o):
+            # lado inicio: avanzo normal con el grafo
+            punto = expandir_nivel(cola_i, grafo, dist_i, padres_i, dist_o)
+        else:
+            # lado objetivo: avanzo al reves con los predecesores
+            punto = expandir_nivel(cola_o, predecesores, dist_o, padres_o, dist_i)
+
+        if punto is not None:
+            return reconstruir_camino(padres_i, padres_o, punto)
 
     # si nunca se encontraron
     return None
 
+def benchmark(tamanos=(10**5, 10**6), grado=3, consultas=20):
+    # compara contra bfs_camino_mas_corto de 01.Busqueda_en_anchura.py
+    bfs = cargar_script("01.Busqueda_en_anchura.py").bfs_camino_mas_corto
+    rnd = random.Random(1)
+
+    print("nodos      bfs (ms/consulta)  bidireccional (ms/consulta)  indice (ms, una vez)")
+    for n in tamanos:
+        grafo = generar_grafo_aleatorio(n, grado)
+        pares = [("n" + str(rnd.randrange(n)), "n" + str(rnd.randrange(n)))
+                 for _ in range(consultas)]
+
+        # el indice se arma una vez y se reusa en todas las consultas
+        t0 = time.perf_counter()
+        predecesores = indice_predecesores(grafo)
+        t_indice = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        largos_bfs = [len(bfs(grafo, a, b) or []) for a, b in pares]
+        t_bfs = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        largos_bi = [len(busqueda_bidireccional(grafo, a, b, predecesores) or []) for a, b in pares]
+        t_bi = time.perf_counter() - t0
+
+        # las dos tienen que dar caminos del mismo largo
+        assert largos_bfs == largos_bi
+        print(f"{n:<10} {1000 * t_bfs / consultas:>17.2f}"
+              f"  {1000 * t_bi / consultas:>27.2f}  {1000 * t_indice:>19.1f}")
+
 if __name__ == "__main__":
     # conexiones ejemplo
     # salon -> pasillo, patio
@@ -111,4 +175,9 @@ if __name__ == "__main__":
     print("camino salon -> servidor:", camino)
 
     camino2 = busqueda_bidireccional(grafo, "salon", "estacionamiento")
-    print("camino salon -> estacionamiento:", camino2)
\ No newline at end of file
+    print("camino salon -> estacionamiento:", camino2)
+
+    # para medir la velocidad contra bfs: python 06.Busqueda_bidireccional.py --bench
+    if "--bench" in sys.argv:
+        print("\nbenchmark bfs vs bidireccional:")
+        benchmark()
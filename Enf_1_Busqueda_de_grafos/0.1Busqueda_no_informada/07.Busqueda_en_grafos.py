@@ -7,7 +7,16 @@
 # para no volver a meterlos otra vez
 # Asi no repetimos lugares
 
+import os
+import sys
+import time
 from collections import deque  # deque = cola fifo (primero en entrar, primero en salir)
+from concurrent.futures import ProcessPoolExecutor
+
+from grafo_csr import (  # grafo compacto con numeros (ver grafo_csr.py)
+    GrafoCSR, bfs_idx, filas_de_distancias, generar_grafo_aleatorio,
+    iniciar_proceso_compartido,
+)
 
 def busqueda_en_grafo(grafo, inicio):
     # recorre el grafo empezando en inicio
@@ -17,6 +26,11 @@ def busqueda_en_grafo(grafo, inicio):
     if inicio not in grafo:
         return []
 
+    # con el grafo compacto el recorrido se hace con numeros
+    if isinstance(grafo, GrafoCSR):
+        _, tocados, _ = bfs_idx(grafo, grafo.id_de(inicio))
+        return [grafo.nombres[i] for i in tocados]
+
     visitados = set([inicio])     # lugares donde ya estuve
     cola = deque([inicio])        # lugares pendientes por revisar
     orden = []                    # orden en que voy visitando
@@ -33,15 +47,26 @@ def busqueda_en_grafo(grafo, inicio):
 
     return orden
 
-def hay_camino(grafo, inicio, objetivo):
+def hay_camino(grafo, inicio, objetivo, indice=None):
     # revisa si puedo llegar de inicio a objetivo
     # regresa True o False
+    # indice: un IndiceAlcanzabilidad ya armado para este grafo
+    #         con el la respuesta es inmediata, sin hacer bfs
 
     if inicio == objetivo:
         return True
+    if indice is not None:
+        return indice.hay_camino(inicio, objetivo)
     if inicio not in grafo:
         return False
 
+    if isinstance(grafo, GrafoCSR):
+        o = grafo.id_de(objetivo)
+        if o is None:
+            return False
+        padres, _, _ = bfs_idx(grafo, grafo.id_de(inicio), o)
+        return padres[o] != -1
+
     visitados = set([inicio])
     cola = deque([inicio])
 
@@ -57,6 +82,267 @@ def hay_camino(grafo, inicio, objetivo):
 
     return False
 
+class IndiceAlcanzabilidad:
+    """
+    responde "hay camino de a a b?" sin hacer un bfs cada vez
+
+    grafo no dirigido (por ejemplo cargado con bidireccional=True):
+      se usa union-find: cada lugar apunta a un "representante" de su grupo
+      dos lugares estan conectados si tienen el mismo representante
+
+    grafo dirigido:
+      1) se juntan los lugares que se alcanzan entre si (componentes fuertemente
+         conexas, algoritmo de tarjan). dentro de una componente todos se alcanzan
+      2) para cada componente se guarda un numero entero usado como conjunto de bits:
+         el bit c prendido = desde aqui se llega a la componente c
+      preguntar es revisar un bit: (alcanza[ca] >> cb) & 1
+
+    agregar_arista actualiza el indice sin volver a armarlo
+    ojo: en dirigido la memoria crece como (componentes^2) / 8 bytes
+    """
+
+    def __init__(self, grafo, no_dirigido=False):
+        self.grafo = grafo
+        self.no_dirigido = no_dirigido
+        self.numero = {}  # nombre del lugar -> numero
+
+        # todos los lugares, tambien los que solo aparecen como destino
+        for nodo, vecinos in grafo.items():
+            self._numero_de(nodo)
+            for vecino in vecinos:
+                self._numero_de(vecino)
+        n = len(self.numero)
+        ady = [[] for _ in range(n)]
+        for nodo, vecinos in grafo.items():
+            ady[self.numero[nodo]] = [self.numero[v] for v in vecinos]
+
+        if no_dirigido:
+            self.padre = list(range(n))
+            self.tamano = [1] * n
+            for v in range(n):
+                for w in ady[v]:
+                    self._unir(v, w)
+        else:
+            self.componente = self._tarjan(ady)
+            self._cerradura(ady)
+
+    def _numero_de(self, nombre):
+        i = self.numero.get(nombre)
+        if i is None:
+            i = self.numero[nombre] = len(self.numero)
+            # si el indice ya esta armado, el lugar nuevo empieza solito
+            if hasattr(self, "padre"):
+                self.padre.append(i)
+                self.tamano.append(1)
+            elif hasattr(self, "alcanza"):
+                c = len(self.alcanza)
+                self.componente.append(c)
+                self.alcanza.append(1 << c)
+        return i
+
+    # union-find (no dirigido)
+
+    def _raiz(self, v):
+        padre = self.padre
+        while padre[v] != v:
+            padre[v] = padre[padre[v]]  # acorto el camino a la mitad
+            v = padre[v]
+        return v
+
+    def _unir(self, a, b):
+        ra, rb = self._raiz(a), self._raiz(b)
+        if ra == rb:
+            return
+        if self.tamano[ra] < self.tamano[rb]:
+            ra, rb = rb, ra
+        self.padre[rb] = ra  # el grupo chico se cuelga del grande
+        self.tamano[ra] += self.tamano[rb]
+
+    # componentes y cerradura (dirigido)
+
+    @staticmethod
+    def _tarjan(ady):
+        # tarjan sin recursion (con una pila de iteradores)
+        # regresa componente[v]; las componentes salen numeradas de modo que
+        # si hay flecha de la componente x a la y (x != y) entonces y < x
+        n = len(ady)
+        orden = [-1] * n
+        bajo = [0] * n
+        en_pila = [False] * n
+        pila = []
+        componente = [-1] * n
+        contador = 0
+        c = 0
+
+        for s in range(n):
+            if orden[s] != -1:
+                continue
+            orden[s] = bajo[s] = contador
+            contador += 1
+            pila.append(s)
+            en_pila[s] = True
+            llamadas = [(s, iter(ady[s]))]
+
+            while llamadas:
+                v, vecinos = llamadas[-1]
+                bajo_hijo = False
+                for w in vecinos:
+                    if orden[w] == -1:
+                        orden[w] = bajo[w] = contador
+                        contador += 1
+                        pila.append(w)
+                        en_pila[w] = True
+                        llamadas.append((w, iter(ady[w])))
+                        bajo_hijo = True
+                        break
+                    if en_pila[w] and orden[w] < bajo[v]:
+                        bajo[v] = orden[w]
+                if bajo_hijo:
+                    continue
+
+                llamadas.pop()
+                if llamadas:
+                    u = llamadas[-1][0]
+                    if bajo[v] < bajo[u]:
+                        bajo[u] = bajo[v]
+                if bajo[v] == orden[v]:
+                    # v es la raiz de una componente: saco todos sus miembros
+                    while True:
+                        w = pila.pop()
+                        en_pila[w] = False
+                        componente[w] = c
+                        if w == v:
+                            break
+                    c += 1
+
+        return componente
+
+    def _cerradura(self, ady):
+        num_comp = max(self.componente, default=-1) + 1
+        miembros = [[] for _ in range(num_comp)]
+        for v, c in enumerate(self.componente):
+            miembros[c].append(v)
+
+        # voy de la componente 0 hacia arriba: sus sucesoras ya estan listas
+        alcanza = [0] * num_comp
+        for c in range(num_comp):
+            bits = 1 << c
+            for v in miembros[c]:
+                for w in ady[v]:
+                    bits |= alcanza[self.componente[w]]
+            alcanza[c] = bits
+        self.alcanza = alcanza
+
+    # preguntas y cambios
+
+    def hay_camino(self, inicio, objetivo):
+        if inicio == objetivo:
+            return True
+        a, b = self.numero.get(inicio), self.numero.get(objetivo)
+        if a is None or b is None:
+            return False
+        if self.no_dirigido:
+            return self._raiz(a) == self._raiz(b)
+        ca, cb = self.componente[a], self.componente[b]
+        return (self.alcanza[ca] >> cb) & 1 == 1
+
+    def agregar_arista(self, origen, destino):
+        # agrega la conexion origen -> destino al grafo (si es diccionario)
+        # y actualiza el indice sin rearmarlo
+        if isinstance(self.grafo, dict):
+            self.grafo.setdefault(origen, []).append(destino)
+            self.grafo.setdefault(destino, [])
+            if self.no_dirigido:
+                self.grafo[destino].append(origen)
+
+        a, b = self._numero_de(origen), self._numero_de(destino)
+        if self.no_dirigido:
+            self._unir(a, b)
+            return
+
+        ca, cb = self.componente[a], self.componente[b]
+        if (self.alcanza[ca] >> cb) & 1:
+            return  # ya se llegaba, no cambia nada
+        # todas las componentes que llegan a ca ahora tambien llegan a lo que alcanza cb
+        nuevos = self.alcanza[cb]
+        alcanza = self.alcanza
+        for x in range(len(alcanza)):
+            if (alcanza[x] >> ca) & 1:
+                alcanza[x] |= nuevos
+
+def distancias_todos_contra_todos(grafo, fuentes=None, procesos=None, fuentes_por_tarea=64):
+    """
+    distancia en pasos desde cada fuente hacia todos los lugares
+    (si fuentes es None, desde todos los lugares: todos contra todos)
+
+    el trabajo se reparte entre varios procesos (ProcessPoolExecutor)
+    el grafo se pone una sola vez en memoria compartida y cada proceso lo lee
+    de ahi, asi no se copia (pickle) el grafo entero a cada proceso
+
+    es un generador: va regresando (fuente, fila) conforme salen
+    - fila[i] = pasos desde fuente hasta el lugar numero i (-1 = no se llega)
+    - el nombre del lugar i es csr.nombres[i]
+    - las filas salen en el mismo orden que las fuentes
+
+    procesos: cuantos procesos usar (None = todos los nucleos, 1 = sin procesos)
+    """
+    csr = grafo if isinstance(grafo, GrafoCSR) else GrafoCSR.desde_dict(grafo)
+    if fuentes is None:
+        ids = list(range(csr.num_nodos))
+    else:
+        ids = [csr.id_de(f) for f in fuentes if f in csr]
+    tareas = [ids[k:k + fuentes_por_tarea] for k in range(0, len(ids), fuentes_por_tarea)]
+
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+
+    if procesos == 1:
+        for tarea in tareas:
+            for i, fila in filas_de_distancias(tarea, csr):
+                yield csr.nombres[i], fila
+        return
+
+    memoria, datos = csr.compartir()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            initializer=iniciar_proceso_compartido,
+            initargs=datos,
+        ) as ex:
+            # solo dejo unas cuantas tareas pendientes a la vez
+            # asi las filas no se amontonan en memoria si quien las lee va lento
+            pendientes = deque()
+            siguiente = 0
+            while siguiente < len(tareas) or pendientes:
+                while siguiente < len(tareas) and len(pendientes) < 2 * procesos:
+                    pendientes.append(ex.submit(filas_de_distancias, tareas[siguiente]))
+                    siguiente += 1
+                for i, fila in pendientes.popleft().result():
+                    yield csr.nombres[i], fila
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+def benchmark_paralelo(num_nodos=20000, grado=3, num_fuentes=2048):
+    # mide cuanto tarda con 1, 2, 4, ... procesos
+    # en una maquina con 16 nucleos deberia acercarse a 16x
+    grafo = GrafoCSR.desde_dict(generar_grafo_aleatorio(num_nodos, grado))
+    fuentes = grafo.nombres[:num_fuentes]
+    nucleos = os.cpu_count() or 1
+    pruebas = [p for p in (1, 2, 4, 8, 16, 32) if p <= nucleos]
+    if nucleos not in pruebas:
+        pruebas.append(nucleos)
+
+    base = None
+    print(f"{num_fuentes} fuentes, {num_nodos} lugares, {nucleos} nucleos")
+    for p in pruebas:
+        t0 = time.perf_counter()
+        for _ in distancias_todos_contra_todos(grafo, fuentes, procesos=p):
+            pass
+        t = time.perf_counter() - t0
+        base = base or t
+        print(f"  procesos={p:<3} {t:8.2f} s   aceleracion {base / t:5.2f}x")
+
 if __name__ == "__main__":
     # salon -> pasillo, patio
     # pasillo -> lab
@@ -77,6 +363,25 @@ if __name__ == "__main__":
     print("hay camino salon -> servidor?:", hay_camino(grafo, "salon", "servidor"))
     print("hay camino salon -> estacionamiento?:", hay_camino(grafo, "salon", "estacionamiento"))
 
+    # con el indice cada pregunta es revisar un bit, sin bfs
+    # (uso una copia porque agregar_arista tambien cambia el grafo)
+    copia = {lugar: vecinos[:] for lugar, vecinos in grafo.items()}
+    indice = IndiceAlcanzabilidad(copia)
+    print("\ncon indice, servidor -> salon?:", hay_camino(copia, "servidor", "salon", indice))
+    indice.agregar_arista("servidor", "salon")
+    print("despues de agregar servidor -> salon:", hay_camino(copia, "servidor", "salon", indice))
+    print("y cafeteria -> lab?:", hay_camino(copia, "cafeteria", "lab", indice))
+
     # visitados.add(x)  = marco que ya pase por x
     # cola.append(x)    = x se forma al final de la cola para revisarlo despues
     # cola.popleft()    = saco al primero en la cola (el siguiente a revisar)
+
+    print("\npasos entre todos los lugares:")
+    print("  columnas:", list(grafo))
+    for fuente, fila in distancias_todos_contra_todos(grafo, procesos=2):
+        print(" ", fuente, "->", list(fila))
+
+    # para medir como escala con los nucleos: python 07.Busqueda_en_grafos.py --bench
+    if "--bench" in sys.argv:
+        print("\nbenchmark con varios procesos:")
+        benchmark_paralelo()
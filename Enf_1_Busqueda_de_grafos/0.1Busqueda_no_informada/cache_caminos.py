@@ -0,0 +1,468 @@
+# cache de resultados de busquedas de caminos
+# bfs_camino_mas_corto (01), ucs_camino_mas_barato (02) y a_estrella (10) muchas veces
+# se llaman con el mismo (grafo, inicio, objetivo); aqui se guarda la respuesta para
+# no volver a buscar:
+#
+#   cache = CacheCaminos(maximo=10_000, ttl=60, max_bytes=50 * 2**20)
+#   bfs = cache.envolver(bfs_camino_mas_corto)
+#   bfs(grafo, "salon", "lab")   # busca
+#   bfs(grafo, "salon", "lab")   # sale de la cache
+#
+# la llave es (huella del grafo, funcion, inicio, objetivo, demas argumentos)
+# huella del grafo:
+#   - GrafoVersionado (abajo): un numero de version que sube con cada cambio,
+#     asi que sacar la huella no cuesta nada
+#   - GrafoCSR: hash de sus arreglos
+#   - diccionario normal: hash de todo su contenido (recorre todo el grafo en cada
+#     consulta; sirve, pero para muchas consultas conviene GrafoVersionado)
+# si el grafo cambia, la huella cambia y lo guardado ya no se usa
+#
+# subcaminos: cualquier pedazo de un camino mas corto tambien es un camino mas corto,
+# asi que si ya se guardo salon -> pasillo -> lab -> servidor, la consulta
+# pasillo -> servidor se contesta con ese pedazo sin buscar
+# (si hay empates puede salir otro camino distinto al que daria la busqueda,
+# pero con el mismo costo)
+#
+# se tira lo que se uso hace mas tiempo (lru) cuando se pasa de `maximo` entradas
+# o de `max_bytes` (tamano aproximado con sys.getsizeof), y lo que tenga mas de
+# `ttl` segundos guardado
+
+import inspect
+import sys
+import time
+from collections import OrderedDict
+from itertools import count
+
+from cargar_scripts import cargar_script  # para traer 01 y 02 en el benchmark
+
+_fichas = count(1)  # cada GrafoVersionado tiene su propio numero
+
+
+class _VecinosLista(list):
+    # lista de vecinos que le avisa a su grafo cuando se modifica
+    __slots__ = ("_grafo",)
+
+    def __init__(self, vecinos, grafo):
+        super().__init__(vecinos)
+        self._grafo = grafo
+
+
+class _VecinosDict(dict):
+    # diccionario {vecino: costo} que le avisa a su grafo cuando se modifica
+    __slots__ = ("_grafo",)
+
+    def __init__(self, vecinos, grafo):
+        super().__init__(vecinos)
+        self._grafo = grafo
+
+
+def _avisando(clase, metodos):
+    # cambia cada metodo que modifica por uno que primero sube la version del grafo
+    for nombre in metodos:
+        original = getattr(clase, nombre)
+
+        def metodo(self, *args, _original=original, **kwargs):
+            self._grafo.version += 1
+            return _original(self, *args, **kwargs)
+        metodo.__name__ = nombre
+        setattr(clase, nombre, metodo)
+
+
+_avisando(_VecinosLista, ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append",
+                          "extend", "insert", "pop", "remove", "clear", "sort", "reverse"))
+_avisando(_VecinosDict, ("__setitem__", "__delitem__", "__ior__", "pop", "popitem",
+                         "clear", "update", "setdefault"))
+
+
+class GrafoVersionado(dict):
+    """
+    el diccionario de siempre ({lugar: [vecinos]} o {lugar: {vecino: costo}})
+    pero con un numero `version` que sube cada vez que algo cambia,
+    tanto el diccionario de afuera como las listas / diccionarios de vecinos
+
+    grafo = GrafoVersionado({"a": {"b": 2}})
+    grafo["a"]["c"] = 5          # version sube
+    grafo["d"] = ["a"]           # version sube (y la lista nueva tambien avisa)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.version = 0
+        self.ficha = next(_fichas)
+        self.update(*args, **kwargs)
+
+    def _envolver(self, vecinos):
+        if isinstance(vecinos, (_VecinosLista, _VecinosDict)) and vecinos._grafo is self:
+            return vecinos
+        if isinstance(vecinos, dict):
+            return _VecinosDict(vecinos, self)
+        if isinstance(vecinos, list):
+            return _VecinosLista(vecinos, self)
+        return vecinos  # tuplas y demas no se pueden modificar
+
+    def __setitem__(self, nodo, vecinos):
+        self.version += 1
+        super().__setitem__(nodo, self._envolver(vecinos))
+
+    def __delitem__(self, nodo):
+        self.version += 1
+        super().__delitem__(nodo)
+
+    def update(self, *args, **kwargs):
+        for nodo, vecinos in dict(*args, **kwargs).items():
+            self[nodo] = vecinos
+
+    def __ior__(self, otro):
+        self.update(otro)
+        return self
+
+    def setdefault(self, nodo, vecinos=None):
+        if nodo not in self:
+            self[nodo] = vecinos
+        return self[nodo]
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def clear(self):
+        self.version += 1
+        super().clear()
+
+    def copy(self):
+        return GrafoVersionado({nodo: vecinos.copy() if hasattr(vecinos, "copy") else vecinos
+                                for nodo, vecinos in self.items()})
+
+    __hash__ = None
+
+
+def huella(grafo):
+    # algo que cambia si el grafo cambia (ver arriba)
+    if isinstance(grafo, GrafoVersionado):
+        return ("version", grafo.ficha, grafo.version)
+    destinos = getattr(grafo, "destinos", None)
+    if destinos is not None:  # GrafoCSR
+        pesos = grafo.pesos
+        return ("csr", len(destinos), hash((bytes(grafo.inicio), bytes(destinos),
+                                            bytes(pesos) if pesos is not None else b"",
+                                            tuple(grafo.nombres))))
+    contenido = []
+    for nodo, vecinos in grafo.items():
+        contenido.append(nodo)
+        contenido.append(tuple(vecinos.items()) if hasattr(vecinos, "items") else tuple(vecinos))
+    return ("contenido", len(grafo), hash(tuple(contenido)))
+
+
+def _como_llave(valor):
+    # los argumentos que no se pueden hashear (ej. una heuristica en diccionario)
+    # se cambian por su contenido; si tampoco se puede, TypeError y no se usa la cache
+    if isinstance(valor, dict):
+        return ("dict", tuple((k, _como_llave(v)) for k, v in valor.items()))
+    if isinstance(valor, list):
+        return ("list", tuple(_como_llave(v) for v in valor))
+    hash(valor)
+    return valor
+
+
+class _Entrada:
+    __slots__ = ("resultado", "camino", "posiciones", "guardado", "tamano", "familia")
+
+    def __init__(self, resultado, camino, indexar, familia, guardado):
+        self.resultado = resultado
+        self.camino = camino
+        self.familia = familia
+        self.guardado = guardado
+        # posicion de cada lugar en el camino, para contestar subcaminos
+        self.posiciones = {nodo: i for i, nodo in enumerate(camino)} if camino and indexar else None
+        self.tamano = (sys.getsizeof(resultado) + sys.getsizeof(camino)
+                       + sys.getsizeof(self.posiciones) + 100)
+
+
+class CacheCaminos:
+    def __init__(self, maximo=10_000, ttl=None, max_bytes=None, subcaminos=True,
+                 reloj=time.monotonic):
+        # maximo:     cuantas respuestas guardar
+        # ttl:        segundos que dura una respuesta (None = no caduca)
+        # max_bytes:  tamano aproximado maximo de todo lo guardado (None = sin limite)
+        # subcaminos: contestar tambien con pedazos de caminos guardados
+        self.maximo = maximo
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.subcaminos = subcaminos
+        self.reloj = reloj
+        self.entradas = OrderedDict()  # llave -> _Entrada, la mas vieja primero
+        self.por_lugar = {}            # (familia, lugar) -> {llave: None} de entradas que lo tienen
+        self.versiones = {}            # ficha de GrafoVersionado -> ultima version vista
+        self.bytes = 0
+        self.estadisticas = {
+            "consultas": 0,
+            "aciertos": 0,             # respuesta guardada tal cual
+            "aciertos_subcamino": 0,   # pedazo de un camino guardado
+            "fallos": 0,               # se tuvo que buscar
+            "no_cacheables": 0,        # algun argumento no se puede usar de llave (ej. un dict)
+                                       # o la respuesta depende del reloj (tiempo_max)
+            "caducados": 0,            # se tiraron por ttl
+            "desalojados": 0,          # se tiraron por maximo o max_bytes
+            "invalidados": 0,          # se tiraron porque su grafo cambio
+        }
+
+    def metricas(self):
+        # contadores + tasa de aciertos + tamano actual
+        e = self.estadisticas
+        aciertos = e["aciertos"] + e["aciertos_subcamino"]
+        return dict(e, tasa_aciertos=aciertos / e["consultas"] if e["consultas"] else 0.0,
+                    entradas=len(self.entradas), bytes=self.bytes)
+
+    def envolver(self, funcion, subcaminos=None):
+        # regresa una funcion que se llama igual que `funcion` pero pasa por la cache
+        # subcaminos=False para busquedas cuyo camino no es el mas corto
+        firma = inspect.signature(funcion)
+
+        def envuelta(*args, **kwargs):
+            return self._consultar(funcion, firma, args, kwargs, subcaminos)
+        envuelta.__name__ = getattr(funcion, "__name__", "envuelta")
+        envuelta.__doc__ = getattr(funcion, "__doc__", None)
+        envuelta.cache = self
+        return envuelta
+
+    def consultar(self, funcion, *args, **kwargs):
+        # como funcion(*args, **kwargs) pero usando la cache
+        return self._consultar(funcion, inspect.signature(funcion), args, kwargs, None)
+
+    def _consultar(self, funcion, firma, args, kwargs, subcaminos):
+        # la funcion tiene que recibir el grafo primero y tener parametros
+        # `inicio` y `objetivo` (asi son bfs, ucs y a_estrella, aunque a_estrella
+        # pida la heuristica antes que inicio)
+        # `estadisticas=` no cuenta para la llave; solo se llena cuando de verdad se busca
+        self.estadisticas["consultas"] += 1
+        argumentos = firma.bind(*args, **kwargs).arguments
+        nombres = list(argumentos)
+        grafo = argumentos[nombres[0]]
+        inicio, objetivo = argumentos["inicio"], argumentos["objetivo"]
+        if argumentos.get("tiempo_max") is not None:
+            # con limite de tiempo (a_estrella modo="anytime") la respuesta depende de
+            # cuanto se alcanzo a buscar: no se guarda ni se contesta con subcaminos
+            self.estadisticas["no_cacheables"] += 1
+            return funcion(*args, **kwargs)
+        try:
+            otros = tuple((k, _como_llave(v)) for k, v in argumentos.items()
+                          if k not in (nombres[0], "inicio", "objetivo", "estadisticas"))
+            familia = (huella(grafo), getattr(funcion, "__module__", None),
+                       getattr(funcion, "__qualname__", None), otros)
+            llave = (familia, inicio, objetivo)
+            hash(llave)
+        except TypeError:
+            self.estadisticas["no_cacheables"] += 1
+            return funcion(*args, **kwargs)
+        if isinstance(grafo, GrafoVersionado):
+            self._invalidar_viejas(grafo)
+
+        entrada = self._buscar(llave)
+        if entrada is not None:
+            self.estadisticas["aciertos"] += 1
+            return self._copia(entrada.resultado)
+
+        if subcaminos is None:
+            # con peso > 1 (a* ponderado) el camino ya no es el mas corto
+            subcaminos = self.subcaminos and argumentos.get("peso", 1) == 1
+        if subcaminos:
+            respuesta = self._subcamino(familia, grafo, inicio, objetivo)
+            if respuesta is not None:
+                self.estadisticas["aciertos_subcamino"] += 1
+                return respuesta
+
+        self.estadisticas["fallos"] += 1
+        resultado = funcion(*args, **kwargs)
+        self._guardar(llave, familia, resultado, subcaminos)
+        return self._copia(resultado)
+
+    def invalidar(self, grafo=None):
+        # tira todo (o solo lo de un grafo); normalmente no hace falta llamarlo,
+        # la huella ya cambia cuando el grafo cambia
+        if grafo is None:
+            quitar = list(self.entradas)
+        elif isinstance(grafo, GrafoVersionado):
+            # todas las versiones de ese grafo
+            quitar = [llave for llave in self.entradas if llave[0][0][:2] == ("version", grafo.ficha)]
+        else:
+            h = huella(grafo)
+            quitar = [llave for llave in self.entradas if llave[0][0] == h]
+        for llave in quitar:
+            self._quitar(llave)
+        self.estadisticas["invalidados"] += len(quitar)
+
+    def limpiar(self):
+        self.entradas.clear()
+        self.por_lugar.clear()
+        self.versiones.clear()
+        self.bytes = 0
+
+    # --- por dentro ---
+
+    @staticmethod
+    def _copia(resultado):
+        # se regresa una copia del camino para que quien lo use lo pueda modificar
+        if isinstance(resultado, list):
+            return list(resultado)
+        if isinstance(resultado, tuple) and resultado and isinstance(resultado[0], list):
+            return (list(resultado[0]),) + resultado[1:]
+        return resultado
+
+    def _buscar(self, llave):
+        entrada = self.entradas.get(llave)
+        if entrada is None:
+            return None
+        if self.ttl is not None and self.reloj() - entrada.guardado > self.ttl:
+            self._quitar(llave)
+            self.estadisticas["caducados"] += 1
+            return None
+        self.entradas.move_to_end(llave)
+        return entrada
+
+    def _invalidar_viejas(self, grafo):
+        # la primera consulta despues de un cambio tira todo lo de versiones anteriores
+        anterior = self.versiones.get(grafo.ficha)
+        if anterior == grafo.version:
+            return
+        self.versiones[grafo.ficha] = grafo.version
+        if anterior is None:
+            return
+        actual = huella(grafo)
+        quitar = [llave for llave in self.entradas
+                  if llave[0][0][:2] == actual[:2] and llave[0][0] != actual]
+        for llave in quitar:
+            self._quitar(llave)
+        self.estadisticas["invalidados"] += len(quitar)
+
+    def _subcamino(self, familia, grafo, inicio, objetivo):
+        llaves = self.por_lugar.get((familia, inicio))
+        if not llaves:
+            return None
+        for llave in list(llaves):
+            entrada = self._buscar(llave)
+            if entrada is None:
+                continue
+            i = entrada.posiciones[inicio]
+            j = entrada.posiciones.get(objetivo)
+            if j is None or j < i:
+                continue
+            pedazo = entrada.camino[i:j + 1]
+            if isinstance(entrada.resultado, list):
+                return pedazo
+            # (camino, costo): el costo del pedazo se suma con las aristas del grafo
+            # en el mismo orden en que lo suma la busqueda
+            costo = 0
+            for u, v in zip(pedazo, pedazo[1:]):
+                vecinos = grafo[u]
+                costo += vecinos[v] if hasattr(vecinos, "items") else 1
+            return pedazo, costo
+        return None
+
+    def _guardar(self, llave, familia, resultado, usar_subcaminos):
+        if isinstance(resultado, list):
+            camino = resultado
+        elif isinstance(resultado, tuple) and resultado and isinstance(resultado[0], list):
+            camino = resultado[0]
+        else:
+            camino = None
+        if llave in self.entradas:
+            self._quitar(llave)
+        entrada = _Entrada(resultado, camino, usar_subcaminos, familia, self.reloj())
+        self.entradas[llave] = entrada
+        self.bytes += entrada.tamano
+        if entrada.posiciones:
+            for nodo in entrada.posiciones:
+                self.por_lugar.setdefault((familia, nodo), {})[llave] = None
+
+        while self.entradas and (len(self.entradas) > self.maximo
+                                 or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            self._quitar(next(iter(self.entradas)))
+            self.estadisticas["desalojados"] += 1
+
+    def _quitar(self, llave):
+        entrada = self.entradas.pop(llave)
+        self.bytes -= entrada.tamano
+        if entrada.posiciones:
+            for nodo in entrada.posiciones:
+                llaves = self.por_lugar.get((entrada.familia, nodo))
+                if llaves is not None:
+                    llaves.pop(llave, None)
+                    if not llaves:
+                        del self.por_lugar[(entrada.familia, nodo)]
+
+
+CACHE_COMPARTIDA = CacheCaminos()
+
+
+def cachear(funcion, cache=None, subcaminos=None):
+    # atajo: cachear(bfs_camino_mas_corto) usa la cache compartida del modulo
+    return (cache or CACHE_COMPARTIDA).envolver(funcion, subcaminos)
+
+
+def benchmark(lado=60, consultas=2000, distintas=300, semilla=0):
+    # consultas repetidas de ucs en una rejilla tipo calles: sin cache, con cache
+    # sin subcaminos y con subcaminos; a la mitad se cambia un costo
+    import random
+    ucs = cargar_script("02.Busqueda_en_anchura_de_costo_uniforme.py")
+    grafo = GrafoVersionado(ucs.grafo_rejilla_con_pesos(lado, semilla))
+    rnd = random.Random(semilla)
+    lugares = list(grafo)
+    pares = [(rnd.choice(lugares), rnd.choice(lugares)) for _ in range(distintas)]
+    pedidos = [rnd.choice(pares) for _ in range(consultas)]
+    mitad = consultas // 2
+
+    print(f"rejilla {lado}x{lado}, {consultas} consultas ({distintas} distintas), "
+          "un costo cambia a la mitad")
+    print("forma                tiempo (s)  aciertos  subcaminos  invalidados  tasa   KB")
+    referencia = None
+    for nombre, cache in (("sin cache", None),
+                          ("cache", CacheCaminos(subcaminos=False)),
+                          ("cache + subcaminos", CacheCaminos())):
+        g = grafo.copy()
+        buscar = cache.envolver(ucs.ucs_camino_mas_barato) if cache else ucs.ucs_camino_mas_barato
+        costos = []
+        t0 = time.perf_counter()
+        for k, (inicio, objetivo) in enumerate(pedidos):
+            if k == mitad:
+                u = lugares[len(lugares) // 2]
+                v = next(iter(g[u]))
+                g[u][v] = 1000
+            costos.append(buscar(g, inicio, objetivo)[1])
+        t = time.perf_counter() - t0
+        if referencia is None:
+            referencia = costos
+        assert costos == referencia, nombre
+        if cache is None:
+            print(f"{nombre:<20} {t:>10.2f}")
+        else:
+            m = cache.metricas()
+            print(f"{nombre:<20} {t:>10.2f} {m['aciertos']:>9} {m['aciertos_subcamino']:>11}"
+                  f" {m['invalidados']:>12} {m['tasa_aciertos']:>5.2f} {m['bytes'] / 1024:>5.0f}")
+
+
+if __name__ == "__main__":
+    bfs = cargar_script("01.Busqueda_en_anchura.py")
+    pasillos = GrafoVersionado({
+        "salon": ["pasillo", "patio"],
+        "pasillo": ["lab"],
+        "patio": ["cafeteria"],
+        "lab": ["servidor"],
+        "cafeteria": [],
+        "servidor": [],
+    })
+    cache = CacheCaminos(maximo=100, ttl=60)
+    buscar = cache.envolver(bfs.bfs_camino_mas_corto)
+    print(buscar(pasillos, "salon", "servidor"))
+    print(buscar(pasillos, "salon", "servidor"))   # sale de la cache
+    print(buscar(pasillos, "pasillo", "servidor"))  # pedazo del camino de arriba
+    pasillos["patio"].append("servidor")            # el grafo cambia: lo guardado ya no vale
+    print(buscar(pasillos, "salon", "servidor"))
+    print(cache.metricas())
+
+    if "--bench" in sys.argv:
+        print()
+        benchmark()
@@ -0,0 +1,39 @@
+# los scripts de este repo empiezan con numero (01.Busqueda_en_anchura.py, ...)
+# y no se pueden importar normal; los benchmarks que comparan contra otro script
+# lo cargan con cargar_script:
+#   ucs = cargar_script("02.Busqueda_en_anchura_de_costo_uniforme.py")
+#   a_y_ao = cargar_script("10.Busquedas_A_y_AO.py", INFORMADA)
+
+import importlib.util
+import sys
+from pathlib import Path
+
+NO_INFORMADA = Path(__file__).resolve().parent
+INFORMADA = NO_INFORMADA.parent / "02.Busqueda_informada"
+
+
+def cargar_script(nombre, carpeta=NO_INFORMADA):
+    # regresa el modulo, igual que un import:
+    # - la carpeta se agrega a sys.path, porque el script importa a sus vecinos
+    #   (10 importa capa_heuristica, por ejemplo)
+    # - el modulo queda en sys.modules (como "10_Busquedas_A_y_AO"), asi que cargarlo
+    #   otra vez regresa el mismo y sus funciones se pueden mandar a otros procesos
+    #   (temple_simulado_cadenas, algoritmo_genetico_islas, ... con procesos > 1)
+    #   ojo: eso es con fork (linux); con spawn el proceso hijo no sabe cargarlo
+    ruta = (Path(carpeta) / nombre).resolve()
+    nombre_modulo = ruta.stem.replace(".", "_")
+    modulo = sys.modules.get(nombre_modulo)
+    if modulo is not None and getattr(modulo, "__file__", None) == str(ruta):
+        return modulo
+
+    if str(ruta.parent) not in sys.path:
+        sys.path.append(str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre_modulo, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre_modulo] = modulo
+    try:
+        spec.loader.exec_module(modulo)
+    except BaseException:
+        del sys.modules[nombre_modulo]
+        raise
+    return modulo
@@ -0,0 +1,151 @@
+# colas de prioridad para costo uniforme (02) y a* (10)
+# las dos tienen las mismas funciones, asi se puede escoger cual usar en cada llamada:
+#   cola.poner(nodo, prioridad)  -> mete el nodo, o le baja la prioridad si ya estaba
+#   cola.sacar()                 -> saca (prioridad, nodo) con la prioridad mas chica
+#   bool(cola), len(cola)        -> si quedan nodos pendientes / cuantos
+#   cola.estadisticas            -> contadores para comparar las dos
+#
+# ColaPerezosa: la de siempre con heapq
+#   si un nodo mejora se mete otra vez y la entrada vieja se queda en el heap
+#   cuando sale una entrada vieja (obsoleta) simplemente se ignora
+#   en grafos densos el heap puede crecer hasta el numero de aristas
+#
+# ColaIndexada: heap binario que sabe en que posicion esta cada nodo
+#   si un nodo mejora, se sube en el heap en su lugar (decrease-key)
+#   nunca hay entradas repetidas, el heap tiene a lo mucho un lugar por nodo
+#
+# en las dos, si hay empate de prioridad sale primero el nodo "mas chico"
+# (igual que con las tuplas (prioridad, nodo) de heapq)
+
+import heapq
+
+
+def _estadisticas_vacias():
+    return {
+        "inserciones": 0,    # veces que se metio algo al heap
+        "disminuciones": 0,  # veces que un nodo que ya estaba mejoro su prioridad
+        "sacados": 0,        # nodos que se sacaron de verdad
+        "obsoletos": 0,      # entradas viejas que salieron y se ignoraron
+        "max_tamano": 0,     # lo mas grande que llego a estar el heap
+    }
+
+
+class ColaPerezosa:
+    def __init__(self):
+        self.heap = []
+        self.vigente = {}  # nodo -> prioridad que cuenta ahorita
+        self.estadisticas = _estadisticas_vacias()
+
+    def poner(self, nodo, prioridad):
+        anterior = self.vigente.get(nodo)
+        if anterior is not None:
+            if prioridad >= anterior:
+                return
+            self.estadisticas["disminuciones"] += 1
+        self.vigente[nodo] = prioridad
+        heapq.heappush(self.heap, (prioridad, nodo))
+        self.estadisticas["inserciones"] += 1
+        if len(self.heap) > self.estadisticas["max_tamano"]:
+            self.estadisticas["max_tamano"] = len(self.heap)
+
+    def sacar(self):
+        while True:
+            prioridad, nodo = heapq.heappop(self.heap)
+            if self.vigente.get(nodo) == prioridad:
+                del self.vigente[nodo]
+                self.estadisticas["sacados"] += 1
+                return prioridad, nodo
+            # esta entrada ya no vale, el nodo mejoro despues
+            self.estadisticas["obsoletos"] += 1
+
+    def __contains__(self, nodo):
+        return nodo in self.vigente
+
+    def __len__(self):
+        return len(self.vigente)
+
+
+class ColaIndexada:
+    def __init__(self):
+        self.heap = []      # lista de (prioridad, nodo)
+        self.posicion = {}  # nodo -> en que posicion de heap esta
+        self.estadisticas = _estadisticas_vacias()
+
+    def poner(self, nodo, prioridad):
+        i = self.posicion.get(nodo)
+        if i is None:
+            self.heap.append((prioridad, nodo))
+            i = len(self.heap) - 1
+            self.posicion[nodo] = i
+            self.estadisticas["inserciones"] += 1
+            if len(self.heap) > self.estadisticas["max_tamano"]:
+                self.estadisticas["max_tamano"] = len(self.heap)
+        else:
+            if prioridad >= self.heap[i][0]:
+                return
+            self.heap[i] = (prioridad, nodo)
+            self.estadisticas["disminuciones"] += 1
+        self._subir(i)
+
+    def sacar(self):
+        heap = self.heap
+        primero = heap[0]
+        ultimo = heap.pop()
+        del self.posicion[primero[1]]
+        if heap:
+            heap[0] = ultimo
+            self.posicion[ultimo[1]] = 0
+            self._bajar(0)
+        self.estadisticas["sacados"] += 1
+        return primero
+
+    def _subir(self, i):
+        heap, posicion = self.heap, self.posicion
+        elemento = heap[i]
+        while i > 0:
+            padre = (i - 1) // 2
+            if heap[padre] <= elemento:
+                break
+            heap[i] = heap[padre]
+            posicion[heap[i][1]] = i
+            i = padre
+        heap[i] = elemento
+        posicion[elemento[1]] = i
+
+    def _bajar(self, i):
+        heap, posicion = self.heap, self.posicion
+        n = len(heap)
+        elemento = heap[i]
+        while True:
+            hijo = 2 * i + 1
+            if hijo >= n:
+                break
+            if hijo + 1 < n and heap[hijo + 1] < heap[hijo]:
+                hijo += 1
+            if elemento <= heap[hijo]:
+                break
+            heap[i] = heap[hijo]
+            posicion[heap[i][1]] = i
+            i = hijo
+        heap[i] = elemento
+        posicion[elemento[1]] = i
+
+    def __contains__(self, nodo):
+        return nodo in self.posicion
+
+    def __len__(self):
+        return len(self.heap)
+
+
+COLAS = {
+    "perezosa": ColaPerezosa,
+    "indexada": ColaIndexada,
+}
+
+
+def crear_cola(tipo="perezosa"):
+    # tipo: "perezosa" o "indexada"
+    try:
+        return COLAS[tipo]()
+    except KeyError:
+        raise ValueError(f"tipo de cola desconocido: {tipo!r} (opciones: {list(COLAS)})") from None
@@ -0,0 +1,762 @@
+# grafo compacto en formato csr (compressed sparse row)
+# en los otros archivos el grafo es un diccionario asi:
+#   {"salon": ["pasillo", "patio"], ...}
+# eso esta bien para grafos chiquitos, pero con millones de aristas
+# cada lista y cada string ocupan mucha memoria
+# y cada vez que reviso un vecino python tiene que hashear un string
+#
+# la idea de csr:
+# - a cada lugar le doy un numero una sola vez (0, 1, 2, ...)
+# - guardo todos los vecinos de todos los lugares pegaditos en un solo arreglo (destinos)
+# - inicio[i] dice en que posicion de destinos empiezan los vecinos del lugar i
+# - los vecinos del lugar i son destinos[inicio[i] : inicio[i + 1]]
+#
+# ejemplo:
+#   nombres  = ["salon", "pasillo", "patio"]
+#   inicio   = [0, 2, 2, 2]
+#   destinos = [1, 2]
+#   significa: salon (0) va a pasillo (1) y patio (2), los demas no van a ningun lado
+#
+# GrafoCSR tambien se puede usar como si fuera el diccionario de siempre
+# (grafo.get(lugar, []), lugar in grafo, grafo.items()...)
+# asi todas las busquedas de esta carpeta lo aceptan sin cambiarles nada
+
+import csv
+import io
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from collections import deque
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
+from pathlib import Path
+
+
+class GrafoCSR(Mapping):
+    """
+    grafo guardado en arreglos de enteros
+
+    nombres:  lista con el nombre de cada lugar (posicion = numero del lugar)
+    inicio:   array('i') de tamano num_nodos + 1
+    destinos: array('i') con los vecinos de todos los lugares seguidos
+    pesos:    array('d') con el costo de cada arista (o None si no tiene costos)
+    indice:   diccionario nombre -> numero (si no se da, se arma solo)
+    """
+
+    def __init__(self, nombres, inicio, destinos, pesos=None, indice=None):
+        self.nombres = nombres
+        self.inicio = inicio
+        self.destinos = destinos
+        self.pesos = pesos
+        if indice is None and nombres is not None:
+            indice = {nombre: i for i, nombre in enumerate(nombres)}
+        # con nombres=None solo sirve la parte con numeros (asi lo usan los procesos hijos)
+        self.indice = indice
+
+    @classmethod
+    def desde_dict(cls, grafo):
+        # convierte el diccionario de siempre a csr
+        # acepta listas de vecinos {"a": ["b"]}
+        # o diccionarios de costos {"a": {"b": 3}}
+        indice = {}
+        nombres = []
+
+        def id_de(nombre):
+            i = indice.get(nombre)
+            if i is None:
+                i = len(nombres)
+                indice[nombre] = i
+                nombres.append(nombre)
+            return i
+
+        # primero numero los lugares en el mismo orden que el diccionario
+        for nodo in grafo:
+            id_de(nodo)
+
+        con_pesos = any(isinstance(v, Mapping) for v in grafo.values())
+        inicio = array("i", [0])
+        destinos = array("i")
+        pesos = array("d") if con_pesos else None
+
+        for nodo in list(nombres):
+            vecinos = grafo[nodo]
+            if con_pesos:
+                for vecino, costo in vecinos.items():
+                    destinos.append(id_de(vecino))
+                    pesos.append(costo)
+            else:
+                for vecino in vecinos:
+                    destinos.append(id_de(vecino))
+            inicio.append(len(destinos))
+
+        # los lugares que solo aparecen como destino no tienen vecinos
+        while len(inicio) < len(nombres) + 1:
+            inicio.append(len(destinos))
+
+        return cls(nombres, inicio, destinos, pesos, indice)
+
+    @classmethod
+    def desde_aristas(cls, origenes, destinos_id, nombres, pesos=None, indice=None):
+        # arma el csr a partir de dos arreglos de enteros (origen[k] -> destino[k])
+        # se usa counting sort: cuento cuantas aristas sale de cada lugar
+        # y luego acomodo cada arista en su lugar
+        n = len(nombres)
+        inicio = array("i", bytes(4 * (n + 1)))
+        for o in origenes:
+            inicio[o + 1] += 1
+        for i in range(n):
+            inicio[i + 1] += inicio[i]
+
+        # cada arista va al siguiente hueco libre de su origen
+        # asi las aristas de un mismo lugar quedan en su orden original
+        siguiente = array("i", inicio[:-1])
+        destinos = array("i", bytes(4 * len(origenes)))
+        nuevos_pesos = array("d", bytes(8 * len(origenes))) if pesos is not None else None
+        for k, o in enumerate(origenes):
+            pos = siguiente[o]
+            destinos[pos] = destinos_id[k]
+            if nuevos_pesos is not None:
+                nuevos_pesos[pos] = pesos[k]
+            siguiente[o] = pos + 1
+
+        return cls(nombres, inicio, destinos, nuevos_pesos, indice)
+
+    # parte con numeros (la rapida)
+
+    @property
+    def num_nodos(self):
+        return len(self.inicio) - 1
+
+    @property
+    def num_aristas(self):
+        return len(self.destinos)
+
+    def id_de(self, nombre):
+        # numero del lugar o None si no existe
+        return self.indice.get(nombre)
+
+    def nombre_de(self, i):
+        return self.nombres[i]
+
+    def vecinos_idx(self, i):
+        # regresa los numeros de los vecinos de i
+        return self.destinos[self.inicio[i]:self.inicio[i + 1]]
+
+    def pesos_idx(self, i):
+        return self.pesos[self.inicio[i]:self.inicio[i + 1]]
+
+    def invertido(self):
+        # mismo grafo pero con todas las flechas al reves
+        # vecinos del invertido = lugares que llegan a mi (predecesores)
+        # comparte nombres e indice, solo arma arreglos nuevos
+        origenes = array("i")
+        for i in range(self.num_nodos):
+            origenes.extend([i] * (self.inicio[i + 1] - self.inicio[i]))
+        return GrafoCSR.desde_aristas(
+            self.destinos, origenes, self.nombres, self.pesos, self.indice
+        )
+
+    def compartir(self):
+        """
+        copia inicio y destinos a un bloque de memoria compartida
+        (multiprocessing.shared_memory) para que otros procesos lo lean sin copiarlo
+        regresa (memoria, datos) donde datos = (nombre_del_bloque, num_nodos, num_aristas)
+        quien llama tiene que hacer memoria.close() y memoria.unlink() al terminar
+        """
+        n, m = self.num_nodos, self.num_aristas
+        memoria = shared_memory.SharedMemory(create=True, size=max(1, 4 * (n + 1 + m)))
+        vista = memoria.buf.cast("i")
+        vista[:n + 1] = array("i", self.inicio)
+        vista[n + 1:n + 1 + m] = array("i", self.destinos)
+        vista.release()
+        return memoria, (memoria.name, n, m)
+
+    @classmethod
+    def desde_compartido(cls, nombre, n, m):
+        # se pega a un bloque hecho con compartir() (sin copiar nada)
+        # regresa (memoria, grafo) y el grafo solo tiene la parte con numeros
+        # el que creo el bloque es el que lo borra, este proceso solo lo lee
+        memoria = shared_memory.SharedMemory(name=nombre)
+        vista = memoria.buf.cast("i")
+        return memoria, cls(None, vista[:n + 1], vista[n + 1:n + 1 + m])
+
+    def tamano_bytes(self):
+        # memoria que ocupan los arreglos de aristas (sin contar los nombres)
+        total = self.inicio.itemsize * len(self.inicio)
+        total += self.destinos.itemsize * len(self.destinos)
+        if self.pesos is not None:
+            total += self.pesos.itemsize * len(self.pesos)
+        return total
+
+    # parte tipo diccionario (para que funcionen las busquedas de siempre)
+
+    def __getitem__(self, nombre):
+        i = self.indice.get(nombre)
+        if i is None:
+            raise KeyError(nombre)
+        a, b = self.inicio[i], self.inicio[i + 1]
+        nombres = self.nombres
+        if self.pesos is None:
+            return [nombres[j] for j in self.destinos[a:b]]
+        return {nombres[j]: c for j, c in zip(self.destinos[a:b], self.pesos[a:b])}
+
+    def get(self, nombre, default=None):
+        if self.indice.get(nombre) is None:
+            return default
+        return self[nombre]
+
+    def __contains__(self, nombre):
+        return self.indice.get(nombre) is not None
+
+    def __iter__(self):
+        return iter(self.nombres)
+
+    def __len__(self):
+        return len(self.nombres)
+
+
+class TablaNombres(Sequence):
+    """
+    nombres de los lugares leidos directo del archivo binario (mmap)
+    no se arma ningun diccionario: para buscar un nombre se usa
+    busqueda binaria sobre "orden" (los numeros de los lugares ordenados por nombre)
+    sirve como "nombres" (tabla[i]) y como "indice" (tabla.get(nombre))
+    """
+
+    def __init__(self, texto, posiciones, orden):
+        self.texto = texto            # todos los nombres pegados en utf-8
+        self.posiciones = posiciones  # nombre i = texto[posiciones[i]:posiciones[i + 1]]
+        self.orden = orden
+
+    def _bytes(self, i):
+        return bytes(self.texto[self.posiciones[i]:self.posiciones[i + 1]])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._bytes(i).decode("utf-8")
+
+    def __len__(self):
+        return len(self.posiciones) - 1
+
+    def get(self, nombre, default=None):
+        if not isinstance(nombre, str):
+            return default
+        buscado = nombre.encode("utf-8")
+        bajo, alto = 0, len(self.orden)
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self._bytes(self.orden[medio]) < buscado:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo < len(self.orden) and self._bytes(self.orden[bajo]) == buscado:
+            return self.orden[bajo]
+        return default
+
+
+# archivo binario (snapshot) del grafo
+# encabezado y luego los arreglos uno tras otro, tal cual estan en memoria:
+#   pesos (float64, solo si hay costos), posiciones de nombres (int64),
+#   inicio (int32), destinos (int32), orden de nombres (int32), texto de nombres
+# como los arreglos se guardan tal cual, al cargar solo se hace mmap y no se copia nada
+MAGIA = b"GCSR"
+VERSION_BINARIO = 1
+ENCABEZADO = struct.Struct("<4sIqqqqBB")
+TAM_ENCABEZADO = 64
+TAM_BLOQUE = 1 << 22  # caracteres de csv que se leen de una vez
+
+
+def ruta_binario(ruta_csv, bidireccional, con_pesos):
+    # el binario vive junto al csv, uno por cada forma de leerlo
+    extra = ("bi" if bidireccional else "dir") + ("_pesos" if con_pesos else "")
+    return ruta_csv.with_name(ruta_csv.name + "." + extra + ".csrbin")
+
+
+def guardar_binario(grafo, ruta, tamano_csv=0, mtime_csv=0, bidireccional=False):
+    n, m = grafo.num_nodos, grafo.num_aristas
+    codificados = [grafo.nombres[i].encode("utf-8") for i in range(n)]
+    posiciones = array("q", [0])
+    for c in codificados:
+        posiciones.append(posiciones[-1] + len(c))
+    orden = array("i", sorted(range(n), key=codificados.__getitem__))
+
+    # se escribe a un archivo temporal y al final se cambia de nombre (os.replace es atomico):
+    # si el programa se cae a medio escribir, el binario anterior (o ninguno) sigue ahi
+    temporal = str(ruta) + ".tmp"
+    with open(temporal, "wb") as f:
+        encabezado = ENCABEZADO.pack(
+            MAGIA, VERSION_BINARIO, tamano_csv, mtime_csv, n, m,
+            grafo.pesos is not None, bidireccional,
+        )
+        f.write(encabezado.ljust(TAM_ENCABEZADO, b"\0"))
+        if grafo.pesos is not None:
+            f.write(array("d", grafo.pesos).tobytes())
+        f.write(posiciones.tobytes())
+        f.write(array("i", grafo.inicio).tobytes())
+        f.write(array("i", grafo.destinos).tobytes())
+        f.write(orden.tobytes())
+        f.write(b"".join(codificados))
+    os.replace(temporal, ruta)
+
+
+def cargar_binario(ruta, tamano_csv=None, mtime_csv=None):
+    """
+    abre el binario con mmap y arma un GrafoCSR encima sin copiar
+    si se dan tamano_csv y mtime_csv y no coinciden con los guardados
+    (o sea el csv cambio) regresa None
+    tambien regresa None si el archivo no mide lo que dice su encabezado
+    (por ejemplo si quedo cortado), asi quien llama lo vuelve a hacer
+    """
+    with open(ruta, "rb") as f:
+        if os.fstat(f.fileno()).st_size < TAM_ENCABEZADO:
+            return None
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magia, version, tamano, mtime, n, m, con_pesos, _ = ENCABEZADO.unpack_from(mapa)
+    if magia != MAGIA or version != VERSION_BINARIO:
+        mapa.close()
+        return None
+    if tamano_csv is not None and (tamano, mtime) != (tamano_csv, mtime_csv):
+        mapa.close()
+        return None
+
+    # reviso el tamano antes de hacer las vistas: primero la parte fija
+    # y luego el texto de los nombres, cuyo largo es la ultima posicion
+    fijo = TAM_ENCABEZADO + (8 * m if con_pesos else 0) + 8 * (n + 1) + 4 * (n + 1) + 4 * m + 4 * n
+    if n < 0 or m < 0 or len(mapa) < fijo:
+        mapa.close()
+        return None
+    largo_texto = struct.unpack_from("<q", mapa, TAM_ENCABEZADO + (8 * m if con_pesos else 0) + 8 * n)[0]
+    if len(mapa) != fijo + largo_texto:
+        mapa.close()
+        return None
+
+    vista = memoryview(mapa)
+    pos = TAM_ENCABEZADO
+
+    def tomar(formato, cantidad):
+        nonlocal pos
+        tam = struct.calcsize(formato) * cantidad
+        parte = vista[pos:pos + tam].cast(formato)
+        pos += tam
+        return parte
+
+    pesos = tomar("d", m) if con_pesos else None
+    posiciones = tomar("q", n + 1)
+    inicio = tomar("i", n + 1)
+    destinos = tomar("i", m)
+    orden = tomar("i", n)
+    texto = vista[pos:pos + posiciones[n]]
+
+    tabla = TablaNombres(texto, posiciones, orden)
+    grafo = GrafoCSR(tabla, inicio, destinos, pesos, indice=tabla)
+    grafo.mapa = mapa  # el mmap tiene que seguir abierto mientras se use el grafo
+    return grafo
+
+
+class _Numerador(dict):
+    # nombre -> numero; un nombre nuevo recibe el siguiente numero libre
+    # (asi map(indice.__getitem__, nombres) numera todo un bloque sin un for de python)
+    def __missing__(self, nombre):
+        numero = self[nombre] = len(self)
+        return numero
+
+
+def _columnas_del_bloque(texto, num_columnas):
+    # regresa una lista por columna con los campos de todas las filas del bloque
+    # lo normal (sin comillas, sin lineas vacias, todas las filas con num_columnas
+    # campos) se parte con split, que es c puro; si el bloque tiene algo raro se usa
+    # csv.reader para ese bloque nada mas
+    # una fila con otro numero de campos es un error (ValueError), no se adivina
+    comas = set(map(str.count, texto.split("\n"), repeat(",")))
+    if '"' not in texto and comas == {num_columnas - 1}:
+        campos = texto.replace("\n", ",").split(",")
+        return [campos[c::num_columnas] for c in range(num_columnas)]
+    filas = []
+    for fila in csv.reader(io.StringIO(texto)):
+        if not fila:
+            continue
+        if len(fila) != num_columnas:
+            raise ValueError(f"fila con {len(fila)} campos y el encabezado tiene "
+                             f"{num_columnas}: {','.join(fila)!r}")
+        filas.append(fila)
+    return [[fila[c] for fila in filas] for c in range(num_columnas)]
+
+
+def leer_csv_por_bloques(ruta_csv, bidireccional=True, con_pesos=False):
+    # lee el csv en bloques grandes de texto (TAM_BLOQUE) en lugar de fila por fila
+    # a cada nombre le doy su numero la primera vez que aparece
+    # columnas: origen,destino y si con_pesos tambien costo
+    indice = _Numerador()
+    origenes = array("i")
+    destinos = array("i")
+    pesos = array("d") if con_pesos else None
+
+    with ruta_csv.open(encoding="utf-8") as f:
+        encabezado = [c.strip() for c in next(csv.reader([f.readline()]))]
+        col_o = encabezado.index("origen")
+        col_d = encabezado.index("destino")
+        col_c = encabezado.index("costo") if con_pesos else None
+
+        resto = ""
+        while True:
+            leido = f.read(TAM_BLOQUE)
+            texto = resto + leido
+            if leido:
+                # la ultima fila puede quedar cortada, se guarda para el siguiente bloque
+                corte = texto.rfind("\n")
+                if corte == -1:
+                    resto = texto
+                    continue
+                texto, resto = texto[:corte], texto[corte + 1:]
+            texto = texto.strip("\n")
+            if texto:
+                columnas = _columnas_del_bloque(texto, len(encabezado))
+                # todo el bloque de una vez, en el orden o1, d1, o2, d2, ...
+                # (los nombres nuevos reciben su numero al pasar)
+                nombres = [None] * (2 * len(columnas[col_o]))
+                nombres[0::2] = columnas[col_o]
+                nombres[1::2] = columnas[col_d]
+                ids = array("i", map(indice.__getitem__, map(str.strip, nombres)))
+                if con_pesos:
+                    costos = array("d", map(float, columnas[col_c]))
+
+                if bidireccional:
+                    # aristas o1->d1, d1->o1, o2->d2, d2->o2, ...
+                    volteados = array("i", ids)
+                    volteados[0::2] = ids[1::2]
+                    volteados[1::2] = ids[0::2]
+                    origenes.extend(ids)
+                    destinos.extend(volteados)
+                    if con_pesos:
+                        dobles = array("d", bytes(16 * len(costos)))
+                        dobles[0::2] = costos
+                        dobles[1::2] = costos
+                        pesos.extend(dobles)
+                else:
+                    origenes.extend(ids[0::2])
+                    destinos.extend(ids[1::2])
+                    if con_pesos:
+                        pesos.extend(costos)
+            if not leido:
+                break
+
+    # el indice se lleno en orden, asi que sus llaves ya son los nombres en orden
+    nombres = list(indice)
+    return GrafoCSR.desde_aristas(origenes, destinos, nombres, pesos, dict(indice))
+
+
+def cargar_grafo_csv(ruta_csv, bidireccional=True, con_pesos=False, usar_cache=False):
+    """
+    carga data/rutas.csv (o cualquier csv con columnas origen,destino[,costo])
+    regresa un GrafoCSR, que se usa igual que el diccionario de siempre
+
+    con usar_cache=True (apagado por omision, para no dejar archivos junto al csv):
+    la primera vez lee el csv y guarda un binario al lado (.csrbin)
+    las siguientes veces solo abre el binario con mmap (casi instantaneo)
+    si el csv cambia (tamano o fecha) o el binario esta incompleto, se vuelve a hacer
+    """
+    if not usar_cache:
+        return leer_csv_por_bloques(ruta_csv, bidireccional, con_pesos)
+
+    info = ruta_csv.stat()
+    binario = ruta_binario(ruta_csv, bidireccional, con_pesos)
+    if binario.exists():
+        grafo = cargar_binario(binario, info.st_size, info.st_mtime_ns)
+        if grafo is not None:
+            return grafo
+
+    grafo = leer_csv_por_bloques(ruta_csv, bidireccional, con_pesos)
+    try:
+        guardar_binario(grafo, binario, info.st_size, info.st_mtime_ns, bidireccional)
+    except OSError:
+        # si no se puede escribir junto al csv, igual regreso el grafo
+        pass
+    return grafo
+
+
+def bfs_idx(grafo, fuente, objetivo=-1, padres=None, objetivos=None):
+    """
+    bfs usando solo numeros
+    grafo: GrafoCSR
+    fuente: numero del lugar de inicio
+    objetivo: numero del lugar buscado (-1 = recorrer todo)
+    padres: array('i') de tamano num_nodos lleno de -1 (se puede reutilizar)
+    objetivos: conjunto de numeros buscados, para para cuando ya salieron todos
+               (se va vaciando, asi que pasen una copia si la necesitan)
+
+    regresa (padres, tocados, aristas_revisadas)
+    - padres[v] = de donde llegue a v (la fuente se apunta a si misma)
+    - tocados = lista de lugares que se marcaron, sirve para limpiar padres despues
+    """
+    if padres is None:
+        padres = array("i", [-1]) * grafo.num_nodos
+    inicio = grafo.inicio
+    destinos = grafo.destinos
+
+    padres[fuente] = fuente
+    tocados = [fuente]
+    cola = deque([fuente])
+    aristas = 0
+    if objetivos is not None:
+        objetivos.discard(fuente)
+
+    while cola:
+        actual = cola.popleft()
+        if actual == objetivo or objetivos is not None and not objetivos:
+            break
+        a, b = inicio[actual], inicio[actual + 1]
+        aristas += b - a
+        for vecino in destinos[a:b]:
+            if padres[vecino] == -1:
+                padres[vecino] = actual
+                tocados.append(vecino)
+                cola.append(vecino)
+                if objetivos is not None:
+                    objetivos.discard(vecino)
+
+    return padres, tocados, aristas
+
+
+def distancias_idx(grafo, fuente, dist=None, objetivos=None):
+    """
+    igual que bfs_idx pero guarda cuantos pasos hay hasta cada lugar
+    dist: array('i') lleno de -1 (se puede reutilizar), -1 = no alcanzable
+    regresa (dist, tocados)
+    """
+    if dist is None:
+        dist = array("i", [-1]) * grafo.num_nodos
+    inicio = grafo.inicio
+    destinos = grafo.destinos
+
+    dist[fuente] = 0
+    tocados = [fuente]
+    cola = deque([fuente])
+    if objetivos is not None:
+        objetivos.discard(fuente)
+
+    while cola:
+        if objetivos is not None and not objetivos:
+            break
+        actual = cola.popleft()
+        d = dist[actual] + 1
+        for vecino in destinos[inicio[actual]:inicio[actual + 1]]:
+            if dist[vecino] == -1:
+                dist[vecino] = d
+                tocados.append(vecino)
+                cola.append(vecino)
+                if objetivos is not None:
+                    objetivos.discard(vecino)
+
+    return dist, tocados
+
+
+# parte que corre dentro de cada proceso hijo (ver distancias_todos_contra_todos en 07)
+# vive aqui y no en 07 porque los hijos tienen que poder importarla
+
+_GRAFO_DEL_PROCESO = None
+
+
+def iniciar_proceso_compartido(nombre, n, m):
+    # se llama una vez al arrancar cada proceso: se pega a la memoria compartida
+    global _GRAFO_DEL_PROCESO
+    _GRAFO_DEL_PROCESO = GrafoCSR.desde_compartido(nombre, n, m)
+
+
+def filas_de_distancias(fuentes, grafo=None):
+    # corre un bfs por cada fuente y regresa [(fuente, fila), ...]
+    # fila es un array con la distancia en pasos a cada lugar (-1 = no se llega)
+    # uso el tipo de entero mas chico que alcance para que viajen menos bytes
+    # grafo: solo se pasa cuando se corre sin procesos hijos
+    if grafo is None:
+        _, grafo = _GRAFO_DEL_PROCESO
+    dist = array("i", [-1]) * grafo.num_nodos
+    filas = []
+    for fuente in fuentes:
+        _, tocados = distancias_idx(grafo, fuente, dist)
+        mayor = max(dist[v] for v in tocados)
+        tipo = "b" if mayor < 2**7 else "h" if mayor < 2**15 else "i"
+        filas.append((fuente, array(tipo, dist)))
+        for v in tocados:
+            dist[v] = -1
+    return filas
+
+
+def camino_desde_padres(grafo, padres, fuente, objetivo):
+    # reconstruye el camino (con nombres) caminando hacia atras con padres
+    if padres[objetivo] == -1:
+        return None
+    camino = [grafo.nombres[objetivo]]
+    paso = objetivo
+    while paso != fuente:
+        paso = padres[paso]
+        camino.append(grafo.nombres[paso])
+    camino.reverse()
+    return camino
+
+
+def generar_aristas_aleatorias(num_nodos, grado, semilla=0):
+    # arma aristas al azar para hacer pruebas de velocidad
+    # cada lugar se llama "n0", "n1", ... y tiene "grado" vecinos
+    # ademas conecto i -> i+1 para que casi todo sea alcanzable
+    # regresa (nombres, origenes, destinos) con origenes/destinos en array('i')
+    rnd = random.Random(semilla)
+    nombres = ["n" + str(i) for i in range(num_nodos)]
+    origenes = array("i")
+    destinos = array("i")
+    for i in range(num_nodos):
+        origenes.append(i)
+        destinos.append((i + 1) % num_nodos)
+        for _ in range(grado - 1):
+            origenes.append(i)
+            destinos.append(rnd.randrange(num_nodos))
+    return nombres, origenes, destinos
+
+
+def generar_grafo_aleatorio(num_nodos, grado, semilla=0, con_pesos=False):
+    # lo mismo pero como el diccionario de siempre
+    nombres, origenes, destinos = generar_aristas_aleatorias(num_nodos, grado, semilla)
+    rnd = random.Random(semilla + 1)
+    grafo = {nombre: ({} if con_pesos else []) for nombre in nombres}
+    for o, d in zip(origenes, destinos):
+        if con_pesos:
+            grafo[nombres[o]][nombres[d]] = rnd.randint(1, 9)
+        else:
+            grafo[nombres[o]].append(nombres[d])
+    return grafo
+
+
+# benchmark: diccionario contra csr
+
+def _bfs_dict(grafo, inicio):
+    # bfs normal con el diccionario de listas (igual que en 01)
+    visitados = {inicio}
+    cola = deque([inicio])
+    aristas = 0
+    while cola:
+        actual = cola.popleft()
+        vecinos = grafo.get(actual, [])
+        aristas += len(vecinos)
+        for vecino in vecinos:
+            if vecino not in visitados:
+                visitados.add(vecino)
+                cola.append(vecino)
+    return aristas
+
+
+def _medir(tipo, num_nodos, grado):
+    # corre en un proceso aparte para que la memoria (rss) de cada
+    # estructura no se mezcle con la de la otra
+    if tipo == "csr":
+        # el csr se arma directo de las aristas, nunca existe el diccionario
+        nombres, origenes, destinos = generar_aristas_aleatorias(num_nodos, grado)
+        grafo = GrafoCSR.desde_aristas(origenes, destinos, nombres)
+        del origenes, destinos
+    else:
+        grafo = generar_grafo_aleatorio(num_nodos, grado)
+
+    t0 = time.perf_counter()
+    if tipo == "csr":
+        _, _, aristas = bfs_idx(grafo, 0)
+    else:
+        aristas = _bfs_dict(grafo, "n0")
+    t = time.perf_counter() - t0
+
+    # resource solo existe en linux/mac, por eso se importa aqui y no arriba
+    # (asi los demas archivos que usan grafo_csr siguen funcionando en windows)
+    import resource
+
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return aristas / t, rss_kb
+
+
+def benchmark(tamanos=(10**5, 10**6), grado=4):
+    print("nodos      tipo   aristas/seg   rss maximo")
+    for n in tamanos:
+        for tipo in ("dict", "csr"):
+            # un proceso nuevo por medicion
+            with ProcessPoolExecutor(max_workers=1) as ex:
+                vel, rss_kb = ex.submit(_medir, tipo, n, grado).result()
+            print(f"{n:<10} {tipo:<6} {vel:>12,.0f} {rss_kb / 1024:>9.1f} MB")
+
+
+def _cargar_con_dictreader(ruta_csv):
+    # como se cargaba antes en 01, 03, 04 y 05 (solo para comparar)
+    grafo = {}
+    with ruta_csv.open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            o = row["origen"].strip()
+            d = row["destino"].strip()
+            grafo.setdefault(o, []).append(d)
+            grafo.setdefault(d, [])
+            grafo.setdefault(d, []).append(o)
+    return grafo
+
+
+def benchmark_cargador(num_aristas=10**6, num_nodos=10**5):
+    # escribe un csv grande temporal con el formato de rutas.csv y mide
+    # DictReader (antes), csv por bloques sin cache, con cache la primera vez
+    # (lee y escribe el binario) y con cache despues (mmap del binario)
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = Path(carpeta) / "rutas_grande.csv"
+        rnd = random.Random(0)
+        with ruta.open("w", encoding="utf-8") as f:
+            f.write("origen,destino\n")
+            for _ in range(num_aristas):
+                f.write(f"lugar_{rnd.randrange(num_nodos)},lugar_{rnd.randrange(num_nodos)}\n")
+
+        for nombre, cargar in (
+            ("DictReader", lambda: _cargar_con_dictreader(ruta)),
+            ("csv por bloques", lambda: cargar_grafo_csv(ruta)),
+            ("csv por bloques + binario", lambda: cargar_grafo_csv(ruta, usar_cache=True)),
+            ("mmap del binario", lambda: cargar_grafo_csv(ruta, usar_cache=True)),
+        ):
+            t0 = time.perf_counter()
+            grafo = cargar()
+            print(f"  {nombre:<27} {time.perf_counter() - t0:>8.3f} s  ({len(grafo)} lugares)")
+            if isinstance(grafo, GrafoCSR) and hasattr(grafo, "mapa"):
+                # hay que soltar las vistas antes de borrar la carpeta temporal
+                del grafo
+
+
+if __name__ == "__main__":
+    grafo = {
+        "salon": ["pasillo", "patio"],
+        "pasillo": ["lab", "biblioteca"],
+        "patio": ["cafeteria"],
+        "lab": ["servidor"],
+        "biblioteca": ["cafeteria"],
+        "cafeteria": ["servidor"],
+        "servidor": []
+    }
+    csr = GrafoCSR.desde_dict(grafo)
+
+    print("nombres :", csr.nombres)
+    print("inicio  :", list(csr.inicio))
+    print("destinos:", list(csr.destinos))
+    print("vecinos de pasillo como diccionario:", csr["pasillo"])
+
+    padres, _, _ = bfs_idx(csr, csr.id_de("salon"))
+    print("camino salon -> servidor:",
+          camino_desde_padres(csr, padres, csr.id_de("salon"), csr.id_de("servidor")))
+
+    if "--bench" in sys.argv:
+        print("\nbenchmark diccionario vs csr:")
+        benchmark()
+
+        print("\nbenchmark de carga de un csv con 10^6 aristas:")
+        benchmark_cargador()
+
+    # csr.id_de(nombre)   = numero del lugar
+    # csr.vecinos_idx(i)  = numeros de los vecinos de i (sin strings)
+    # csr[nombre]         = vecinos con nombres, igual que el diccionario
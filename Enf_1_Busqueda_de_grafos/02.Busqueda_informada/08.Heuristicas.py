@@ -6,25 +6,32 @@
 # mientras mas chico el numero, mejor (mas cerca segun mi estimacion)
 # esto no garantiza el mejor camino
 # pero ayuda a elegir primero los lugares que "se ven prometedores"
+# la heuristica puede ser un diccionario, una funcion o una Heuristica
+# (ver capa_heuristica.py, ahi tambien esta la cache y la evaluacion por lote)
+
+from capa_heuristica import como_heuristica
 
 def mejor_vecino_por_heuristica(grafo, heuristica, actual):
     # esta funcion mira a que lugares puedo ir desde actual
     # y elige el vecino con la heuristica mas baja (o sea el mas "cercano")
     # grafo: conexiones normales
-    # heuristica: diccionario con el valor estimado para cada lugar
+    # heuristica: diccionario con el valor estimado para cada lugar (o funcion / Heuristica)
     # actual: donde estoy ahorita
 
-    vecinos = grafo.get(actual, [])
+    vecinos = list(grafo.get(actual, []))
 
     if not vecinos:
         return None  # si no hay a donde ir
 
-    # ordeno los vecinos por su heuristica
-    # min(...) me da el vecino que tenga heuristica mas baja
+    # pido la heuristica de todos los vecinos de una vez
+    valores = como_heuristica(heuristica).evaluar_lote(vecinos)
+
+    # min(...) me da la posicion del vecino que tenga heuristica mas baja
     # uso key= para decirle con que comparar
-    mejor = min(vecinos, key=lambda v: heuristica.get(v, float("inf")))
+    # (si hay empate gana el primero, igual que antes)
+    mejor = min(range(len(vecinos)), key=valores.__getitem__)
 
-    return mejor
+    return vecinos[mejor]
 
 def camino_greedy(grafo, heuristica, inicio, objetivo):
     # esta funcion trata de llegar al objetivo
@@ -33,6 +40,7 @@ def camino_greedy(grafo, heuristica, inicio, objetivo):
     # no es a* ni es garantia de mejor camino
     # esto se parece mas a busqueda voraz (greedy), que lo veremos mas adelante
 
+    heuristica = como_heuristica(heuristica)  # asi la cache se comparte en todo el recorrido
     actual = inicio
     camino = [actual]
     visitados = set([actual])
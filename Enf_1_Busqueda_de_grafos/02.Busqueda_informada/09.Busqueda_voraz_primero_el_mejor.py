@@ -8,50 +8,153 @@
 # pero no es el mejor de verdad
 
 import heapq  # cola de prioridad
+import sys
+import time
+import tracemalloc
+from array import array
+
+from capa_heuristica import como_heuristica  # diccionario, funcion o Heuristica
 
 def busqueda_voraz(grafo, heuristica, inicio, objetivo):
     # grafo: conexiones entre lugares
     # heuristica: que tan cerca esta cada lugar del objetivo (numero mas chico = mejor)
+    #             puede ser diccionario, funcion o Heuristica (ver capa_heuristica.py)
     # inicio: desde donde empiezo
     # objetivo: a donde quiero llegar
 
     if inicio == objetivo:
         return [inicio]
 
+    heuristica = como_heuristica(heuristica)
+
+    # a cada lugar que descubro le doy un numero (0, 1, 2, ...)
+    # padres[i] = numero del lugar desde donde llegue al lugar i (-1 para el inicio)
+    # asi no guardo el camino completo en la cola, solo de donde vine,
+    # y el camino se arma una sola vez al llegar al objetivo
+    ids = {inicio: 0}
+    lugares = [inicio]
+    padres = array("i", [-1])
+
     # abiertos = lugares que vamos a revisar
-    # cada elemento en la cola es (h, nodo, camino_hasta_ahora)
+    # cada elemento en la cola es (h, nodo, numero_del_nodo)
     abiertos = []
     heapq.heappush(
         abiertos,
-        (heuristica.get(inicio, float("inf")), inicio, [inicio])
+        (heuristica.get(inicio, float("inf")), inicio, 0)
     )
 
-    visitados = set([inicio])  # para no repetir lugares
-
     while abiertos:
         # saco el nodo que tiene la heuristica mas baja
-        _, actual, camino = heapq.heappop(abiertos)
+        _, actual, i = heapq.heappop(abiertos)
 
         # si ya llegue al objetivo termino
         if actual == objetivo:
-            return camino
+            return armar_camino(lugares, padres, i)
 
         # reviso a donde puedo ir desde aqui
+        nuevos = []
         for vecino in grafo.get(actual, []):
-            if vecino not in visitados:
-                visitados.add(vecino)
+            # si ya tiene numero ya lo habia visto, no lo repito
+            if vecino not in ids:
+                ids[vecino] = len(lugares)
+                lugares.append(vecino)
+                padres.append(i)
+                nuevos.append(vecino)
 
-                nuevo_camino = camino + [vecino]
+        # meto a los vecinos nuevos usando su heuristica como prioridad
+        # (la heuristica de todos se pide en una sola llamada)
+        for vecino, h in zip(nuevos, heuristica.evaluar_lote(nuevos)):
+            heapq.heappush(abiertos, (h, vecino, ids[vecino]))
 
-                # meto al vecino usando su heuristica como prioridad
+    # si nunca llegue
+    return None
+
+def armar_camino(lugares, padres, i):
+    # sigo los padres desde i hasta el inicio y le doy la vuelta
+    camino = []
+    while i != -1:
+        camino.append(lugares[i])
+        i = padres[i]
+    camino.reverse()
+    return camino
+
+def _busqueda_voraz_con_copias(grafo, heuristica, inicio, objetivo):
+    # la version de antes, que guardaba camino + [vecino] en cada tupla de la cola
+    # solo se deja para comparar en el benchmark
+    if inicio == objetivo:
+        return [inicio]
+    abiertos = [(heuristica.get(inicio, float("inf")), inicio, [inicio])]
+    visitados = set([inicio])
+    while abiertos:
+        _, actual, camino = heapq.heappop(abiertos)
+        if actual == objetivo:
+            return camino
+        for vecino in grafo.get(actual, []):
+            if vecino not in visitados:
+                visitados.add(vecino)
                 heapq.heappush(
                     abiertos,
-                    (heuristica.get(vecino, float("inf")), vecino, nuevo_camino)
+                    (heuristica.get(vecino, float("inf")), vecino, camino + [vecino])
                 )
-
-    # si nunca llegue
     return None
 
+def rejilla_serpiente(bloques, ancho, alto_pasillo=3):
+    # rejilla de pasillos horizontales de alto_pasillo filas, separados por
+    # una fila de pared con un hueco que va alternando entre la orilla derecha
+    # y la izquierda, asi el camino tiene que ir y venir (mas de bloques * ancho pasos)
+    # los lugares son tuplas (fila, columna) y cada paso cuesta 1
+    # regresa (grafo, heuristica, inicio, objetivo)
+    # la heuristica es la distancia manhattan al objetivo, que aqui engana bastante
+    libres = set()
+    for b in range(bloques):
+        fila0 = b * (alto_pasillo + 1)
+        for fila in range(fila0, fila0 + alto_pasillo):
+            for col in range(ancho):
+                libres.add((fila, col))
+        if b + 1 < bloques:
+            libres.add((fila0 + alto_pasillo, ancho - 1 if b % 2 == 0 else 0))
+
+    grafo = {}
+    for fila, col in libres:
+        grafo[(fila, col)] = {
+            v: 1
+            for v in ((fila - 1, col), (fila + 1, col), (fila, col - 1), (fila, col + 1))
+            if v in libres
+        }
+
+    inicio = (0, 0)
+    ultima = (bloques - 1) * (alto_pasillo + 1)
+    objetivo = (ultima, ancho - 1 if bloques % 2 == 0 else 0)
+    heuristica = {
+        (fila, col): abs(fila - objetivo[0]) + abs(col - objetivo[1])
+        for fila, col in libres
+    }
+    return grafo, heuristica, inicio, objetivo
+
+def medir(funcion, *args):
+    # regresa (resultado, segundos, memoria pico en MB) de llamar funcion(*args)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    resultado = funcion(*args)
+    t = time.perf_counter() - t0
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, t, pico / 2**20
+
+def benchmark(casos=((30, 400), (60, 400))):
+    # compara la version con padres contra la que copiaba el camino
+    print("bloques  ancho  largo camino  version      tiempo (s)  memoria pico (MB)")
+    for bloques, ancho in casos:
+        grafo, heuristica, inicio, objetivo = rejilla_serpiente(bloques, ancho)
+        referencia = None
+        for nombre, funcion in (("con padres", busqueda_voraz),
+                                ("con copias", _busqueda_voraz_con_copias)):
+            camino, t, pico = medir(funcion, grafo, heuristica, inicio, objetivo)
+            if referencia is None:
+                referencia = camino
+            assert camino == referencia
+            print(f"{bloques:<8} {ancho:<6} {len(camino):>12,}  {nombre:<11} {t:>11.2f} {pico:>18.1f}")
+
 if __name__ == "__main__":
     # conexiones del mapa
     # salon -> pasillo, patio
@@ -91,4 +194,8 @@ if __name__ == "__main__":
 
     # - siempre elige el siguiente lugar con heuristica mas baja
     # - ignora el costo real del camino
-    # - es rapida pero no siempre da la mejor ruta
\ No newline at end of file
+    # - es rapida pero no siempre da la mejor ruta
+
+    if "--bench" in sys.argv:
+        print()
+        benchmark()
\ No newline at end of file
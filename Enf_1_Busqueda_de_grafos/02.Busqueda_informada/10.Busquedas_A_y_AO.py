@@ -6,64 +6,969 @@
 # h(n) = cuanto creo que falta para llegar al objetivo (heuristica)
 # siempre se escoge el nodo con f mas chico
 
-import heapq  
+import heapq
+import random
+import sys
+import time
+from array import array
+from pathlib import Path
 
-def a_estrella(grafo_costos, heuristica, inicio, objetivo):
+# los modulos compartidos (colas_prioridad, grafo_csr, ...) viven en la carpeta
+# de busqueda no informada, la agrego a donde python busca los imports
+NO_INFORMADA = Path(__file__).resolve().parent.parent / "0.1Busqueda_no_informada"
+sys.path.append(str(NO_INFORMADA))
+
+from colas_prioridad import crear_cola  # cola "perezosa" o "indexada" (ver colas_prioridad.py)
+from capa_heuristica import Heuristica, como_heuristica  # diccionario, funcion o Heuristica
+from cargar_scripts import INFORMADA, cargar_script  # los scripts numerados no se importan normal
+
+MODOS = ("normal", "anytime", "memoria")
+
+def a_estrella(grafo_costos, heuristica, inicio, objetivo, cola="perezosa", estadisticas=None,
+               peso=1, modo="normal", tiempo_max=None, max_frontera=None):
     # heuristica: estimacion de distancia al objetivo
+    #             (diccionario, funcion o Heuristica, ver capa_heuristica.py)
     # inicio: nodo inicial
     # objetivo: nodo final
+    # cola: "perezosa" (heapq de siempre) o "indexada" (con decrease-key)
+    # estadisticas: diccionario opcional donde se guardan los contadores de la cola
+    #               y cuantos nodos se expandieron ("expandidos")
+    #               ademas "cota": el costo encontrado es a lo mucho cota * el optimo
+    #               y "cota_inferior": el optimo es por lo menos esto
+    # peso: f = g + peso * h; con peso > 1 busca mucho menos pero el camino
+    #       puede costar hasta peso veces el optimo (a* con peso)
+    # modo:
+    #   "normal"  a* de siempre (o con peso)
+    #   "anytime" empieza con peso y lo va bajando hasta 1 mientras haya tiempo
+    #             (tiempo_max en segundos) y regresa la mejor solucion que alcanzo;
+    #             la primera busqueda (con peso) siempre se termina aunque tarde mas
+    #             (ver a_estrella_anytime para recibir cada solucion en cuanto sale)
+    #   "memoria" guarda a lo mucho max_frontera nodos en la frontera (estilo sma*)
     # regresa (camino, costo_total) o (None, None) si no hay camino
+    if modo not in MODOS:
+        raise ValueError(f"modo desconocido: {modo!r} (opciones: {list(MODOS)})")
 
     if inicio == objetivo:
+        if estadisticas is not None:
+            estadisticas.update(cota=1, cota_inferior=0, expandidos=0, max_frontera=0)
         return [inicio], 0
 
-    # costo real para llegar a cada nodo
-    g = {inicio: 0}
+    heuristica = como_heuristica(heuristica)
 
-    # cola de prioridad con tuplas (f, nodo, camino_hasta_nodo)
-    abiertos = []
-    f_inicio = g[inicio] + heuristica.get(inicio, float("inf"))
-    heapq.heappush(abiertos, (f_inicio, inicio, [inicio]))
+    if modo == "anytime":
+        camino, costo, cota = None, None, None
+        contadores = {}
+        for camino, costo, cota in a_estrella_anytime(grafo_costos, heuristica, inicio, objetivo,
+                                                      peso=max(peso, 1), tiempo_max=tiempo_max,
+                                                      estadisticas=contadores):
+            pass
+        if estadisticas is not None:
+            estadisticas.update(contadores)
+            _anotar_cota(estadisticas, costo, cota)
+        return camino, costo
 
-    visitados = set()
+    if modo == "memoria":
+        if max_frontera is None or max_frontera < 2:
+            raise ValueError("el modo memoria necesita max_frontera >= 2")
+        contadores = {}
+        camino, costo = _a_estrella_memoria(grafo_costos, heuristica, inicio, objetivo,
+                                            peso, max_frontera, contadores)
+        if estadisticas is not None:
+            estadisticas.update(contadores)
+            _anotar_cota(estadisticas, costo, max(peso, 1))
+        return camino, costo
+
+    abiertos = crear_cola(cola)
+    cerrados = bytearray()
+    costo = None
+    try:
+        camino, costo = _a_estrella(grafo_costos, heuristica, inicio, objetivo,
+                                    abiertos, cerrados, peso)
+        return camino, costo
+    finally:
+        if estadisticas is not None:
+            estadisticas.update(abiertos.estadisticas)
+            estadisticas["expandidos"] = cerrados.count(1)
+            # con h consistente, a* con peso (sin reabrir nodos) se pasa a lo mucho peso veces
+            _anotar_cota(estadisticas, costo, max(peso, 1))
+
+def _anotar_cota(estadisticas, costo, cota):
+    estadisticas["cota"] = cota
+    estadisticas["cota_inferior"] = None if costo is None or cota is None else costo / cota
+
+def _a_estrella(grafo_costos, heuristica, inicio, objetivo, abiertos, cerrados, peso=1):
+    # a cada nodo que descubro le doy un numero (0, 1, 2, ...) y todo lo demas
+    # se guarda en listas indexadas por ese numero:
+    #   g[i]        costo real para llegar al nodo i
+    #   padres[i]   numero del nodo desde donde llegue a i (-1 para el inicio)
+    #   cerrados[i] 1 si ya se expandio
+    # el camino se arma una sola vez al llegar al objetivo
+    ids = {inicio: 0}
+    nodos = [inicio]
+    g = [0]
+    padres = array("i", [-1])
+    cerrados.append(0)
+
+    # cola de prioridad: cada nodo pendiente con su f
+    f_inicio = g[0] + heuristica.get(inicio, float("inf"))
+    abiertos.poner(inicio, f_inicio)
 
     while abiertos:
-        f_actual, actual, camino = heapq.heappop(abiertos)
+        f_actual, actual = abiertos.sacar()
+        i = ids[actual]
 
         # si ya llegamos al objetivo
         if actual == objetivo:
-            return camino, g[actual]
+            camino = []
+            j = i
+            while j != -1:
+                camino.append(nodos[j])
+                j = padres[j]
+            camino.reverse()
+            return camino, g[i]
 
-        if actual in visitados:
+        if cerrados[i]:
             continue
-        visitados.add(actual)
+        cerrados[i] = 1
+        g_actual = g[i]
 
         # revisamos vecinos del nodo actual
+        mejorados = []  # (vecino, nuevo_g) que hay que meter o bajar en la cola
         for vecino, costo_ir in grafo_costos.get(actual, {}).items():
-            nuevo_g = g[actual] + costo_ir  # costo real si paso por aqui
+            nuevo_g = g_actual + costo_ir  # costo real si paso por aqui
+            j = ids.get(vecino)
+
+            if j is None:
+                # primera vez que veo este vecino
+                j = len(nodos)
+                ids[vecino] = j
+                nodos.append(vecino)
+                g.append(nuevo_g)
+                padres.append(i)
+                cerrados.append(0)
+            elif cerrados[j] or nuevo_g >= g[j]:
+                # ya estaba cerrado o no encontre una forma mas barata de llegar
+                continue
+            else:
+                g[j] = nuevo_g
+                padres[j] = i
+            mejorados.append((vecino, nuevo_g))
+
+        # f = g + h, con la h de todos los mejorados en una sola llamada
+        # si ya estaba en la cola, la cola solo le baja la f
+        hs = heuristica.evaluar_lote([v for v, _ in mejorados])
+        if peso != 1:
+            hs = [peso * h for h in hs]
+        for (vecino, nuevo_g), h in zip(mejorados, hs):
+            abiertos.poner(vecino, nuevo_g + h)
+
+    # no hay forma de llegar
+    return None, None
+
+def a_estrella_anytime(grafo_costos, heuristica, inicio, objetivo, peso=3, paso=0.5,
+                       tiempo_max=None, estadisticas=None):
+    # a* "anytime" (al estilo ara*): primero una solucion rapida con peso alto,
+    # luego se baja el peso de paso en paso y se repara la busqueda sin empezar de cero
+    # (los nodos que mejoraron ya estando cerrados se guardan en "inconsistentes"
+    #  y regresan a la frontera para la siguiente vuelta)
+    # es un generador: da (camino, costo, cota) cada vez que baja el costo o la cota,
+    # donde el costo es a lo mucho cota * el optimo; si termina, la ultima tiene cota 1
+    # si se acaba el tiempo_max (segundos) deja de dar soluciones, pero la primera
+    # (la del peso inicial) siempre la termina para no quedarse sin nada
+    heuristica = como_heuristica(heuristica)
+    h = heuristica.get
+    limite = None if tiempo_max is None else time.perf_counter() + tiempo_max
+    inf = float("inf")
+
+    g = {inicio: 0}
+    padres = {inicio: None}
+    eps = max(peso, 1)
+    abiertos = {inicio: eps * h(inicio)}  # nodo -> llave con la que esta en el heap
+    heap = [(abiertos[inicio], inicio)]
+    cerrados = set()
+    inconsistentes = set()
+    expandidos = 0
+    max_frontera = 1
+    mejor_costo = mejor_cota = inf
+
+    while True:
+        # mejorar el camino con el eps actual:
+        # se para cuando ya nada en la frontera puede bajar el costo del objetivo
+        while heap and g.get(objetivo, inf) > heap[0][0]:
+            if limite is not None and mejor_costo < inf and time.perf_counter() > limite:
+                if estadisticas is not None:
+                    estadisticas.update(expandidos=expandidos, max_frontera=max_frontera)
+                return
+            llave, x = heapq.heappop(heap)
+            if abiertos.get(x) != llave:
+                continue
+            del abiertos[x]
+            cerrados.add(x)
+            expandidos += 1
+            for y, costo in grafo_costos.get(x, {}).items():
+                nuevo_g = g[x] + costo
+                if nuevo_g < g.get(y, inf):
+                    g[y] = nuevo_g
+                    padres[y] = x
+                    if y in cerrados:
+                        inconsistentes.add(y)
+                    else:
+                        abiertos[y] = nuevo_g + eps * h(y)
+                        heapq.heappush(heap, (abiertos[y], y))
+            if len(abiertos) > max_frontera:
+                max_frontera = len(abiertos)
+
+        costo_objetivo = g.get(objetivo, inf)
+        if costo_objetivo == inf:
+            break  # no hay camino
+
+        # cota: el optimo es por lo menos el menor g + h que queda pendiente
+        pendiente = min(
+            (g[v] + h(v) for v in list(abiertos) + list(inconsistentes)),
+            default=costo_objetivo,
+        )
+        cota = eps if pendiente <= 0 else min(eps, max(1, costo_objetivo / pendiente))
+        # tambien se da la misma solucion si la cota bajo, para que la ultima
+        # que se dio siempre traiga la cota mas ajustada que se conoce
+        if costo_objetivo < mejor_costo or cota < mejor_cota:
+            mejor_costo, mejor_cota = costo_objetivo, cota
+            camino = [objetivo]
+            while padres[camino[-1]] is not None:
+                camino.append(padres[camino[-1]])
+            camino.reverse()
+            if estadisticas is not None:
+                estadisticas.update(expandidos=expandidos, max_frontera=max_frontera)
+            yield camino, costo_objetivo, cota
+        if eps == 1 or cota == 1:
+            break
+
+        # siguiente vuelta: menos peso, los inconsistentes regresan a la frontera
+        eps = max(1, eps - paso)
+        for v in inconsistentes:
+            abiertos[v] = 0
+        inconsistentes.clear()
+        for v in abiertos:
+            abiertos[v] = g[v] + eps * h(v)
+        heap = [(llave, v) for v, llave in abiertos.items()]
+        heapq.heapify(heap)
+        cerrados.clear()
+
+    if estadisticas is not None:
+        estadisticas.update(expandidos=expandidos, max_frontera=max_frontera)
+
+def _a_estrella_memoria(grafo_costos, heuristica, inicio, objetivo, peso, max_frontera, estadisticas):
+    # a* con memoria acotada al estilo sma*:
+    # si la frontera pasa de max_frontera se olvida el nodo con peor f,
+    # pero su padre se acuerda del f que tenia (olvidado[padre]) y regresa a la
+    # frontera con ese f, asi esa rama se puede volver a generar si hace falta
+    # f usa "pathmax": un hijo nunca tiene f menor que su padre
+    # en empates de f se expande primero el mas profundo (mas pasos desde inicio)
+    # y se olvida primero el menos profundo, como en sma*
+    h = heuristica.get
+    inf = float("inf")
+
+    g = {inicio: 0}
+    padres = {inicio: None}
+    pasos = {inicio: 0}  # profundidad de cada nodo en el arbol de busqueda
+    f_abierto = {}  # frontera: nodo -> llave (f, -pasos)
+    chicos = []     # heap de (llave, nodo) para sacar el de menor f
+    grandes = []    # heap de ((-f, pasos), nodo) para encontrar el de mayor f
+    olvidado = {}      # nodo -> menor f de los hijos que se olvidaron
+    expandidos = set()  # nodos que alguna vez se expandieron (sus hijos dependen de el)
+    dormidos = set()    # expandidos que luego se olvidaron: se pueden volver a generar
+    contador = {"expandidos": 0, "olvidados": 0, "max_frontera": 1}
 
-            # si es primera vez que veo este vecino
-            # o encontre una forma mas barata de llegar
+    def abrir(v, f_v):
+        llave = (f_v, -pasos[v])
+        f_abierto[v] = llave
+        heapq.heappush(chicos, (llave, v))
+        heapq.heappush(grandes, ((-f_v, pasos[v]), v))
+
+    def olvidar_peor():
+        # regresa False si no se pudo olvidar a nadie
+        while chicos and f_abierto.get(chicos[0][1]) != chicos[0][0]:
+            heapq.heappop(chicos)  # entradas viejas
+        siguiente = chicos[0][1] if chicos else None
+        apartados = []
+        w = None
+        while grandes:
+            (menos_f, p_w), v = heapq.heappop(grandes)
+            if f_abierto.get(v) != (-menos_f, -p_w):
+                continue  # entrada vieja
+            if padres[v] is None or v == siguiente:
+                # el inicio no tiene a quien avisarle, y el siguiente por expandir no se tira
+                apartados.append(((menos_f, p_w), v))
+                continue
+            w = v
+            break
+        for entrada in apartados:
+            heapq.heappush(grandes, entrada)
+        if w is None:
+            return False
+        f_w = -menos_f
+        p = padres[w]
+        del f_abierto[w]
+        contador["olvidados"] += 1
+        if w in expandidos:
+            dormidos.add(w)  # sus hijos todavia lo usan como padre
+        else:
+            del g[w], padres[w], pasos[w]
+        if f_w < olvidado.get(p, inf):
+            olvidado[p] = f_w
+        if (f_w, -pasos[p]) < f_abierto.get(p, (inf,)):
+            abrir(p, f_w)
+        return True
+
+    abrir(inicio, peso * h(inicio))
+    try:
+        while chicos:
+            llave, x = heapq.heappop(chicos)
+            if f_abierto.get(x) != llave:
+                continue
+            del f_abierto[x]
+            f_x = llave[0]
+
+            if x == objetivo:
+                camino = [x]
+                while padres[camino[-1]] is not None:
+                    camino.append(padres[camino[-1]])
+                camino.reverse()
+                # al regenerar ramas un padre pudo bajar su g despues de que sus hijos
+                # se calcularon, asi que el costo se suma sobre el camino de verdad
+                costo = 0
+                for a, b in zip(camino, camino[1:]):
+                    costo += grafo_costos[a][b]
+                return camino, costo
+
+            expandidos.add(x)
+            dormidos.discard(x)
+            olvidado.pop(x, None)  # sus hijos olvidados se van a volver a generar
+            contador["expandidos"] += 1
+            for y, costo in grafo_costos.get(x, {}).items():
+                nuevo_g = g[x] + costo
+                anterior = g.get(y)
+                if anterior is not None:
+                    if y in dormidos:
+                        # solo lo regenera su padre (o un camino mas barato)
+                        if nuevo_g > anterior or (nuevo_g == anterior and padres[y] != x):
+                            continue
+                    elif nuevo_g >= anterior or y in expandidos:
+                        # igual que el modo normal: un nodo ya expandido no se reabre
+                        continue
+                g[y] = nuevo_g
+                padres[y] = x
+                pasos[y] = pasos[x] + 1
+                dormidos.discard(y)
+                f_y = max(f_x, nuevo_g + peso * h(y), olvidado.get(y, -inf))
+                if (f_y, -pasos[y]) < f_abierto.get(y, (inf,)):
+                    abrir(y, f_y)
+
+            while len(f_abierto) > max_frontera:
+                if not olvidar_peor():
+                    break
+            if len(f_abierto) > contador["max_frontera"]:
+                contador["max_frontera"] = len(f_abierto)
+        return None, None
+    finally:
+        estadisticas.update(contador)
+
+def benchmark_modos(lado=150, consultas=3):
+    # modos de a_estrella en una rejilla con costos, con h = distancia manhattan
+    # (cada paso cuesta por lo menos 1, asi que manhattan nunca se pasa)
+    ucs = cargar_script("02.Busqueda_en_anchura_de_costo_uniforme.py")
+    grafo = ucs.grafo_rejilla_con_pesos(lado)
+    rnd = random.Random(4)
+    pares = [((rnd.randrange(lado // 4), rnd.randrange(lado)),
+              (lado - 1 - rnd.randrange(lado // 4), rnd.randrange(lado)))
+             for _ in range(consultas)]
+    # una Heuristica por objetivo, hecha una vez y compartida por todos los modos
+    # (asi se usa en la practica: la cache de h se llena una vez y se reusa)
+    heuristicas = [
+        Heuristica((lambda objetivo: lambda v: abs(v[0] - objetivo[0]) + abs(v[1] - objetivo[1]))(b))
+        for _, b in pares
+    ]
+
+    formas = [("normal", {})]
+    formas += [(f"peso {p}", {"peso": p}) for p in (1.5, 2, 3)]
+    formas += [(f"anytime {t}s", {"modo": "anytime", "peso": 3, "tiempo_max": t})
+               for t in (0.05, 0.2, 2.0)]
+    formas += [(f"memoria {m}", {"modo": "memoria", "max_frontera": m}) for m in (200, 500)]
+
+    print("modo             expandidos  max frontera  costo/optimo  cota   ms/consulta")
+    optimos = [None] * len(pares)  # los llena la primera forma (a* normal)
+    for etiqueta, opciones in formas:
+        expandidos = frontera = sin_camino = 0
+        razon = cota = 0
+        t0 = time.perf_counter()
+        for i, (a, b) in enumerate(pares):
+            est = {}
+            costo = a_estrella(grafo, heuristicas[i], a, b, estadisticas=est, **opciones)[1]
+            if optimos[i] is None:
+                optimos[i] = costo
+            if costo is None or optimos[i] is None:
+                # sin camino (o el a* normal no lo encontro) no hay razon que comparar
+                sin_camino += 1
+            else:
+                razon = max(razon, costo / optimos[i])
+                cota = max(cota, est["cota"])
+            expandidos += est.get("expandidos", 0)
+            frontera = max(frontera, est.get("max_frontera", est.get("max_tamano", 0)))
+        t = time.perf_counter() - t0
+        print(f"{etiqueta:<16} {expandidos / len(pares):>10,.0f} {frontera:>13,}"
+              f" {razon:>13.3f} {cota:>5.2f} {1000 * t / len(pares):>13.1f}"
+              + (f"  ({sin_camino} sin camino)" if sin_camino else ""))
+
+def _a_estrella_con_copias(grafo_costos, heuristica, inicio, objetivo):
+    # la version de antes, que guardaba camino + [vecino] en cada tupla del heap
+    # solo se deja para comparar en el benchmark
+    if inicio == objetivo:
+        return [inicio], 0
+    g = {inicio: 0}
+    abiertos = [(heuristica.get(inicio, float("inf")), inicio, [inicio])]
+    visitados = set()
+    while abiertos:
+        f_actual, actual, camino = heapq.heappop(abiertos)
+        if actual == objetivo:
+            return camino, g[actual]
+        if actual in visitados:
+            continue
+        visitados.add(actual)
+        for vecino, costo_ir in grafo_costos.get(actual, {}).items():
+            nuevo_g = g[actual] + costo_ir
             if (vecino not in g) or (nuevo_g < g[vecino]):
                 g[vecino] = nuevo_g
-                nuevo_camino = camino + [vecino]
-
-                # f = g + h
                 f_vecino = nuevo_g + heuristica.get(vecino, float("inf"))
+                heapq.heappush(abiertos, (f_vecino, vecino, camino + [vecino]))
+    return None, None
 
-                heapq.heappush(
-                    abiertos,
-                    (f_vecino, vecino, nuevo_camino)
-                )
+def benchmark(casos=((30, 400), (60, 400))):
+    # compara la version con padres contra la que copiaba el camino,
+    # en las rejillas en serpiente de 09.Busqueda_voraz_primero_el_mejor.py
+    voraz = cargar_script("09.Busqueda_voraz_primero_el_mejor.py", INFORMADA)
+    print("bloques  ancho  largo camino  version      tiempo (s)  memoria pico (MB)")
+    for bloques, ancho in casos:
+        grafo, heuristica, inicio, objetivo = voraz.rejilla_serpiente(bloques, ancho)
+        referencia = None
+        for nombre, funcion in (("con padres", a_estrella),
+                                ("con copias", _a_estrella_con_copias)):
+            (camino, costo), t, pico = voraz.medir(funcion, grafo, heuristica, inicio, objetivo)
+            if referencia is None:
+                referencia = costo
+            assert costo == referencia and len(camino) == costo + 1
+            print(f"{bloques:<8} {ancho:<6} {len(camino):>12,}  {nombre:<11} {t:>11.2f} {pico:>18.1f}")
 
-    # no hay forma de llegar
-    return None, None
+def invertir_costos(grafo_costos):
+    # mismo grafo con las flechas al reves: invertido[v][u] = costo de u -> v
+    invertido = {u: {} for u in grafo_costos}
+    for u, vecinos in grafo_costos.items():
+        for v, costo in vecinos.items():
+            invertido.setdefault(v, {})[u] = costo
+    return invertido
+
+# alt (a*, landmarks y desigualdad del triangulo)
+# muchas veces no tenemos una buena heuristica y terminamos usando h = 0
+# (o sea, costo uniforme). alt la saca del mismo grafo con un preproceso:
+# 1. se escogen k lugares "landmarks" (L), lo mas alejados posible entre ellos
+# 2. con costo uniforme se calcula d(L, v) y d(v, L) para todos los lugares v
+# 3. por la desigualdad del triangulo, para cualquier v y objetivo t:
+#       d(v, t) >= d(L, t) - d(L, v)
+#       d(v, t) >= d(v, L) - d(t, L)
+#    el maximo de esas restas con todos los landmarks es una h que nunca se pasa
+#    (admisible) y ademas es consistente, asi que a* sigue dando el camino optimo
+# las tablas se guardan en array("f") (float32), 4 bytes por numero
+
+class TablasALT:
+    def __init__(self, grafo_costos, k=8, semilla=0, cola="perezosa"):
+        ucs_costos = cargar_script("02.Busqueda_en_anchura_de_costo_uniforme.py").ucs_costos
+
+        # a cada lugar le doy un numero para indexar las tablas
+        # (tambien a los que solo aparecen como destino)
+        self.nodos = list(dict.fromkeys(
+            [u for u in grafo_costos]
+            + [v for vecinos in grafo_costos.values() for v in vecinos]
+        ))
+        self.ids = {v: i for i, v in enumerate(self.nodos)}
+        n = len(self.nodos)
 
-# nota ao*
+        # grafo al reves, para d(v, L) = costo uniforme desde L en el grafo invertido
+        invertido = invertir_costos(grafo_costos)
+
+        self.landmarks = []
+        self.desde = []  # desde[l][i] = d(L_l, nodo i)
+        self.hacia = []  # hacia[l][i] = d(nodo i, L_l)
+        self.margen = 0.0  # se vuelve _MARGEN si float32 no pudo guardar algun costo exacto
+        if n == 0:
+            return
+
+        # seleccion del punto mas lejano:
+        # empiezo con un lugar al azar solo para encontrar el mas lejano a el,
+        # y luego cada landmark nuevo es el lugar mas lejano a todos los anteriores
+        # (lejos = min de d(L, v) sobre los landmarks ya escogidos;
+        #  si alguno no se alcanza desde ninguno, ese es el mas lejano)
+        inf = float("inf")
+        rnd = random.Random(semilla)
+        al_azar = self.nodos[rnd.randrange(n)]
+        costos = ucs_costos(grafo_costos, al_azar, cola)
+        siguiente = max(costos, key=costos.__getitem__)
+        cercania = [inf] * n
+
+        while len(self.landmarks) < min(k, n):
+            desde = ucs_costos(grafo_costos, siguiente, cola)
+            hacia = ucs_costos(invertido, siguiente, cola)
+            self.landmarks.append(siguiente)
+            self.desde.append(self._a_float32(desde))
+            self.hacia.append(self._a_float32(hacia))
+
+            for v, costo in desde.items():
+                i = self.ids[v]
+                if costo < cercania[i]:
+                    cercania[i] = costo
+            for v in self.landmarks:
+                cercania[self.ids[v]] = -1.0  # un landmark no se repite
+            siguiente = self.nodos[max(range(n), key=cercania.__getitem__)]
+            if cercania[self.ids[siguiente]] < 0:
+                break
+
+    def _a_float32(self, costos):
+        tabla = array("f", [float("inf")]) * len(self.nodos)
+        ids = self.ids
+        for v, costo in costos.items():
+            i = ids[v]
+            tabla[i] = costo
+            if tabla[i] != costo:
+                self.margen = _MARGEN
+        return tabla
+
+    def estimar(self, u, v):
+        # cota inferior del costo mas barato de u a v (0 si no se sabe nada)
+        iu = self.ids.get(u)
+        iv = self.ids.get(v)
+        if iu is None or iv is None:
+            return 0
+        return self._estimar(iu, iv)
+
+    def _estimar(self, iu, iv):
+        mejor = 0.0
+        margen = self.margen
+        for desde, hacia in zip(self.desde, self.hacia):
+            a, b = desde[iv], desde[iu]
+            cota = a - b - (a + b) * margen
+            if cota > mejor:
+                mejor = cota
+            a, b = hacia[iu], hacia[iv]
+            cota = a - b - (a + b) * margen
+            if cota > mejor:
+                mejor = cota
+        # si u no llega a v la resta da inf, y eso tambien es una cota valida
+        # (inf - inf da nan y "nan > mejor" es falso, asi que se ignora solo)
+        return mejor
+
+    def heuristica(self, objetivo, maximo=100_000):
+        # Heuristica lista para a_estrella(grafo, tablas.heuristica(objetivo), inicio, objetivo)
+        return self._heuristica(objetivo, True, maximo)
+
+    def heuristica_desde(self, inicio, maximo=100_000):
+        # lo mismo pero al reves: cota de inicio -> v (para la busqueda de regreso)
+        return self._heuristica(inicio, False, maximo)
+
+    def _heuristica(self, fijo, hacia_fijo, maximo):
+        ids = self.ids
+        it = ids.get(fijo)
+        if it is None:
+            return Heuristica(lambda v: 0, maximo=maximo)
+        estimar = self._estimar
+
+        def una(v):
+            iv = ids.get(v)
+            if iv is None:
+                return 0
+            return estimar(iv, it) if hacia_fijo else estimar(it, iv)
+
+        def lote(vs):
+            return [una(v) for v in vs]
+
+        return Heuristica(una, maximo=maximo, lote=lote)
+
+    def tamano_bytes(self):
+        return sum(t.itemsize * len(t) for t in self.desde + self.hacia)
+
+# float32 guarda los costos con error relativo de a lo mucho 2**-24 (enteros hasta 2**24 sin error)
+# si algun costo no se guardo exacto, a cada resta le quito un poquito
+# para que la h nunca se pase del costo real
+_MARGEN = 2.0 ** -23
+
+def benchmark_alt(lado=200, nodos_aleatorio=40_000, ks=(4, 8, 16), consultas=20):
+    # cuantos lugares expande a* con h = 0 contra h de alt con k landmarks
+    ucs = cargar_script("02.Busqueda_en_anchura_de_costo_uniforme.py")
+    grafos = (
+        ("rejilla", ucs.grafo_rejilla_con_pesos(lado)),
+        ("aleatorio", ucs.grafo_denso(nodos_aleatorio, 4)),
+    )
+    print("grafo      nodos    h       preproceso(s)  tablas(KB)  expandidos/consulta  ms/consulta")
+    for nombre, grafo in grafos:
+        rnd = random.Random(1)
+        lugares = list(grafo)
+        pares = [(rnd.choice(lugares), rnd.choice(lugares)) for _ in range(consultas)]
+        ceros = dict.fromkeys(grafo, 0)
+
+        referencia = None
+        for k in (0,) + tuple(ks):
+            t0 = time.perf_counter()
+            tablas = TablasALT(grafo, k) if k else None
+            t_pre = time.perf_counter() - t0
+            expandidos = 0
+            costos = []
+            t0 = time.perf_counter()
+            for a, b in pares:
+                h = tablas.heuristica(b) if tablas else ceros
+                est = {}
+                costos.append(a_estrella(grafo, h, a, b, estadisticas=est)[1])
+                expandidos += est.get("expandidos", 0)
+            t = time.perf_counter() - t0
+            if referencia is None:
+                referencia = costos
+            assert costos == referencia  # alt no cambia el costo, solo cuanto se busca
+            etiqueta = f"alt k={k}" if k else "h=0"
+            kb = tablas.tamano_bytes() / 1024 if tablas else 0
+            print(f"{nombre:<10} {len(grafo):<8,} {etiqueta:<8} {t_pre:>12.2f} {kb:>11,.0f}"
+                  f" {expandidos / consultas:>20,.0f} {1000 * t / consultas:>12.1f}")
+
+# costo uniforme / a* bidireccional con costos
+# se busca al mismo tiempo desde inicio (hacia adelante) y desde objetivo
+# (en el grafo al reves); cada vez se avanza el lado cuyo siguiente lugar es mas barato
+# cada vez que una arista toca un lugar que el otro lado ya alcanzo tenemos un
+# camino completo y nos quedamos con el mejor ("mejor")
+# regla para parar: cuando tope_ida + tope_regreso >= mejor ya ningun camino
+# que falte puede salir mas barato
+#
+# version a*: con una heuristica hacia objetivo h_t y otra hacia inicio h_s
+# se usa el "potencial promedio" p(v) = (h_t(v) - h_s(v)) / 2
+# la ida ordena por d_ida(v) + p(v) y el regreso por d_regreso(v) - p(v);
+# como los dos potenciales suman 0, la misma regla de parar sigue valiendo
+# (con h_t y h_s consistentes, por ejemplo las de TablasALT)
+
+def ucs_bidireccional(grafo_costos, inicio, objetivo, heuristica=None, heuristica_inicio=None,
+                      invertido=None, estadisticas=None):
+    # heuristica / heuristica_inicio: cotas hacia objetivo y hacia inicio
+    #   (diccionario, funcion o Heuristica); sin ellas es costo uniforme bidireccional
+    # invertido: invertir_costos(grafo_costos) ya calculado, para no rehacerlo en cada consulta
+    # estadisticas: diccionario opcional, ahi quedan "sacados" (total), "sacados_ida" y "sacados_regreso"
+    # regresa (camino, costo_total) o (None, None) igual que a_estrella
+    if inicio == objetivo:
+        return [inicio], 0
+    if invertido is None:
+        invertido = invertir_costos(grafo_costos)
+
+    if heuristica is None and heuristica_inicio is None:
+        def potencial(v):
+            return 0
+    else:
+        h_t = como_heuristica(heuristica if heuristica is not None else {})
+        h_s = como_heuristica(heuristica_inicio if heuristica_inicio is not None else {})
+
+        def potencial(v):
+            # si alguna no sabe nada de v cuenta como 0 (sigue siendo cota valida)
+            a = h_t.get(v, 0)
+            b = h_s.get(v, 0)
+            if a == float("inf") or b == float("inf"):
+                return 0
+            return (a - b) / 2
+
+    inf = float("inf")
+    aristas = (grafo_costos, invertido)
+    signo = (1, -1)  # la ida usa +p(v) y el regreso -p(v)
+    dist = ({inicio: 0}, {objetivo: 0})
+    padres = ({inicio: None}, {objetivo: None})
+    cerrados = (set(), set())
+    colas = ([(potencial(inicio), inicio)], [(-potencial(objetivo), objetivo)])
+    mejor = inf
+    encuentro = None  # (lugar de la ida, lugar del regreso) unidos por una arista o iguales
+
+    while colas[0] and colas[1]:
+        if colas[0][0][0] + colas[1][0][0] >= mejor:
+            break
+        lado = 0 if colas[0][0][0] <= colas[1][0][0] else 1
+        _, x = heapq.heappop(colas[lado])
+        if x in cerrados[lado]:
+            continue
+        cerrados[lado].add(x)
+
+        mi_dist, otra_dist = dist[lado], dist[1 - lado]
+        d = mi_dist[x]
+        for y, costo in aristas[lado].get(x, {}).items():
+            nd = d + costo
+            if y in cerrados[lado] or nd >= mi_dist.get(y, inf):
+                continue
+            mi_dist[y] = nd
+            padres[lado][y] = x
+            heapq.heappush(colas[lado], (nd + signo[lado] * potencial(y), y))
+            otro = otra_dist.get(y)
+            if otro is not None and nd + otro < mejor:
+                mejor = nd + otro
+                encuentro = y
+
+    if estadisticas is not None:
+        estadisticas["sacados_ida"] = len(cerrados[0])
+        estadisticas["sacados_regreso"] = len(cerrados[1])
+        estadisticas["sacados"] = len(cerrados[0]) + len(cerrados[1])
+    if encuentro is None:
+        return None, None
+
+    # inicio ... encuentro por la ida, y encuentro ... objetivo por el regreso
+    camino = [encuentro]
+    while padres[0][camino[-1]] is not None:
+        camino.append(padres[0][camino[-1]])
+    camino.reverse()
+    x = padres[1][encuentro]
+    while x is not None:
+        camino.append(x)
+        x = padres[1][x]
+    return camino, mejor
+
+def benchmark_bidireccional(lado=200, nodos_aleatorio=40_000, consultas=10, k=8):
+    # consultas largas (de una esquina a la otra en la rejilla, al azar en el aleatorio)
+    # lugares sacados de la cola: una direccion contra bidireccional, sin y con alt
+    ucs = cargar_script("02.Busqueda_en_anchura_de_costo_uniforme.py")
+    rnd = random.Random(3)
+    rejilla = ucs.grafo_rejilla_con_pesos(lado)
+    esquina = lado // 5
+    pares_rejilla = [
+        ((rnd.randrange(esquina), rnd.randrange(esquina)),
+         (lado - 1 - rnd.randrange(esquina), lado - 1 - rnd.randrange(esquina)))
+        for _ in range(consultas)
+    ]
+    aleatorio = ucs.grafo_denso(nodos_aleatorio, 4)
+    pares_aleatorio = [(rnd.randrange(nodos_aleatorio), rnd.randrange(nodos_aleatorio))
+                       for _ in range(consultas)]
+
+    print("grafo      busqueda                 sacados/consulta  ms/consulta")
+    for nombre, grafo, pares in (("rejilla", rejilla, pares_rejilla),
+                                 ("aleatorio", aleatorio, pares_aleatorio)):
+        invertido = invertir_costos(grafo)
+        tablas = TablasALT(grafo, k)
+        ceros = dict.fromkeys(grafo, 0)
+        formas = (
+            ("costo uniforme", lambda a, b, est: a_estrella(grafo, ceros, a, b, estadisticas=est)),
+            ("bidireccional", lambda a, b, est: ucs_bidireccional(
+                grafo, a, b, invertido=invertido, estadisticas=est)),
+            (f"a* alt k={k}", lambda a, b, est: a_estrella(
+                grafo, tablas.heuristica(b), a, b, estadisticas=est)),
+            (f"a* bidireccional alt", lambda a, b, est: ucs_bidireccional(
+                grafo, a, b, tablas.heuristica(b), tablas.heuristica_desde(a),
+                invertido=invertido, estadisticas=est)),
+        )
+        referencia = None
+        for etiqueta, buscar in formas:
+            sacados = 0
+            costos = []
+            t0 = time.perf_counter()
+            for a, b in pares:
+                est = {}
+                costos.append(buscar(a, b, est)[1])
+                sacados += est.get("sacados", est.get("expandidos", 0))
+            t = time.perf_counter() - t0
+            if referencia is None:
+                referencia = costos
+            assert costos == referencia
+            print(f"{nombre:<10} {etiqueta:<24} {sacados / len(pares):>16,.0f} {1000 * t / len(pares):>12.1f}")
+
+# ao*
 # ao* se usa en grafos and-or (cuando hay pasos de tipo "tienes que hacer varias cosas a la vez")
-# normalmente en este nivel solo se explica que ao* trabaja con and-or
-# y no se suele pedir el codigo
-# por eso abajo solo probamos a*
+# formato del grafo: cada nodo tiene una lista de hiperarcos (las opciones "o")
+# y cada hiperarco es (costo, [hijos]): para resolver el nodo por ese camino
+# hay que resolver todos los hijos ("y")
+#   grafo_and_or = {
+#       "viaje": [(1, ["boleto", "hotel"]), (3, ["paquete"])],
+#       ...
+#   }
+# terminales: {nodo: costo} de los problemas que ya estan resueltos por si solos
+# un nodo sin hiperarcos que no es terminal no tiene solucion (costo inf)
+#
+# como funciona:
+# 1. se sigue la mejor solucion parcial (los hiperarcos marcados) desde el inicio
+#    hasta encontrar un nodo sin expandir y sin resolver
+# 2. se expande: sus hijos nuevos empiezan con el costo de la heuristica
+# 3. se revisan costos de abajo hacia arriba: solo los nodos cuyo costo o marca
+#    cambio avisan a sus padres, asi no se recalcula todo el grafo
+# la MemoriaAO guarda costos, marcas y nodos resueltos; si se pasa la misma
+# a varias llamadas (mismo grafo y heuristica), lo que ya se resolvio no se vuelve a buscar
+# y los subproblemas que se comparten se resuelven una sola vez
+# (el grafo tiene que ser aciclico, como en el ao* de siempre)
+
+class MemoriaAO:
+    def __init__(self):
+        self.costo = {}        # nodo -> costo estimado (o exacto si ya esta resuelto)
+        self.marcado = {}      # nodo -> posicion del mejor hiperarco
+        self.resueltos = set()
+        self.expandidos = set()
+        self.padres = {}       # nodo -> set de nodos que lo tienen como hijo
+
+def ao_estrella(grafo_and_or, inicio, heuristica=None, terminales=None, memoria=None,
+                estadisticas=None):
+    # heuristica: estimacion del costo de resolver cada nodo (diccionario, funcion o
+    #             Heuristica); sin heuristica se usa 0
+    # memoria: MemoriaAO para reusar lo resuelto entre llamadas
+    # estadisticas: diccionario opcional con "expandidos" y "revisiones" de esta llamada
+    # regresa (solucion, costo): solucion es {nodo: [hijos del hiperarco escogido]}
+    # para los nodos no terminales de la solucion, o (None, None) si no hay solucion
+    h = como_heuristica(heuristica if heuristica is not None else {}).get
+    terminales = terminales or {}
+    m = memoria if memoria is not None else MemoriaAO()
+    costo, marcado, resueltos = m.costo, m.marcado, m.resueltos
+    inf = float("inf")
+    expandidos = revisiones = 0
+
+    def conocer(n):
+        if n not in costo:
+            if n in terminales:
+                costo[n] = terminales[n]
+                resueltos.add(n)
+            else:
+                costo[n] = h(n, 0)
+
+    conocer(inicio)
+    while inicio not in resueltos and costo[inicio] < inf:
+        # 1. buscar una punta sin expandir en la mejor solucion parcial
+        punta = None
+        pila = [inicio]
+        vistos = set()
+        while pila:
+            n = pila.pop()
+            if n in vistos or n in resueltos:
+                continue
+            vistos.add(n)
+            if n not in m.expandidos:
+                punta = n
+                break
+            _, hijos = grafo_and_or[n][marcado[n]]
+            pila.extend(reversed(hijos))
+        if punta is None:
+            break  # no deberia pasar en un grafo aciclico
+
+        # 2. expandir la punta
+        m.expandidos.add(punta)
+        expandidos += 1
+        for _, hijos in grafo_and_or.get(punta, []):
+            for hijo in hijos:
+                conocer(hijo)
+                m.padres.setdefault(hijo, set()).add(punta)
+
+        # 3. revisar costos de abajo hacia arriba desde la punta
+        por_revisar = [punta]
+        en_lista = {punta}
+        while por_revisar:
+            n = por_revisar.pop()
+            en_lista.discard(n)
+            revisiones += 1
+            mejor, mejor_i = inf, None
+            for i, (costo_arco, hijos) in enumerate(grafo_and_or.get(n, [])):
+                total = costo_arco
+                for hijo in hijos:
+                    total += costo[hijo]
+                if total < mejor:
+                    mejor, mejor_i = total, i
+            esta_resuelto = mejor_i is not None and all(
+                hijo in resueltos for hijo in grafo_and_or[n][mejor_i][1]
+            )
+            if mejor == costo[n] and marcado.get(n) == mejor_i and esta_resuelto == (n in resueltos):
+                continue  # nada cambio, los padres no se enteran
+            costo[n] = mejor
+            marcado[n] = mejor_i
+            if esta_resuelto:
+                resueltos.add(n)
+            for padre in m.padres.get(n, ()):
+                if padre in m.expandidos and padre not in en_lista:
+                    en_lista.add(padre)
+                    por_revisar.append(padre)
+
+    if estadisticas is not None:
+        estadisticas.update(expandidos=expandidos, revisiones=revisiones)
+    if inicio not in resueltos:
+        return None, None
+
+    # la solucion: seguir los hiperarcos marcados desde el inicio
+    solucion = {}
+    pila = [inicio]
+    while pila:
+        n = pila.pop()
+        if n in solucion or n in terminales:
+            continue
+        hijos = grafo_and_or[n][marcado[n]][1]
+        solucion[n] = list(hijos)
+        pila.extend(hijos)
+    return solucion, costo[inicio]
+
+def _costo_and_or_recursivo(grafo_and_or, n, terminales):
+    # costo exacto probando todo, sin memoria (los subproblemas compartidos
+    # se recalculan cada vez que aparecen); solo para comparar en el benchmark
+    if n in terminales:
+        return terminales[n]
+    mejor = float("inf")
+    for costo_arco, hijos in grafo_and_or.get(n, []):
+        total = costo_arco
+        for hijo in hijos:
+            total += _costo_and_or_recursivo(grafo_and_or, hijo, terminales)
+            if total >= mejor:
+                break
+        mejor = min(mejor, total)
+    return mejor
+
+def generar_and_or(niveles, ramas, por_nivel=None, semilla=0):
+    # grafo and-or aciclico por niveles: cada nodo del nivel k tiene `ramas`
+    # hiperarcos, cada uno con 1 a 3 hijos del nivel k + 1; los hijos se escogen
+    # de un grupo de por_nivel nodos, asi muchos subproblemas se repiten
+    # el ultimo nivel son terminales con costo al azar
+    rnd = random.Random(semilla)
+    por_nivel = por_nivel or 4 * ramas
+    grafo = {}
+    for k in range(niveles - 1):
+        for i in range(1 if k == 0 else por_nivel):
+            grafo[(k, i)] = [
+                (rnd.randint(1, 5),
+                 [(k + 1, rnd.randrange(por_nivel)) for _ in range(rnd.randint(1, 3))])
+                for _ in range(ramas)
+            ]
+    terminales = {(niveles - 1, i): rnd.randint(0, 5) for i in range(por_nivel)}
+    # algunos problemas de en medio no tienen solucion
+    for nodo in rnd.sample(sorted(grafo)[1:], len(grafo) // 10):
+        grafo[nodo] = []
+    return grafo, terminales
+
+def benchmark_ao(ramas=(2, 3, 4, 5, 6), niveles=8):
+    # ao* contra probar todo recursivamente, y ao* reusando la memoria
+    # para resolver todos los nodos del segundo nivel despues del inicio
+    print("ramas  nodos  costo  recursivo(s)  ao*(s)  expandidos  revisiones  otros 10 con memoria(s)  expandidos")
+    for r in ramas:
+        grafo, terminales = generar_and_or(niveles, r, semilla=r)
+        inicio = (0, 0)
+
+        t0 = time.perf_counter()
+        referencia = _costo_and_or_recursivo(grafo, inicio, terminales)
+        t_rec = time.perf_counter() - t0
+
+        memoria = MemoriaAO()
+        est = {}
+        t0 = time.perf_counter()
+        _, costo = ao_estrella(grafo, inicio, terminales=terminales, memoria=memoria, estadisticas=est)
+        t_ao = time.perf_counter() - t0
+        assert (costo if costo is not None else float("inf")) == referencia
+
+        # mas consultas sobre el mismo grafo: lo ya resuelto no se vuelve a buscar
+        otros = [(1, i) for i in range(10)]
+        extra = 0
+        costos = []
+        t0 = time.perf_counter()
+        for nodo in otros:
+            est2 = {}
+            costos.append(ao_estrella(grafo, nodo, terminales=terminales, memoria=memoria,
+                                      estadisticas=est2)[1])
+            extra += est2["expandidos"]
+        t_otros = time.perf_counter() - t0
+        for nodo, c in zip(otros, costos):
+            assert (c if c is not None else float("inf")) == _costo_and_or_recursivo(grafo, nodo, terminales)
+
+        print(f"{r:<6} {len(grafo) + len(terminales):<6} {referencia:<6} {t_rec:>12.3f} {t_ao:>7.3f}"
+              f" {est['expandidos']:>11,} {est['revisiones']:>11,} {t_otros:>24.3f} {extra:>11,}")
 
 
 if __name__ == "__main__":
@@ -97,7 +1002,65 @@ if __name__ == "__main__":
     print("camino a* de casa a aeropuerto:", camino2)
     print("costo total:", costo2)
 
+    # la misma busqueda con la cola indexada
+    estadisticas = {}
+    camino3, costo3 = a_estrella(grafo_costos, heuristica, "casa", "oficina",
+                                 cola="indexada", estadisticas=estadisticas)
+    print("\ncon cola indexada:", camino3, costo3)
+    print("contadores:", estadisticas)
+
     # g(n) = costo real
     # h(n) = estimacion
     # f(n) = g + h
-    # a* elige el siguiente nodo con f mas chico
\ No newline at end of file
+    # a* elige el siguiente nodo con f mas chico
+
+    # ao*: armar una computadora = (comprar piezas y armarla) o comprarla hecha
+    grafo_and_or = {
+        "computadora": [(1, ["piezas", "armado"]), (2, ["hecha"])],
+        "piezas": [(1, ["cpu", "tarjeta_madre"]), (4, ["kit"])],
+        "hecha": [(0, ["tienda"])],
+    }
+    terminales = {"cpu": 3, "tarjeta_madre": 2, "kit": 4, "armado": 1, "tienda": 12}
+    solucion, costo_ao = ao_estrella(grafo_and_or, "computadora", terminales=terminales)
+    print("\nao*:", solucion, "costo", costo_ao)
+
+    # alt: la heuristica sale de precalcular distancias a unos cuantos landmarks
+    tablas = TablasALT(grafo_costos, k=2)
+    camino4, costo4 = a_estrella(grafo_costos, tablas.heuristica("oficina"), "casa", "oficina")
+    print("\ncon alt (landmarks", tablas.landmarks, "):", camino4, costo4)
+    print("cota de casa a oficina:", tablas.estimar("casa", "oficina"))
+
+    # bidireccional: desde casa hacia adelante y desde oficina hacia atras a la vez
+    camino5, costo5 = ucs_bidireccional(grafo_costos, "casa", "oficina")
+    print("bidireccional:", camino5, costo5)
+
+    # a* anytime: va dando soluciones cada vez mejores, con su cota
+    for camino6, costo6, cota6 in a_estrella_anytime(grafo_costos, heuristica, "casa", "oficina", peso=3):
+        print("anytime:", camino6, costo6, "cota", cota6)
+
+    # con la frontera limitada a 2 nodos
+    estadisticas = {}
+    camino7, costo7 = a_estrella(grafo_costos, heuristica, "casa", "oficina",
+                                 modo="memoria", max_frontera=2, estadisticas=estadisticas)
+    print("memoria acotada:", camino7, costo7, "olvidados", estadisticas["olvidados"])
+
+    # en rejillas no hace falta armar grafo_costos ("#" = ocupado), ver busqueda_rejilla.py
+    # (se importa aqui y no arriba: busqueda_rejilla carga este archivo en su benchmark)
+    from busqueda_rejilla import a_estrella_rejilla
+    mapa = ["......",
+            "..##..",
+            "...#..",
+            "......"]
+    print("rejilla:", a_estrella_rejilla(mapa, (0, 0), (3, 5)))
+
+    if "--bench" in sys.argv:
+        print()
+        benchmark()
+        print()
+        benchmark_alt()
+        print()
+        benchmark_bidireccional()
+        print()
+        benchmark_modos()
+        print()
+        benchmark_ao()
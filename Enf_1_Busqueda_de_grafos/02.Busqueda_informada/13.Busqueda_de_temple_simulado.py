@@ -14,11 +14,30 @@
 # - vecinos[x] = lista de estados a los que me puedo mover desde x
 #   import random  -> para elegir vecinos al azar
 #   import math    -> para calcular la probabilidad de aceptar un peor estado
+#
+# el motor (cadena_temple) guarda el valor del estado actual y el del mejor,
+# asi valor() se llama una sola vez por vecino (antes eran hasta 4 por paso)
+# ademas:
+# - vecinos puede ser un diccionario (como siempre) o una funcion vecinos(actual, rnd)
+#   que regresa un vecino al azar (para estados que no caben en un diccionario)
+# - delta(actual, vecino) opcional: regresa valor(vecino) - valor(actual) sin
+#   recalcular todo (por ejemplo en un recorrido solo cambian 2 aristas);
+#   con delta, valor() se llama una sola vez al inicio
+# - enfriamiento: como baja la temperatura, se escoge por nombre o se pasa un objeto
+#   "geometrico" (el de siempre, temp * factor), "lineal", "adaptativo", "recalentamiento"
+# - temple_simulado_cadenas: corre muchas cadenas independientes (cada una con su
+#   semilla) repartidas en procesos y regresa el mejor estado de todas
+#   (aqui no usamos numpy: los estados pueden ser cualquier cosa, no solo numeros)
 
-import random
 import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-def elegir_vecino_aleatorio(actual, vecinos):
+def elegir_vecino_aleatorio(actual, vecinos, rnd=random):
     """
     actual: estado actual
     vecinos: con lista de vecinos para cada estado
@@ -28,6 +47,7 @@ def elegir_vecino_aleatorio(actual, vecinos):
                  4: [5, 7],
                  5: [6]
              }
+    rnd: de donde salen los numeros al azar (por omision el modulo random)
 
     regresa un vecino aleatorio de la lista vecinos[actual]
     si no hay vecinos, regresa None
@@ -36,16 +56,230 @@ def elegir_vecino_aleatorio(actual, vecinos):
     opciones = vecinos.get(actual, [])
     if not opciones:
         return None
-    return random.choice(opciones)  # random.choice elige 1 elemento al azar
+    return rnd.choice(opciones)  # choice elige 1 elemento al azar
+
+
+# ---------------------------------------------------------------------------
+# enfriamientos
+# todos tienen las mismas dos funciones:
+#   iniciar(temp_inicial, iter_max, temp_minima) -> se llama al empezar cada cadena
+#                                                   (borra lo que se haya guardado antes)
+#   siguiente(temp, acepto, mejoro)              -> regresa la temperatura del paso que sigue
+#                                                   acepto: si el paso se movio de estado
+#                                                   mejoro: si el paso encontro un nuevo mejor
+
+def _factor_para(temp_inicial, iter_max, temp_minima):
+    # factor con el que temp_inicial llega a temp_minima justo despues de iter_max pasos
+    if temp_inicial <= temp_minima or iter_max <= 0:
+        return 0.9
+    return (temp_minima / temp_inicial) ** (1 / (iter_max + 1))
+
+
+class EnfriamientoGeometrico:
+    # temp = temp * factor (el de siempre)
+    # factor=None: se calcula para que la temperatura dure los iter_max pasos
+    def __init__(self, factor=None):
+        self.factor = factor
+
+    def iniciar(self, temp_inicial, iter_max, temp_minima):
+        self._factor = self.factor if self.factor is not None else _factor_para(
+            temp_inicial, iter_max, temp_minima)
+
+    def siguiente(self, temp, acepto, mejoro):
+        return temp * self._factor
+
+
+class EnfriamientoLineal:
+    # temp = temp - paso, con el paso para llegar de temp_inicial a temp_final en iter_max pasos
+    def __init__(self, temp_final=0.0):
+        self.temp_final = temp_final
+
+    def iniciar(self, temp_inicial, iter_max, temp_minima):
+        self._paso = (temp_inicial - self.temp_final) / max(1, iter_max)
+
+    def siguiente(self, temp, acepto, mejoro):
+        return temp - self._paso
+
+
+class EnfriamientoAdaptativo:
+    # geometrico, pero cada `ventana` pasos mira cuantos movimientos se aceptaron:
+    # si se acepto mas que `objetivo` (todavia muy caliente) enfria al doble de rapido,
+    # si se acepto menos (ya casi no se mueve) enfria a la mitad de rapido
+    # (en escala logaritmica: factor**2 o factor**0.5), siempre baja
+    def __init__(self, factor=None, objetivo=0.3, ventana=50):
+        self.factor = factor
+        self.objetivo = objetivo
+        self.ventana = ventana
+
+    def iniciar(self, temp_inicial, iter_max, temp_minima):
+        self._base = self.factor if self.factor is not None else _factor_para(
+            temp_inicial, iter_max, temp_minima)
+        self._factor = self._base
+        self._pasos = 0
+        self._aceptados = 0
+
+    def siguiente(self, temp, acepto, mejoro):
+        self._pasos += 1
+        self._aceptados += acepto
+        if self._pasos == self.ventana:
+            proporcion = self._aceptados / self._pasos
+            self._factor = self._base ** 2 if proporcion > self.objetivo else math.sqrt(self._base)
+            self._pasos = self._aceptados = 0
+        return temp * self._factor
+
+
+class EnfriamientoRecalentamiento:
+    # geometrico, pero si pasan `paciencia` pasos sin encontrar un nuevo mejor
+    # sube la temperatura a proporcion * temp_inicial (a lo mucho `maximo` veces)
+    # para salir del valle donde se quedo atorado
+    def __init__(self, factor=None, paciencia=200, proporcion=0.5, maximo=3):
+        self.factor = factor
+        self.paciencia = paciencia
+        self.proporcion = proporcion
+        self.maximo = maximo
+
+    def iniciar(self, temp_inicial, iter_max, temp_minima):
+        self._factor = self.factor if self.factor is not None else _factor_para(
+            temp_inicial, iter_max, temp_minima)
+        self._temp_inicial = temp_inicial
+        self._sin_mejorar = 0
+        self.recalentamientos = 0
+
+    def siguiente(self, temp, acepto, mejoro):
+        self._sin_mejorar = 0 if mejoro else self._sin_mejorar + 1
+        if self._sin_mejorar >= self.paciencia and self.recalentamientos < self.maximo:
+            self._sin_mejorar = 0
+            self.recalentamientos += 1
+            return max(temp, self.proporcion * self._temp_inicial)
+        return temp * self._factor
+
 
-def temple_simulado(inicio, vecinos, valor, temp_inicial, factor_enfriar, iter_max):
+ENFRIAMIENTOS = {
+    "geometrico": EnfriamientoGeometrico,
+    "lineal": EnfriamientoLineal,
+    "adaptativo": EnfriamientoAdaptativo,
+    "recalentamiento": EnfriamientoRecalentamiento,
+}
+
+
+def crear_enfriamiento(tipo="geometrico", **opciones):
+    # tipo: un nombre de ENFRIAMIENTOS, opciones van al constructor
+    # (por ejemplo crear_enfriamiento("recalentamiento", paciencia=100))
+    try:
+        clase = ENFRIAMIENTOS[tipo]
+    except KeyError:
+        raise ValueError(f"enfriamiento desconocido: {tipo!r} (opciones: {list(ENFRIAMIENTOS)})") from None
+    return clase(**opciones)
+
+
+def _como_enfriamiento(enfriamiento):
+    # acepta nombre u objeto con iniciar/siguiente
+    if isinstance(enfriamiento, str):
+        return crear_enfriamiento(enfriamiento)
+    return enfriamiento
+
+
+# ---------------------------------------------------------------------------
+# motor
+
+def cadena_temple(inicio, vecinos, valor, temp_inicial, iter_max, enfriamiento="geometrico",
+                  delta=None, rnd=random, temp_minima=0.0001, historial=True, estadisticas=None):
+    """
+    una cadena de temple simulado; temple_simulado y temple_simulado_cadenas usan esta
+
+    vecinos: diccionario estado -> lista de vecinos, o funcion vecinos(actual, rnd) -> vecino o None
+    delta: funcion opcional delta(actual, vecino) -> valor(vecino) - valor(actual)
+    enfriamiento: nombre de ENFRIAMIENTOS o un objeto con iniciar/siguiente
+    rnd: random.Random (o el modulo random)
+    historial: si es False no se guardan los estados visitados (para cadenas largas)
+    estadisticas: diccionario opcional donde se dejan los contadores
+
+    regresa (mejor_estado, valor_mejor, historial o None)
+    """
+    enfriamiento = _como_enfriamiento(enfriamiento)
+    enfriamiento.iniciar(temp_inicial, iter_max, temp_minima)
+    if callable(vecinos):
+        elegir = vecinos
+    else:
+        def elegir(actual, rnd):
+            return elegir_vecino_aleatorio(actual, vecinos, rnd)
+
+    actual = inicio
+    valor_actual = valor(actual)
+    mejor, valor_mejor = actual, valor_actual
+    pasos = [actual] if historial else None
+    evaluaciones, deltas, aceptados, peores = 1, 0, 0, 0
+    exp, azar = math.exp, rnd.random
+
+    temp = temp_inicial
+    iteraciones = 0
+    for _ in range(iter_max):
+        vecino = elegir(actual, rnd)
+        if vecino is None:
+            # no me puedo mover a ningun lado
+            break
+        iteraciones += 1
+
+        # el valor de actual ya lo tengo guardado, solo falta el del vecino
+        # (con delta los valores se van sumando; pueden acumular un error de redondeo chico)
+        if delta is not None:
+            valor_vecino = valor_actual + delta(actual, vecino)
+            deltas += 1
+        else:
+            valor_vecino = valor(vecino)
+            evaluaciones += 1
+
+        # mejor: me muevo directo; peor: lo acepto con probabilidad e^(diff / temp)
+        if valor_vecino > valor_actual:
+            acepto = True
+        else:
+            diff = valor_vecino - valor_actual  # esto va a ser negativo (o cero)
+            prob = exp(diff / temp) if temp > 0 else 0
+            acepto = azar() < prob
+            peores += acepto
+        if acepto:
+            actual, valor_actual = vecino, valor_vecino
+            aceptados += 1
+
+        if pasos is not None:
+            pasos.append(actual)
+
+        mejoro = valor_actual > valor_mejor
+        if mejoro:
+            mejor, valor_mejor = actual, valor_actual
+
+        temp = enfriamiento.siguiente(temp, acepto, mejoro)
+        # si la temperatura ya es muy baja, no tiene caso seguir
+        if temp <= temp_minima:
+            break
+
+    if estadisticas is not None:
+        estadisticas.update({
+            "iteraciones": iteraciones,
+            "evaluaciones": evaluaciones,  # llamadas a valor()
+            "deltas": deltas,              # llamadas a delta()
+            "aceptados": aceptados,
+            "peores_aceptados": peores,
+            "temp_final": temp,
+            "recalentamientos": getattr(enfriamiento, "recalentamientos", 0),
+        })
+    return mejor, valor_mejor, pasos
+
+
+def temple_simulado(inicio, vecinos, valor, temp_inicial, factor_enfriar, iter_max,
+                    enfriamiento=None, delta=None, rnd=random, estadisticas=None):
     """
     inicio: estado inicial (por ejemplo 3)
-    vecinos: con las conexiones posibles
+    vecinos: con las conexiones posibles (o una funcion vecinos(actual, rnd))
     valor: funcion que regresa el puntaje de un estado (mas alto = mejor)
     temp_inicial: temperatura inicial (por ejemplo 10.0)
     factor_enfriar: de cuanto baja la temperatura en cada paso (ej 0.9)
     iter_max: cuantas iteraciones maximo voy a intentar
+    enfriamiento: None = geometrico con factor_enfriar (el de siempre);
+                  si no, un nombre de ENFRIAMIENTOS o un objeto (factor_enfriar ya no se usa)
+    delta: funcion opcional delta(actual, vecino) -> valor(vecino) - valor(actual)
+    rnd: de donde salen los numeros al azar (por omision el modulo random)
+    estadisticas: diccionario opcional donde se dejan los contadores de la corrida
 
     esta funcion regresa:
     - mejor_estado_global: el mejor estado que vi en toda la busqueda
@@ -59,64 +293,162 @@ def temple_simulado(inicio, vecinos, valor, temp_inicial, factor_enfriar, iter_m
          a veces acepto moverme igual
          depende de la temperatura actual
     5. bajo la temperatura
+       ejemplo: si temp era 10 y factor_enfriar es 0.9
+       siguiente temp = 9, luego 8.1, luego 7.29, etc
     """
+    if enfriamiento is None:
+        enfriamiento = EnfriamientoGeometrico(factor_enfriar)
+    mejor_estado_global, _, historial = cadena_temple(
+        inicio, vecinos, valor, temp_inicial, iter_max, enfriamiento=enfriamiento,
+        delta=delta, rnd=rnd, estadisticas=estadisticas)
+    return mejor_estado_global, historial
 
-    actual = inicio
-    mejor_estado_global = actual
-    historial = [actual]
 
-    temp = temp_inicial  # temperatura actual
+# ---------------------------------------------------------------------------
+# muchas cadenas
 
-    for _ in range(iter_max):
-        vecino = elegir_vecino_aleatorio(actual, vecinos)
-        if vecino is None:
-            # no me puedo mover a ningun lado
-            break
+def _correr_cadena(config, k):
+    # una cadena completa; se corre igual en este proceso o en uno del pool
+    # la semilla de cada cadena sale de la semilla general y su numero,
+    # asi el resultado es igual sin importar cuantos procesos se usen
+    rnd = random.Random(config["semilla"] * 1_000_003 + k)
+    inicio = config["inicio"]
+    if callable(inicio):
+        inicio = inicio(rnd)
+    estadisticas = {}
+    t0 = time.perf_counter()
+    mejor, valor_mejor, _ = cadena_temple(
+        inicio, config["vecinos"], config["valor"], config["temp_inicial"], config["iter_max"],
+        enfriamiento=config["enfriamiento"], delta=config["delta"], rnd=rnd,
+        temp_minima=config["temp_minima"], historial=False, estadisticas=estadisticas)
+    estadisticas["tiempo"] = time.perf_counter() - t0
+    return mejor, valor_mejor, estadisticas
 
-        valor_actual = valor(actual)
-        valor_vecino = valor(vecino)
 
-        # si el vecino es mejor, me muevo directo
-        if valor_vecino > valor_actual:
-            actual = vecino
-        else:
-            # el vecino es peor
-            # calculamos si aun asi lo aceptamos
-            # diff = que tan peor es
-            diff = valor_vecino - valor_actual  # esto va a ser negativo
-
-            # prob = probabilidad de aceptar el movimiento peor
-            # math.exp(x) = e^x
-            # mientras temp sea grande, esta prob puede ser alta
-            # cuando temp baja, ya casi no acepta cosas peores
-            prob = math.exp(diff / temp) if temp > 0 else 0
-
-            # random.random() da un numero entre 0.0 y 1.0
-            # si prob es mas grande que ese numero aleatorio, aceptamos movernos
-            if random.random() < prob:
-                actual = vecino
-                # si no pasa el if, me quedo igual en "actual"
-
-        # guardo el estado actual en historial
-        historial.append(actual)
-
-        # actualizo el mejor estado global si encontre algo mejor
-        if valor(actual) > valor(mejor_estado_global):
-            mejor_estado_global = actual
-
-        # bajo la temperatura
-        temp = temp * factor_enfriar
-        # ejemplo: si temp era 10 y factor_enfriar es 0.9
-        # siguiente temp = 9
-        # luego 8.1
-        # luego 7.29
-        # etc
+def temple_simulado_cadenas(inicio, vecinos, valor, temp_inicial, iter_max, cadenas=4, procesos=None,
+                            enfriamiento="geometrico", delta=None, semilla=0, temp_minima=0.0001):
+    """
+    corre `cadenas` busquedas de temple simulado independientes y regresa la mejor
 
-        # si la temperatura ya es muy baja, no tiene caso seguir
-        if temp <= 0.0001:
-            break
+    inicio: estado inicial de todas las cadenas, o funcion inicio(rnd) -> estado
+            (para que cada cadena empiece en un lugar distinto)
+    procesos: cuantos procesos (None = uno por cadena hasta los nucleos que haya,
+              1 = todas en este proceso, una tras otra)
+              con procesos, vecinos/valor/delta/inicio tienen que poder mandarse a otro
+              proceso (funciones de nivel de modulo, diccionarios, objetos con metodos)
+    enfriamiento: nombre de ENFRIAMIENTOS o un objeto; cada cadena lo inicia de nuevo
+    resto: como en cadena_temple
+
+    regresa (mejor_estado, valor_mejor, resultados)
+    resultados: lista con (mejor_estado, valor_mejor, estadisticas) de cada cadena, en orden
+    si hay empate gana la cadena con numero mas chico
+    """
+    config = {
+        "inicio": inicio, "vecinos": vecinos, "valor": valor, "temp_inicial": temp_inicial,
+        "iter_max": iter_max, "enfriamiento": _como_enfriamiento(enfriamiento), "delta": delta,
+        "semilla": semilla, "temp_minima": temp_minima,
+    }
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    procesos = max(1, min(procesos, cadenas))
+
+    if procesos == 1:
+        resultados = [_correr_cadena(config, k) for k in range(cadenas)]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(_correr_cadena, repeat(config), range(cadenas)))
+
+    mejor, valor_mejor = None, -math.inf
+    for estado, v, _ in resultados:
+        if mejor is None or v > valor_mejor:
+            mejor, valor_mejor = estado, v
+    return mejor, valor_mejor, resultados
+
+
+# ---------------------------------------------------------------------------
+# ejemplo mas grande para medir: agente viajero con movimientos 2-opt
+# (voltear un pedazo del recorrido); valor = -largo del recorrido
+
+class Recorrido(tuple):
+    # un recorrido (tupla de ciudades) que recuerda que pedazo se volteo para llegar a el
+    cambio = None
+
+
+class Viajero:
+    # vecino, valor y delta como metodos, asi se pueden mandar a otros procesos
+    def __init__(self, ciudades=200, semilla=0):
+        rnd = random.Random(semilla)
+        puntos = [(rnd.random(), rnd.random()) for _ in range(ciudades)]
+        self.n = ciudades
+        self.dist = [[math.dist(p, q) for q in puntos] for p in puntos]
+
+    def inicio(self, rnd):
+        ruta = list(range(self.n))
+        rnd.shuffle(ruta)
+        return Recorrido(ruta)
+
+    def vecino(self, ruta, rnd):
+        i = rnd.randrange(1, self.n - 1)
+        j = rnd.randrange(i + 1, self.n)
+        nueva = Recorrido(ruta[:i] + ruta[i:j + 1][::-1] + ruta[j + 1:])
+        nueva.cambio = (i, j)
+        return nueva
+
+    def valor(self, ruta):
+        dist = self.dist
+        return -sum(dist[a][b] for a, b in zip(ruta, ruta[1:] + ruta[:1]))
+
+    def delta(self, ruta, nueva):
+        # solo cambian las aristas (a, b) y (c, d) por (a, c) y (b, d)
+        i, j = nueva.cambio
+        dist = self.dist
+        a, b, c, d = ruta[i - 1], ruta[i], ruta[j], ruta[(j + 1) % self.n]
+        return dist[a][b] + dist[c][d] - dist[a][c] - dist[b][d]
+
+
+def benchmark(ciudades=200, iter_max=20_000, cadenas=8):
+    problema = Viajero(ciudades)
+    print(f"agente viajero con {ciudades} ciudades, {iter_max:,} pasos por cadena")
+
+    # 1) valor completo contra delta, una cadena
+    rnd_inicio = random.Random(1)
+    inicio = problema.inicio(rnd_inicio)
+    print("forma           tiempo(s)  llamadas a valor  largo")
+    for nombre, delta in (("valor completo", None), ("con delta", problema.delta)):
+        estadisticas = {}
+        t0 = time.perf_counter()
+        _, v, _ = cadena_temple(inicio, problema.vecino, problema.valor, 1.0, iter_max,
+                                delta=delta, rnd=random.Random(0), historial=False,
+                                estadisticas=estadisticas)
+        t = time.perf_counter() - t0
+        print(f"{nombre:<15} {t:>9.2f}  {estadisticas['evaluaciones']:>16,}  {-v:.3f}")
+
+    # 2) varias cadenas, en este proceso y repartidas en procesos (mismo resultado)
+    print(f"\n{cadenas} cadenas (nucleos disponibles: {os.cpu_count()})")
+    referencia = None
+    for procesos in sorted({1, min(cadenas, os.cpu_count() or 1), 2}):
+        t0 = time.perf_counter()
+        mejor, v, resultados = temple_simulado_cadenas(
+            problema.inicio, problema.vecino, problema.valor, 1.0, iter_max, cadenas=cadenas,
+            procesos=procesos, delta=problema.delta)
+        t = time.perf_counter() - t0
+        if referencia is None:
+            referencia = v
+        assert v == referencia
+        largos = sorted(-r[1] for r in resultados)
+        print(f"procesos={procesos}: {t:.2f} s  mejor largo {-v:.3f} "
+              f"(peor cadena {largos[-1]:.3f})")
+
+    # 3) enfriamientos, mismas semillas
+    print("\nenfriamiento      mejor largo  promedio  recalentamientos")
+    for nombre in ENFRIAMIENTOS:
+        _, v, resultados = temple_simulado_cadenas(
+            problema.inicio, problema.vecino, problema.valor, 1.0, iter_max, cadenas=cadenas,
+            procesos=1, enfriamiento=nombre, delta=problema.delta)
+        promedio = -sum(r[1] for r in resultados) / len(resultados)
+        recal = sum(r[2]["recalentamientos"] for r in resultados)
+        print(f"{nombre:<17} {-v:>11.3f}  {promedio:>8.3f}  {recal:>16}")
 
-    return mejor_estado_global, historial
 
 if __name__ == "__main__":
     # vecinos dice a donde puedo ir desde cada estado
@@ -138,19 +470,36 @@ if __name__ == "__main__":
     def valor(x):
         return x
 
+    estadisticas = {}
     mejor, pasos = temple_simulado(
         inicio=3,
         vecinos=vecinos,
         valor=valor,
         temp_inicial=10.0,   # temperatura alta al inicio
         factor_enfriar=0.9,  # que tan rapido baja la temperatura
-        iter_max=50          # cuantas iteraciones maximo
+        iter_max=50,         # cuantas iteraciones maximo
+        estadisticas=estadisticas
     )
 
     print("mejor estado encontrado:", mejor)
     print("historial de estados visitados:", pasos)
+    print("llamadas a valor:", estadisticas["evaluaciones"], "en", estadisticas["iteraciones"], "pasos")
+
+    # mismo problema con otro enfriamiento
+    mejor, pasos = temple_simulado(3, vecinos, valor, 10.0, 0.9, 50,
+                                   enfriamiento=crear_enfriamiento("lineal"))
+    print("con enfriamiento lineal:", mejor, pasos)
+
+    # varias cadenas, cada una empieza en un estado al azar
+    mejor, v, resultados = temple_simulado_cadenas(
+        lambda rnd: rnd.choice([3, 4, 5]), vecinos, valor, 10.0, 50, cadenas=4, procesos=1)
+    print("mejor de 4 cadenas:", mejor, "| mejores de cada cadena:", [r[0] for r in resultados])
 
     # - temp_inicial: mientras sea alta, el algoritmo se permite probar cosas peores
     # - factor_enfriar: numero entre 0 y 1, controla que tan rapido baja temp
     # - math.exp(diff / temp): calcula la probabilidad de aceptar un movimiento peor
-    # - random.random(): numero aleatorio para decidir si acepto ese movimiento
\ No newline at end of file
+    # - random.random(): numero aleatorio para decidir si acepto ese movimiento
+
+    if "--bench" in sys.argv:
+        print()
+        benchmark()
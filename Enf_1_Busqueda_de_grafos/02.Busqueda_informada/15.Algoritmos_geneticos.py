@@ -9,8 +9,44 @@
 # - las mezclo para crear soluciones nuevas
 # - hago mutaciones chicas para no quedarme siempre en lo mismo
 # - repito varias veces hasta que salga una solucion buena
+#
+# hay dos motores (se escoge con motor= en algoritmo_genetico):
+# - "listas": cada individuo es una lista de 0 y 1 (el de siempre, facil de leer)
+# - "bits":   cada individuo es un solo entero de python y el bit i es el gen i
+#   la cruza y la mutacion son operaciones de bits sobre todo el individuo
+#   (&, |, ^), el puntaje se calcula una sola vez por individuo y se guarda
+#   junto a el; aguanta poblaciones de 10^5 con individuos de 10^4 genes
+#   (aqui no usamos numpy: los enteros de python ya hacen las operaciones
+#   de bits en c, 30 bits a la vez)
+#
+# operadores (solo motor "bits"): se escogen por nombre o se pasa una funcion
+#   seleccion = "truncamiento" (los mejores, el de siempre), "torneo", "ruleta", "sus"
+#   cruce     = "un_punto" (el de siempre), "k_puntos", "uniforme"
+#
+# EvaluadorCacheado: para puntajes caros (una simulacion, por ejemplo); guarda el
+# puntaje de cada genoma ya visto (se repiten mucho por la elite y la cruza) y manda
+# los que faltan en lotes a hilos o procesos; con evaluador, historial_mejor trae
+# ademas en .estadisticas de cada generacion evaluaciones, aciertos y tiempo
+# (sin evaluador se llama puntaje_bits directo, que para puntajes baratos es lo mas rapido)
+#
+# algoritmo_genetico_islas: varias poblaciones (islas) que evolucionan cada una en
+# su proceso y cada tantas generaciones se pasan sus mejores individuos
+# (migracion) por un bloque de memoria compartida
 
+import heapq
+import math
+import multiprocessing
+import os
 import random
+import struct
+import sys
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import accumulate, repeat
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
 
 def crear_individuo(longitud):
     # crea una posible solucion
@@ -71,7 +107,14 @@ def algoritmo_genetico(
     longitud_individuo,
     generaciones,
     prob_mutacion,
-    padres_a_tomar
+    padres_a_tomar,
+    motor="listas",
+    puntaje_bits=None,
+    semilla=None,
+    seleccion="truncamiento",
+    cruce="un_punto",
+    elite=None,
+    evaluador=None
 ):
     # esta es la funcion principal
     # tam_poblacion     = cuantas soluciones tengo al mismo tiempo
@@ -83,6 +126,21 @@ def algoritmo_genetico(
     # mejor_final       = la mejor solucion encontrada
     # puntaje(mejor_final) = su puntaje
     # historial_mejor   = mejores soluciones por cada generacion
+    # motor             = "listas" o "bits" (ver arriba); los dos regresan lo mismo
+    # puntaje_bits      = solo motor "bits": funcion entero -> puntaje (default: cuantos 1 hay)
+    # semilla           = solo motor "bits": para repetir exactamente la misma corrida
+    # seleccion, cruce  = solo motor "bits": operadores (ver SELECCIONES y CRUCES)
+    # elite             = solo motor "bits": cuantos mejores pasan tal cual (None = padres_a_tomar)
+    # evaluador         = solo motor "bits": EvaluadorCacheado para puntajes caros
+
+    if motor == "bits":
+        return algoritmo_genetico_bits(tam_poblacion, longitud_individuo, generaciones,
+                                       prob_mutacion, padres_a_tomar, puntaje_bits, semilla,
+                                       seleccion, cruce, elite, evaluador)
+    if motor != "listas":
+        raise ValueError(f"motor desconocido: {motor!r} (opciones: 'listas', 'bits')")
+    if (seleccion, cruce, elite, evaluador) != ("truncamiento", "un_punto", None, None):
+        raise ValueError("seleccion, cruce, elite y evaluador solo se pueden cambiar con motor='bits'")
 
     # 1) creo la poblacion inicial (todas aleatorias)
     poblacion = []
@@ -122,6 +180,690 @@ def algoritmo_genetico(
     mejor_final = max(poblacion, key=lambda ind: puntaje(ind))
     return mejor_final, puntaje(mejor_final), historial_mejor
 
+# ---------------------------------------------------------------------------
+# motor de bits
+
+def a_lista(genoma, longitud):
+    # entero -> lista de 0 y 1 (el bit i queda en la posicion i)
+    return [int(b) for b in reversed(format(genoma, f"0{longitud}b"))]
+
+
+def de_lista(individuo):
+    # lista de 0 y 1 -> entero
+    return int("".join(map(str, reversed(individuo))), 2)
+
+
+def mascaras_mutacion(rnd, cantidad, longitud, prob_mutacion):
+    # una sola mascara al azar para toda la generacion: cantidad * longitud bits
+    # donde cada uno vale 1 con probabilidad prob_mutacion
+    # en lugar de tirar un dado por bit se salta directo al siguiente bit que cambia
+    # (la distancia entre dos cambios es geometrica), asi se hacen ~cantidad*longitud*p
+    # pasos y no cantidad*longitud
+    # regresa {individuo: mascara} solo con los individuos que si tienen cambios
+    mascaras = {}
+    if prob_mutacion <= 0:
+        return mascaras
+    total = cantidad * longitud
+    if prob_mutacion >= 1:
+        lleno = (1 << longitud) - 1
+        return dict.fromkeys(range(cantidad), lleno)
+    log_q = math.log(1 - prob_mutacion)
+    aleatorio, log = rnd.random, math.log
+    pos = -1
+    while True:
+        pos += 1 + int(log(1 - aleatorio()) / log_q)
+        if pos >= total:
+            return mascaras
+        i, bit = divmod(pos, longitud)
+        mascaras[i] = mascaras.get(i, 0) | (1 << bit)
+
+
+class PoblacionBits:
+    """
+    toda la poblacion en dos listas paralelas:
+      genomas[i]  = entero con los genes del individuo i
+      puntajes[i] = su puntaje, calculado una sola vez cuando nace
+    los puntajes se calculan con evaluador.evaluar(lista_de_genomas) si se da uno
+    (ver EvaluadorCacheado), si no con puntaje_bits uno por uno
+    """
+
+    def __init__(self, longitud, genomas, puntajes=None, puntaje_bits=None, evaluador=None):
+        self.longitud = longitud
+        self.puntaje_bits = puntaje_bits or int.bit_count
+        self.evaluador = evaluador
+        self.genomas = genomas
+        self.puntajes = puntajes if puntajes is not None else self.evaluar(genomas)
+
+    def evaluar(self, genomas):
+        if self.evaluador is not None:
+            return self.evaluador.evaluar(genomas)
+        return list(map(self.puntaje_bits, genomas))
+
+    @classmethod
+    def aleatoria(cls, tam, longitud, rnd, puntaje_bits=None, evaluador=None):
+        return cls(longitud, [rnd.getrandbits(longitud) for _ in range(tam)],
+                   puntaje_bits=puntaje_bits, evaluador=evaluador)
+
+    def __len__(self):
+        return len(self.genomas)
+
+    def mejores(self, cantidad):
+        # indices de los `cantidad` mejores, del mejor al peor, sin ordenar a todos
+        return heapq.nlargest(cantidad, range(len(self.genomas)), key=self.puntajes.__getitem__)
+
+    def mejor(self):
+        return max(range(len(self.genomas)), key=self.puntajes.__getitem__)
+
+    def hijos(self, padres, cantidad, prob_mutacion, rnd, cruce=None):
+        # cantidad hijos nuevos en lote: cada uno cruza dos padres escogidos al azar
+        # (por default con cruce de un punto, lo mismo que cruzar()) y luego se aplica
+        # la mascara de mutacion de la generacion
+        longitud = self.longitud
+        cruce = cruce or cruce_un_punto
+        genomas = [self.genomas[i] for i in padres]
+        madres = rnd.choices(genomas, k=cantidad)
+        padres_ = rnd.choices(genomas, k=cantidad)
+        nuevos = [cruce(a, b, longitud, rnd) for a, b in zip(madres, padres_)]
+        for i, mascara in mascaras_mutacion(rnd, cantidad, longitud, prob_mutacion).items():
+            nuevos[i] ^= mascara
+        return nuevos
+
+    def siguiente(self, padres, prob_mutacion, rnd, elite=None, cruce=None):
+        # nueva generacion del mismo tamano: los de elite tal cual (con su puntaje ya
+        # calculado; si no se dan, los padres) y los hijos de los padres;
+        # solo a los hijos se les calcula el puntaje
+        if elite is None:
+            elite = padres
+        nuevos = self.hijos(padres, len(self.genomas) - len(elite), prob_mutacion, rnd, cruce)
+        return PoblacionBits(
+            self.longitud,
+            [self.genomas[i] for i in elite] + nuevos,
+            [self.puntajes[i] for i in elite] + self.evaluar(nuevos),
+            self.puntaje_bits,
+            self.evaluador,
+        )
+
+
+# ---------------------------------------------------------------------------
+# evaluacion de puntajes con cache
+
+_FALTA = object()
+
+
+def _evaluar_lote(funcion, genomas):
+    # corre en un hilo o proceso del ejecutor (por eso esta hasta arriba del modulo)
+    return [funcion(g) for g in genomas]
+
+
+class EvaluadorCacheado:
+    """
+    calcula puntajes de muchos genomas a la vez:
+    - cada genoma (un entero, asi que se puede usar de llave) se busca primero en una
+      cache con tamano maximo (cuando se llena se tira el que se uso hace mas tiempo)
+    - los repetidos dentro del mismo lote se calculan una sola vez
+    - los que faltan se mandan en lotes de `lote` a un ejecutor:
+        ejecutor=None        -> en este mismo hilo
+        ejecutor="hilos"     -> ThreadPoolExecutor (sirve si el puntaje espera algo
+                                de afuera o usa codigo que suelta el gil)
+        ejecutor="procesos"  -> ProcessPoolExecutor (puntaje_bits tiene que estar
+                                definido hasta arriba de un modulo)
+        o cualquier Executor ya creado
+    tomar_estadisticas() regresa lo de la ultima generacion y empieza de cero;
+    estadisticas tiene los totales. usarlo con `with` o llamar cerrar() al final
+    """
+
+    def __init__(self, puntaje_bits=None, maximo=100_000, ejecutor=None, trabajadores=None, lote=64):
+        self.puntaje_bits = puntaje_bits or int.bit_count
+        self.maximo = maximo
+        self.lote = lote
+        self.cache = OrderedDict()
+        self._propio = False
+        if ejecutor == "hilos":
+            ejecutor, self._propio = ThreadPoolExecutor(max_workers=trabajadores), True
+        elif ejecutor == "procesos":
+            ejecutor, self._propio = ProcessPoolExecutor(max_workers=trabajadores), True
+        elif ejecutor is not None and not isinstance(ejecutor, Executor):
+            raise ValueError(f"ejecutor desconocido: {ejecutor!r} (opciones: None, 'hilos', 'procesos')")
+        self.ejecutor = ejecutor
+        self.estadisticas = {"evaluaciones": 0, "aciertos": 0, "tiempo": 0.0}
+        self._generacion = dict(self.estadisticas)
+
+    def evaluar(self, genomas):
+        t0 = time.perf_counter()
+        cache = self.cache
+        puntajes = [None] * len(genomas)
+        faltan = {}  # genoma -> posiciones donde va su puntaje
+        for i, genoma in enumerate(genomas):
+            valor = cache.get(genoma, _FALTA)
+            if valor is _FALTA:
+                faltan.setdefault(genoma, []).append(i)
+            else:
+                cache.move_to_end(genoma)
+                puntajes[i] = valor
+
+        nuevos = list(faltan)
+        for genoma, valor in zip(nuevos, self._calcular(nuevos)):
+            for i in faltan[genoma]:
+                puntajes[i] = valor
+            cache[genoma] = valor
+        while len(cache) > self.maximo:
+            cache.popitem(last=False)
+
+        for contador in (self.estadisticas, self._generacion):
+            contador["evaluaciones"] += len(nuevos)
+            contador["aciertos"] += len(genomas) - len(nuevos)
+            contador["tiempo"] += time.perf_counter() - t0
+        return puntajes
+
+    def _calcular(self, genomas):
+        if self.ejecutor is None or len(genomas) <= self.lote:
+            return _evaluar_lote(self.puntaje_bits, genomas)
+        lotes = [genomas[k:k + self.lote] for k in range(0, len(genomas), self.lote)]
+        return [v for valores in self.ejecutor.map(_evaluar_lote, repeat(self.puntaje_bits), lotes)
+                for v in valores]
+
+    def tomar_estadisticas(self):
+        actual = self._generacion
+        self._generacion = {"evaluaciones": 0, "aciertos": 0, "tiempo": 0.0}
+        return actual
+
+    def cerrar(self):
+        if self._propio:
+            self.ejecutor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+
+class GeneracionHistorial(tuple):
+    # una entrada de historial_mejor: se desempaca igual que antes como (individuo, puntaje)
+    # y ademas trae .estadisticas con evaluaciones, aciertos y tiempo de esa generacion
+    def __new__(cls, individuo, puntaje, estadisticas):
+        entrada = super().__new__(cls, (individuo, puntaje))
+        entrada.estadisticas = estadisticas
+        return entrada
+
+    def __getnewargs__(self):
+        # pickle y copy.deepcopy rearman la entrada con esto (por default solo
+        # pasarian la tupla y a __new__ le faltaria estadisticas)
+        return (*self, self.estadisticas)
+
+
+# ---------------------------------------------------------------------------
+# operadores de seleccion: (poblacion, cantidad, rnd) -> lista de indices de padres
+# (puede tener repetidos); ninguno ordena toda la poblacion
+
+def seleccion_truncamiento(poblacion, cantidad, rnd):
+    # los `cantidad` mejores (heapq.nlargest: n log cantidad, no n log n)
+    return poblacion.mejores(cantidad)
+
+
+def seleccion_torneo(poblacion, cantidad, rnd, tamano=3):
+    # cada padre es el mejor de `tamano` individuos al azar: cantidad * tamano pasos
+    puntajes = poblacion.puntajes
+    n = len(puntajes)
+    aleatorio = rnd.randrange
+    elegidos = []
+    for _ in range(cantidad):
+        ganador = aleatorio(n)
+        for _ in range(tamano - 1):
+            retador = aleatorio(n)
+            if puntajes[retador] > puntajes[ganador]:
+                ganador = retador
+        elegidos.append(ganador)
+    return elegidos
+
+
+def _acumulados(puntajes):
+    # suma acumulada de los puntajes (recorridos para que el menor valga 0 si hay negativos)
+    menor = min(puntajes)
+    if menor < 0:
+        puntajes = [p - menor for p in puntajes]
+    acumulado = list(accumulate(puntajes))
+    return acumulado if acumulado[-1] > 0 else list(range(1, len(puntajes) + 1))
+
+
+def seleccion_ruleta(poblacion, cantidad, rnd):
+    # probabilidad proporcional al puntaje: un numero al azar en [0, total) y
+    # busqueda binaria en la suma acumulada para ver a quien le toco
+    acumulado = _acumulados(poblacion.puntajes)
+    total = acumulado[-1]
+    ultimo = len(acumulado) - 1
+    return [min(bisect_right(acumulado, rnd.random() * total), ultimo) for _ in range(cantidad)]
+
+
+def seleccion_sus(poblacion, cantidad, rnd):
+    # stochastic universal sampling: como la ruleta pero con `cantidad` flechas
+    # igual de separadas y un solo numero al azar; menos varianza que la ruleta
+    acumulado = _acumulados(poblacion.puntajes)
+    paso = acumulado[-1] / cantidad
+    inicio = rnd.random() * paso
+    ultimo = len(acumulado) - 1
+    return [min(bisect_right(acumulado, inicio + k * paso), ultimo) for k in range(cantidad)]
+
+
+# operadores de cruce: (genoma_a, genoma_b, longitud, rnd) -> genoma del hijo
+
+def cruce_un_punto(a, b, longitud, rnd):
+    # bits antes del punto de a, el resto de b (lo mismo que cruzar())
+    bajos = (1 << rnd.randint(1, longitud - 1)) - 1
+    return (a & bajos) | (b & ~bajos)
+
+
+def cruce_k_puntos(a, b, longitud, rnd, puntos=2):
+    # `puntos` cortes distintos; los pedazos se van alternando entre a y b
+    mascara = 0
+    for corte in rnd.sample(range(1, longitud), min(puntos, longitud - 1)):
+        mascara ^= (1 << corte) - 1
+    return (a & mascara) | (b & ~mascara)
+
+
+def cruce_uniforme(a, b, longitud, rnd):
+    # cada gen sale de a o de b con la misma probabilidad (una mascara al azar)
+    mascara = rnd.getrandbits(longitud)
+    return (a & mascara) | (b & ~mascara)
+
+
+SELECCIONES = {
+    "truncamiento": seleccion_truncamiento,
+    "torneo": seleccion_torneo,
+    "ruleta": seleccion_ruleta,
+    "sus": seleccion_sus,
+}
+
+CRUCES = {
+    "un_punto": cruce_un_punto,
+    "k_puntos": cruce_k_puntos,
+    "uniforme": cruce_uniforme,
+}
+
+
+def operador(tabla, nombre):
+    # nombre del registro o directamente una funcion (ej. functools.partial(seleccion_torneo, tamano=5))
+    if callable(nombre):
+        return nombre
+    try:
+        return tabla[nombre]
+    except KeyError:
+        raise ValueError(f"operador desconocido: {nombre!r} (opciones: {list(tabla)})") from None
+
+
+def algoritmo_genetico_bits(tam_poblacion, longitud_individuo, generaciones, prob_mutacion,
+                            padres_a_tomar, puntaje_bits=None, semilla=None,
+                            seleccion="truncamiento", cruce="un_punto", elite=None,
+                            evaluador=None):
+    # lo mismo que algoritmo_genetico pero con PoblacionBits
+    # seleccion escoge padres_a_tomar padres; los `elite` mejores pasan tal cual
+    # (None = los mismos padres_a_tomar, como en el motor de listas)
+    # evaluador: EvaluadorCacheado para puntajes caros; si no se da, cada hijo se
+    # evalua con puntaje_bits directo (sin cache, que con puntajes baratos solo estorba)
+    # regresa igual: (mejor como lista de 0 y 1, su puntaje, historial_mejor)
+    # y cada entrada de historial_mejor trae .estadisticas de su generacion
+    # (tiempo_generacion, y con evaluador tambien evaluaciones, aciertos y tiempo)
+    rnd = random.Random(semilla)
+    seleccionar = operador(SELECCIONES, seleccion)
+    cruzar_ = operador(CRUCES, cruce)
+    poblacion = PoblacionBits.aleatoria(tam_poblacion, longitud_individuo, rnd, puntaje_bits, evaluador)
+    if evaluador is not None:
+        evaluador.tomar_estadisticas()  # la poblacion inicial no cuenta como generacion
+    historial_mejor = []
+    for _ in range(generaciones):
+        t0 = time.perf_counter()
+        poblacion = _generacion(poblacion, seleccionar, cruzar_, padres_a_tomar, elite,
+                                prob_mutacion, rnd)
+        estadisticas = evaluador.tomar_estadisticas() if evaluador is not None else {}
+        estadisticas["tiempo_generacion"] = time.perf_counter() - t0
+        i = poblacion.mejor()
+        historial_mejor.append(GeneracionHistorial(a_lista(poblacion.genomas[i], longitud_individuo),
+                                                   poblacion.puntajes[i], estadisticas))
+
+    i = poblacion.mejor()
+    return a_lista(poblacion.genomas[i], longitud_individuo), poblacion.puntajes[i], historial_mejor
+
+
+def _generacion(poblacion, seleccionar, cruzar_, padres_a_tomar, elite, prob_mutacion, rnd):
+    padres = seleccionar(poblacion, padres_a_tomar, rnd)
+    if elite is None:
+        mejores = padres if seleccionar is seleccion_truncamiento else poblacion.mejores(padres_a_tomar)
+    else:
+        mejores = poblacion.mejores(elite)
+    return poblacion.siguiente(padres, prob_mutacion, rnd, mejores, cruzar_)
+
+
+def benchmark(casos=((1000, 1000, 20), (10_000, 1000, 5), (100_000, 10_000, 2))):
+    # motor de listas contra motor de bits (el de listas solo en los casos chicos)
+    print("poblacion  genes   generaciones  motor   tiempo(s)  s/generacion  mejor puntaje")
+    for tam, longitud, generaciones in casos:
+        motores = ("listas", "bits") if tam * longitud <= 10**7 else ("bits",)
+        for motor in motores:
+            random.seed(0)
+            t0 = time.perf_counter()
+            _, mejor, _ = algoritmo_genetico(tam, longitud, generaciones, 1 / longitud,
+                                             max(2, tam // 10), motor=motor, semilla=0)
+            t = time.perf_counter() - t0
+            print(f"{tam:>9,}  {longitud:>6,}  {generaciones:>12}  {motor:<6} {t:>10.2f}"
+                  f"  {t / generaciones:>12.2f}  {mejor:>13,}")
+
+
+def benchmark_operadores(tam=100_000, longitud=1000, padres=10_000):
+    # cuanto tarda escoger padres en una poblacion grande: el sorted de
+    # seleccionar_padres (con listas, recalculando puntajes) contra los operadores
+    rnd = random.Random(0)
+    poblacion = PoblacionBits.aleatoria(tam, longitud, rnd)
+    listas = [a_lista(g, longitud) for g in poblacion.genomas[:tam // 10]]
+    print(f"escoger {padres:,} padres de {tam:,} individuos de {longitud} genes")
+    t0 = time.perf_counter()
+    seleccionar_padres(listas, padres)
+    t = (time.perf_counter() - t0) * 10
+    print(f"  seleccionar_padres (sorted con listas): {t:.3f} s (aprox: medido con {tam // 10:,} y multiplicado por 10)")
+    for nombre, seleccionar in SELECCIONES.items():
+        t0 = time.perf_counter()
+        seleccionar(poblacion, padres, rnd)
+        print(f"  {nombre:<38} {time.perf_counter() - t0:.3f} s")
+    print("mejor puntaje en onemax (poblacion 500, 300 genes, 40 generaciones):")
+    for seleccion in SELECCIONES:
+        fila = []
+        for cruce in CRUCES:
+            _, mejor, _ = algoritmo_genetico_bits(500, 300, 40, 1 / 300, 100, semilla=0,
+                                                  seleccion=seleccion, cruce=cruce, elite=5)
+            fila.append(f"{cruce}={mejor}")
+        print(f"  {seleccion:<13}", "  ".join(fila))
+
+
+def puntaje_simulado(genoma):
+    # como si el puntaje viniera de una simulacion externa: espera un poco
+    # (sin ocupar el procesador, como cuando se espera a otro programa) y cuenta unos
+    time.sleep(0.0005)
+    return genoma.bit_count()
+
+
+def benchmark_evaluador(tam=200, longitud=64, generaciones=20, trabajadores=8):
+    # puntaje caro con muchos repetidos (genomas cortos, elite grande):
+    # sin cache, con cache, y con cache mandando lo que falta a hilos o procesos
+    print(f"poblacion {tam}, {longitud} genes, {generaciones} generaciones, puntaje de ~0.5 ms")
+    print("forma                 tiempo(s)  evaluaciones  aciertos  mejor")
+    referencia = None
+    for nombre, crear in (
+        ("sin cache", lambda: EvaluadorCacheado(puntaje_simulado, maximo=0)),
+        ("cache", lambda: EvaluadorCacheado(puntaje_simulado)),
+        (f"cache + {trabajadores} hilos", lambda: EvaluadorCacheado(
+            puntaje_simulado, ejecutor="hilos", trabajadores=trabajadores, lote=8)),
+        ("cache + 2 procesos", lambda: EvaluadorCacheado(
+            puntaje_simulado, ejecutor="procesos", trabajadores=2, lote=8)),
+    ):
+        with crear() as evaluador:
+            t0 = time.perf_counter()
+            resultado = algoritmo_genetico_bits(tam, longitud, generaciones, 1 / longitud, tam // 10,
+                                                semilla=0, evaluador=evaluador)
+            t = time.perf_counter() - t0
+        if referencia is None:
+            referencia = resultado[:2]
+        assert resultado[:2] == referencia
+        e = evaluador.estadisticas
+        print(f"{nombre:<21} {t:>9.2f}  {e['evaluaciones']:>12}  {e['aciertos']:>8}  {resultado[1]}")
+
+
+# ---------------------------------------------------------------------------
+# modelo de islas
+
+TOPOLOGIAS = ("anillo", "completa")
+
+
+def fuentes_migracion(k, islas, topologia):
+    # de que islas recibe migrantes la isla k
+    # anillo: solo de la de atras (0 <- n-1, 1 <- 0, ...); completa: de todas las demas
+    if topologia == "anillo":
+        return [(k - 1) % islas] if islas > 1 else []
+    return [j for j in range(islas) if j != k]
+
+
+class _Isla:
+    # una poblacion de bits con su propio generador de numeros al azar
+    def __init__(self, k, config):
+        self.k = k
+        self.config = config
+        # la semilla de cada isla sale de la semilla general y su numero,
+        # asi la corrida es igual sin importar cuantos procesos se usen
+        self.rnd = random.Random(config["semilla"] * 1_000_003 + k)
+        self.evaluador = EvaluadorCacheado(config["puntaje_bits"], maximo=max(1, config["tam_poblacion"]))
+        self.poblacion = PoblacionBits.aleatoria(config["tam_poblacion"], config["longitud"],
+                                                 self.rnd, config["puntaje_bits"], self.evaluador)
+        self.evaluador.tomar_estadisticas()
+        self.historial = []  # (genoma, puntaje, estadisticas) del mejor de cada generacion
+
+    def avanzar(self, generaciones):
+        c = self.config
+        seleccionar = operador(SELECCIONES, c["seleccion"])
+        cruzar_ = operador(CRUCES, c["cruce"])
+        for _ in range(generaciones):
+            t0 = time.perf_counter()
+            self.poblacion = _generacion(self.poblacion, seleccionar, cruzar_, c["padres_a_tomar"],
+                                         c["elite"], c["prob_mutacion"], self.rnd)
+            estadisticas = self.evaluador.tomar_estadisticas()
+            estadisticas["tiempo_generacion"] = time.perf_counter() - t0
+            i = self.poblacion.mejor()
+            self.historial.append((self.poblacion.genomas[i], self.poblacion.puntajes[i], estadisticas))
+
+    def emigrantes(self):
+        p = self.poblacion
+        return [(p.genomas[i], p.puntajes[i]) for i in p.mejores(self.config["migrantes"])]
+
+    def recibir(self, llegados):
+        # los que llegan (ya con su puntaje) reemplazan a los peores de la isla
+        p = self.poblacion
+        peores = heapq.nsmallest(len(llegados), range(len(p)), key=p.puntajes.__getitem__)
+        for i, (genoma, puntaje) in zip(peores, llegados):
+            p.genomas[i] = genoma
+            p.puntajes[i] = puntaje
+
+
+# cada casilla del bloque compartido: 1 byte de tipo + 8 del puntaje + los bytes del genoma
+def _tamano_casilla(config):
+    return 9 + (config["longitud"] + 7) // 8
+
+
+def _escribir_migrantes(buf, k, migrantes, config):
+    tam = _tamano_casilla(config)
+    base = k * config["migrantes"] * tam
+    for genoma, puntaje in migrantes:
+        if isinstance(puntaje, int):
+            struct.pack_into("<cq", buf, base, b"i", puntaje)
+        else:
+            struct.pack_into("<cd", buf, base, b"d", puntaje)
+        buf[base + 9:base + tam] = genoma.to_bytes(tam - 9, "little")
+        base += tam
+
+
+def _leer_migrantes(buf, k, config):
+    tam = _tamano_casilla(config)
+    base = k * config["migrantes"] * tam
+    migrantes = []
+    for _ in range(config["migrantes"]):
+        tipo = bytes(buf[base:base + 1])
+        puntaje = struct.unpack_from("<q" if tipo == b"i" else "<d", buf, base + 1)[0]
+        migrantes.append((int.from_bytes(buf[base + 9:base + tam], "little"), puntaje))
+        base += tam
+    return migrantes
+
+
+_BARRERA_DEL_PROCESO = None
+
+
+def _iniciar_proceso_islas(barrera):
+    # se llama una vez al arrancar cada proceso (la barrera no se puede mandar con submit)
+    global _BARRERA_DEL_PROCESO
+    _BARRERA_DEL_PROCESO = barrera
+
+
+def _correr_islas_en_proceso(indices, config, nombre):
+    # dentro de un proceso hijo: se pega a la memoria compartida solo mientras corre
+    # y la suelta al terminar, aunque truene
+    memoria = shared_memory.SharedMemory(name=nombre)
+    try:
+        return _correr_islas(indices, config, memoria.buf, _BARRERA_DEL_PROCESO)
+    finally:
+        memoria.close()
+
+
+def _correr_islas(indices, config, buf, barrera=None):
+    # corre las islas `indices` completas; sin procesos se le pasa un bytearray
+    # y ninguna barrera
+    try:
+        return _correr_islas_sin_avisar(indices, config, buf, barrera)
+    except BaseException:
+        # si algo truena en este proceso, los demas estarian esperando en la barrera
+        # para siempre: se rompe la barrera para que tambien paren (con BrokenBarrierError)
+        if barrera is not None:
+            barrera.abort()
+        raise
+
+
+def _correr_islas_sin_avisar(indices, config, buf, barrera):
+    islas = [_Isla(k, config) for k in indices]
+    hechas = 0
+    while hechas < config["generaciones"]:
+        bloque = min(config["intervalo"], config["generaciones"] - hechas)
+        for isla in islas:
+            isla.avanzar(bloque)
+        hechas += bloque
+        if hechas == config["generaciones"] or config["islas"] == 1:
+            continue
+        # migracion: todos escriben, todos esperan, todos leen, todos esperan
+        # (la segunda espera es para que nadie escriba encima antes de que los demas lean)
+        for isla in islas:
+            _escribir_migrantes(buf, isla.k, isla.emigrantes(), config)
+        if barrera is not None:
+            barrera.wait()
+        llegados = {isla.k: [m for j in fuentes_migracion(isla.k, config["islas"], config["topologia"])
+                             for m in _leer_migrantes(buf, j, config)]
+                    for isla in islas}
+        if barrera is not None:
+            barrera.wait()
+        for isla in islas:
+            isla.recibir(llegados[isla.k])
+    finales = [(isla.poblacion.genomas[i], isla.poblacion.puntajes[i])
+               for isla in islas for i in [isla.poblacion.mejor()]]
+    return [(isla.k, isla.historial, final) for isla, final in zip(islas, finales)]
+
+
+def algoritmo_genetico_islas(tam_poblacion, longitud_individuo, generaciones, prob_mutacion,
+                             padres_a_tomar, islas=4, intervalo=10, migrantes=2,
+                             topologia="anillo", procesos=None, puntaje_bits=None, semilla=0,
+                             seleccion="truncamiento", cruce="un_punto", elite=None,
+                             espera_max=600):
+    # islas:     cuantas poblaciones; tam_poblacion y padres_a_tomar son POR isla
+    # intervalo: cada cuantas generaciones se migra
+    # migrantes: cuantos de los mejores manda cada isla
+    # topologia: "anillo" o "completa" (ver fuentes_migracion)
+    # procesos:  cuantos procesos (None = uno por isla hasta los nucleos que haya,
+    #            1 = todo en este proceso); el resultado no depende de esto
+    # puntaje_bits, seleccion, cruce, elite: como en algoritmo_genetico_bits; con procesos
+    #            las funciones tienen que estar definidas hasta arriba de un modulo
+    #            (para poder mandarlas)
+    # espera_max: segundos que un proceso espera a los demas en una migracion; si uno
+    #            truena los demas paran enseguida, esto es por si uno se queda colgado
+    # regresa igual que algoritmo_genetico: (mejor, su puntaje, historial_mejor)
+    # donde historial_mejor tiene el mejor de todas las islas en cada generacion
+    if topologia not in TOPOLOGIAS:
+        raise ValueError(f"topologia desconocida: {topologia!r} (opciones: {list(TOPOLOGIAS)})")
+    config = {
+        "tam_poblacion": tam_poblacion, "longitud": longitud_individuo,
+        "generaciones": generaciones, "prob_mutacion": prob_mutacion,
+        "padres_a_tomar": padres_a_tomar, "islas": islas, "intervalo": max(1, intervalo),
+        "migrantes": min(migrantes, tam_poblacion), "topologia": topologia,
+        "puntaje_bits": puntaje_bits, "semilla": semilla,
+        "seleccion": seleccion, "cruce": cruce, "elite": elite,
+    }
+    operador(SELECCIONES, seleccion)  # para que un nombre mal escrito falle aqui y no en los hijos
+    operador(CRUCES, cruce)
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    procesos = max(1, min(procesos, islas))
+    tamano = max(1, islas * config["migrantes"] * _tamano_casilla(config))
+    grupos = [list(range(w, islas, procesos)) for w in range(procesos)]
+
+    if procesos == 1:
+        resultados = _correr_islas(grupos[0], config, bytearray(tamano))
+    else:
+        memoria = shared_memory.SharedMemory(create=True, size=tamano)
+        try:
+            barrera = multiprocessing.get_context().Barrier(procesos, timeout=espera_max)
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso_islas,
+                                     initargs=(barrera,)) as ex:
+                # cada proceso corre su grupo de islas completo; se esperan entre ellos
+                # con la barrera en cada migracion
+                futuros = [ex.submit(_correr_islas_en_proceso, grupo, config, memoria.name)
+                           for grupo in grupos]
+                wait(futuros)
+            # si alguno fallo, el error que importa es el suyo y no el BrokenBarrierError
+            # de los que se quedaron esperando
+            errores = [f.exception() for f in futuros if f.exception() is not None]
+            if errores:
+                raise next((e for e in errores if not isinstance(e, BrokenBarrierError)),
+                           errores[0])
+            resultados = [r for f in futuros for r in f.result()]
+        finally:
+            memoria.close()
+            memoria.unlink()
+
+    resultados.sort(key=lambda r: r[0])
+    historial_mejor = []
+    for g in range(generaciones):
+        genoma, puntaje, _ = max((h[g] for _, h, _ in resultados), key=lambda r: r[1])
+        # estadisticas de todas las islas juntas; el tiempo es el de la isla mas lenta
+        estadisticas = {"evaluaciones": 0, "aciertos": 0, "tiempo": 0.0, "tiempo_generacion": 0.0}
+        for _, h, _ in resultados:
+            for llave, valor in h[g][2].items():
+                if llave.startswith("tiempo"):
+                    estadisticas[llave] = max(estadisticas[llave], valor)
+                else:
+                    estadisticas[llave] += valor
+        historial_mejor.append(GeneracionHistorial(a_lista(genoma, longitud_individuo), puntaje,
+                                                   estadisticas))
+    mejor, puntaje = max((final for _, _, final in resultados), key=lambda r: r[1])
+    return a_lista(mejor, longitud_individuo), puntaje, historial_mejor
+
+
+def puntaje_costoso(genoma):
+    # simula una evaluacion cara (una simulacion, por ejemplo): da muchas vueltas
+    # y al final regresa la misma cuenta de unos
+    x = genoma
+    for _ in range(200):
+        x = (x ^ (x >> 7)) | genoma
+    return (x & genoma).bit_count()
+
+
+def benchmark_islas(islas=4, tam_isla=100, longitud=2000, generaciones=30, intervalo=5):
+    # serial (algoritmo_genetico de bits con toda la poblacion junta) contra islas
+    # con 1, 2, ... procesos; el puntaje es caro para que valga la pena repartir
+    nucleos = os.cpu_count() or 1
+    print(f"{islas} islas de {tam_isla}, {longitud} genes, {generaciones} generaciones, "
+          f"migracion cada {intervalo} ({nucleos} nucleos en esta maquina)")
+    t0 = time.perf_counter()
+    _, mejor, _ = algoritmo_genetico_bits(islas * tam_isla, longitud, generaciones, 1 / longitud,
+                                          islas * 10, puntaje_costoso, semilla=0)
+    t_serial = time.perf_counter() - t0
+    print(f"serial (una poblacion de {islas * tam_isla}): {t_serial:.2f} s, mejor {mejor}")
+    referencia = None
+    for topologia in TOPOLOGIAS:
+        for procesos in sorted({1, 2, islas}):
+            t0 = time.perf_counter()
+            resultado = algoritmo_genetico_islas(tam_isla, longitud, generaciones, 1 / longitud, 10,
+                                                 islas=islas, intervalo=intervalo,
+                                                 topologia=topologia, procesos=procesos,
+                                                 puntaje_bits=puntaje_costoso, semilla=0)
+            t = time.perf_counter() - t0
+            if procesos == 1:
+                referencia = resultado
+            # misma semilla, mismo resultado, sin importar los procesos
+            assert resultado == referencia
+            print(f"islas {topologia:<8} procesos={procesos}: {t:.2f} s "
+                  f"(x{t_serial / t:.2f} contra serial), mejor {resultado[1]}")
+
+
 if __name__ == "__main__":
     # aqui decimos como queremos correr el algoritmo genetico
 
@@ -151,4 +893,39 @@ if __name__ == "__main__":
     # seleccionar_padres()  elige las mejores soluciones
     # cruzar()              mezcla dos soluciones para hacer una nueva
     # mutar()               cambia un poco la nueva solucion
-    # algoritmo_genetico()  repite esto varias veces y se queda con lo mejor
\ No newline at end of file
+    # algoritmo_genetico()  repite esto varias veces y se queda con lo mejor
+
+    # lo mismo con el motor de bits (y con semilla, para que salga igual cada vez)
+    mejor, score, _ = algoritmo_genetico(tam_poblacion, longitud_individuo, generaciones,
+                                         prob_mutacion, padres_a_tomar, motor="bits", semilla=1)
+    print("\nmotor de bits:", mejor, "puntaje:", score)
+
+    # 3 islas en anillo, migrando cada 5 generaciones
+    mejor, score, _ = algoritmo_genetico_islas(tam_poblacion, 12, generaciones, prob_mutacion,
+                                               padres_a_tomar, islas=3, intervalo=5, procesos=1)
+    print("islas:", mejor, "puntaje:", score)
+
+    # otros operadores: torneo para escoger padres, cruce uniforme, solo 1 de elite
+    mejor, score, _ = algoritmo_genetico(tam_poblacion, 12, generaciones, prob_mutacion, 4,
+                                         motor="bits", semilla=1, seleccion="torneo",
+                                         cruce="uniforme", elite=1)
+    print("torneo + uniforme:", mejor, "puntaje:", score)
+
+    # con un EvaluadorCacheado cada entrada del historial trae lo que costo evaluar esa generacion
+    _, _, historial = algoritmo_genetico(tam_poblacion, longitud_individuo, 3, prob_mutacion,
+                                         padres_a_tomar, motor="bits", semilla=1,
+                                         evaluador=EvaluadorCacheado())
+    for gen_idx, (ind, sc) in enumerate(historial):
+        e = historial[gen_idx].estadisticas
+        print(" gen", gen_idx, "->", ind, "puntaje:", sc, "evaluaciones:", e["evaluaciones"],
+              "aciertos de cache:", e["aciertos"])
+
+    if "--bench" in sys.argv:
+        print()
+        benchmark()
+        print()
+        benchmark_operadores()
+        print()
+        benchmark_evaluador()
+        print()
+        benchmark_islas()
\ No newline at end of file
@@ -3,6 +3,31 @@
 # por ejemplo: el agente solo conoce donde esta y que vecinos tiene.
 # cuando se mueve a otro lugar, descubre mas vecinos y los guarda.
 # sirve como un mapa es desconocido y lo vas explorando al momento.
+#
+# PlanificadorDLite (d* lite): cuando el mapa si se conoce pero los costos cambian
+# (calles cerradas, trafico), en lugar de correr a* otra vez desde cero
+# guarda sus tablas g / rhs entre cambios y solo arregla la parte afectada
+#
+# busqueda_lrta (lrta*): el agente no conoce el mapa, pero en lugar de irse al primer
+# vecino que no ha visto, escoge el que parece mas barato segun una tabla de
+# heuristicas que va aprendiendo; la tabla se puede guardar en disco para que
+# el siguiente intento en el mismo mundo llegue mas rapido
+
+import heapq
+import json
+import math
+import os
+import random
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# cargar_scripts vive en la carpeta de busqueda no informada, igual que en 10
+sys.path.append(str(Path(__file__).resolve().parent.parent / "0.1Busqueda_no_informada"))
+
+from capa_heuristica import Heuristica, como_heuristica  # diccionario, funcion o Heuristica
+from cargar_scripts import INFORMADA, cargar_script  # los scripts numerados no se importan normal
 
 def paso_online(actual, mundo_real, memoria_local, visitados):
     """
@@ -95,6 +120,471 @@ def busqueda_online(inicio, objetivo, mundo_real, max_pasos):
     # si llegue al limite de pasos y no encontre el objetivo
     return camino_recorrido, memoria_local, False
 
+def _vecinos_con_costo(grafo, nodo):
+    # acepta {nodo: [vecinos]} (cada paso cuesta 1) o {nodo: {vecino: costo}}
+    vecinos = grafo.get(nodo, ())
+    if isinstance(vecinos, dict):
+        return list(vecinos.items())
+    return [(v, 1) for v in vecinos]
+
+
+def _a_tupla(x):
+    # json convierte las tuplas en listas; de regreso las vuelvo tuplas para usarlas de llave
+    return tuple(_a_tupla(y) for y in x) if isinstance(x, list) else x
+
+
+def guardar_tabla(tabla, objetivo, ruta):
+    # guarda la tabla aprendida como json; se escribe en otro archivo y luego se
+    # reemplaza, asi si el programa se cae a la mitad no queda un archivo roto
+    datos = {"version": 1, "objetivo": objetivo, "valores": [[n, h] for n, h in tabla.items()]}
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo)
+    os.replace(temporal, ruta)
+
+
+def cargar_tabla(objetivo, ruta):
+    # regresa la tabla guardada, o {} si todavia no existe el archivo
+    # la tabla solo sirve para el mismo objetivo con que se aprendio
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as archivo:
+        datos = json.load(archivo)
+    if datos.get("version") != 1:
+        raise ValueError(f"{ruta}: version de tabla desconocida {datos.get('version')!r}")
+    if _a_tupla(datos["objetivo"]) != objetivo:
+        raise ValueError(f"{ruta}: la tabla es para el objetivo {datos['objetivo']!r}, no {objetivo!r}")
+    return {_a_tupla(n): h for n, h in datos["valores"]}
+
+
+def busqueda_lrta(inicio, objetivo, mundo_real, max_pasos, heuristica=None, profundidad=1,
+                  tabla=None, ruta_tabla=None, tiempo_paso=None, estadisticas=None):
+    """
+    lrta* (learning real-time a*)
+    en cada paso:
+      1. veo los vecinos de donde estoy (igual que paso_online)
+      2. para cada vecino calculo costo del paso + lo que creo que falta desde ahi,
+         mirando hasta `profundidad` pasos adelante con lo que ya conozco del mapa
+      3. aprendo: lo que falta desde aqui es por lo menos el mejor de esos valores
+      4. me muevo al vecino con el mejor valor
+    si un lugar no lleva a nada, su valor sube y el agente deja de querer ir ahi,
+    asi que no se queda atorado en callejones como busqueda_online
+
+    mundo_real:   {nodo: [vecinos]} como arriba, o {nodo: {vecino: costo}}
+    heuristica:   estimacion inicial (diccionario, funcion o Heuristica); None = 0
+    profundidad:  cuantos pasos mirar adelante (1 = lrta* normal)
+    tabla:        diccionario nodo -> valor aprendido; se actualiza aqui mismo
+    ruta_tabla:   archivo json para cargar la tabla al empezar y guardarla al terminar
+    tiempo_paso:  segundos maximos para pensar cada paso; si se acaba el tiempo se
+                  usa la ultima profundidad que si se alcanzo a terminar
+                  (la profundidad 1 siempre se termina)
+    estadisticas: diccionario opcional con pasos, costo, actualizaciones,
+                  profundidad_promedio, tiempo_promedio_paso y peor_tiempo_paso
+
+    regresa lo mismo que busqueda_online: camino_recorrido, memoria_local, exito
+    """
+    if tabla is None:
+        tabla = {}
+    if ruta_tabla is not None:
+        tabla.update(cargar_tabla(objetivo, ruta_tabla))
+    inicial = como_heuristica(heuristica) if heuristica is not None else None
+    reloj = time.perf_counter
+
+    def h(nodo):
+        valor = tabla.get(nodo)
+        if valor is None:
+            if nodo == objetivo or inicial is None:
+                return 0
+            valor = inicial.get(nodo, 0)
+        return valor
+
+    def mirar(nodo, pasos, limite):
+        # mejor costo estimado desde nodo viendo `pasos` pasos adelante en lo que ya conozco
+        # regresa None si se acabo el tiempo
+        if nodo == objetivo:
+            return 0
+        if pasos == 0 or nodo not in memoria_local:
+            return h(nodo)
+        if limite is not None and reloj() > limite:
+            return None
+        mejor = math.inf
+        for v, c in _vecinos_con_costo(memoria_local, nodo):
+            valor = mirar(v, pasos - 1, limite)
+            if valor is None:
+                return None
+            mejor = min(mejor, c + valor)
+        # lo que se vio adelante tambien se aprende (nunca se pasa, es un minimo
+        # de costo real + estimacion que no se pasa)
+        if mejor > h(nodo):
+            tabla[nodo] = mejor
+            return mejor
+        return h(nodo)
+
+    actual = inicio
+    camino_recorrido = [actual]
+    memoria_local = {}
+    costo = 0
+    actualizaciones = 0
+    suma_profundidad = 0
+    peor_tiempo = tiempo_total = 0.0
+    exito = False
+    try:
+        for _ in range(max_pasos):
+            if actual == objetivo:
+                exito = True
+                break
+            t0 = reloj()
+            limite = t0 + tiempo_paso if tiempo_paso is not None else None
+
+            vecinos = _vecinos_con_costo(mundo_real, actual)
+            memoria_local[actual] = dict(vecinos) if isinstance(mundo_real.get(actual), dict) \
+                else [v for v, _ in vecinos]
+            if not vecinos:
+                # callejon sin salida: aqui ya no se puede hacer nada
+                tabla[actual] = math.inf
+                break
+
+            # profundidad 1 siempre; luego mas profundo mientras alcance el tiempo
+            valores = [c + h(v) for v, c in vecinos]
+            alcanzada = 1
+            for p in range(2, profundidad + 1):
+                intento = []
+                for v, c in vecinos:
+                    valor = mirar(v, p - 1, limite)
+                    if valor is None:
+                        break
+                    intento.append(c + valor)
+                else:
+                    valores, alcanzada = intento, p
+                    continue
+                break
+
+            i = min(range(len(valores)), key=valores.__getitem__)
+            if valores[i] > h(actual):
+                tabla[actual] = valores[i]
+                actualizaciones += 1
+            suma_profundidad += alcanzada
+            tardo = reloj() - t0
+            tiempo_total += tardo
+            peor_tiempo = max(peor_tiempo, tardo)
+
+            siguiente, paso = vecinos[i]
+            costo += paso
+            actual = siguiente
+            camino_recorrido.append(actual)
+        else:
+            exito = actual == objetivo
+    finally:
+        if ruta_tabla is not None:
+            guardar_tabla(tabla, objetivo, ruta_tabla)
+        if estadisticas is not None:
+            pasos = len(camino_recorrido) - 1
+            estadisticas.update(
+                pasos=pasos,
+                costo=costo,
+                actualizaciones=actualizaciones,
+                profundidad_promedio=suma_profundidad / pasos if pasos else 0,
+                peor_tiempo_paso=peor_tiempo,
+                tiempo_promedio_paso=tiempo_total / pasos if pasos else 0,
+            )
+    return camino_recorrido, memoria_local, exito
+
+
+def _revisar_costo(u, v, costo):
+    if not costo > 0:
+        raise ValueError(f"d* lite necesita costos positivos: {u!r} -> {v!r} cuesta {costo!r}")
+
+
+class PlanificadorDLite:
+    """
+    d* lite (koenig y likhachev): busca hacia atras, del objetivo al inicio
+    g[s]:   costo de s al objetivo que ya se confirmo
+    rhs[s]: costo de s al objetivo viendo un paso adelante (min de c(s, s') + g[s'])
+    si g[s] == rhs[s] el nodo es "consistente"; solo los inconsistentes van a la cola
+    cuando cambia un costo solo se vuelven inconsistentes los nodos cercanos al cambio,
+    y la busqueda se detiene en cuanto el inicio vuelve a ser consistente
+
+    grafo_costos: {nodo: {vecino: costo}} igual que en a_estrella (se copia, no se modifica);
+                  los costos tienen que ser positivos (> 0), con 0 o negativos las claves
+                  de la cola dejan de ser cotas y el replaneo puede dar caminos malos
+                  (ValueError si no)
+    heuristica:   funcion h(a, b) que estima el costo de a hasta b sin pasarse;
+                  None = 0 para todo (sigue siendo correcto, solo revisa mas nodos)
+
+    uso:
+        plan = PlanificadorDLite(grafo, inicio, objetivo, heuristica)
+        camino, costo = plan.planear()
+        plan.mover(camino[1])                          # el agente avanza
+        camino, costo = plan.actualizar([(u, v, 7)])   # cambian costos (None = se cerro)
+    """
+
+    def __init__(self, grafo_costos, inicio, objetivo, heuristica=None):
+        self.sucesores = {}
+        self.predecesores = {}
+        for u, vecinos in grafo_costos.items():
+            self.sucesores.setdefault(u, {})
+            for v, costo in vecinos.items():
+                _revisar_costo(u, v, costo)
+                self.sucesores[u][v] = costo
+                self.sucesores.setdefault(v, {})
+                self.predecesores.setdefault(v, {})[u] = costo
+        self.h = heuristica or (lambda a, b: 0)
+        self.inicio = self.ultimo = inicio
+        self.objetivo = objetivo
+        self.km = 0  # cuanto se ha movido el inicio (para no tener que reordenar la cola)
+        self.g = {}
+        self.rhs = {objetivo: 0}
+        self.cola = []
+        self.en_cola = {}  # nodo -> clave vigente (las entradas viejas del heap se ignoran)
+        self.estadisticas = {"expandidos": 0, "planeaciones": 0, "cambios": 0}
+        self._poner(objetivo)
+
+    def _clave(self, s):
+        m = min(self.g.get(s, math.inf), self.rhs.get(s, math.inf))
+        return (m + self.h(self.inicio, s) + self.km, m)
+
+    def _poner(self, s):
+        clave = self._clave(s)
+        self.en_cola[s] = clave
+        heapq.heappush(self.cola, (clave, s))
+
+    def _tope(self):
+        # quita del heap las entradas viejas y regresa (clave, nodo) del primero vigente
+        # (no lo saca; _calcular lo saca cuando de verdad lo va a usar)
+        cola, en_cola = self.cola, self.en_cola
+        while cola:
+            clave, s = cola[0]
+            if en_cola.get(s) == clave:
+                return clave, s
+            heapq.heappop(cola)
+        return (math.inf, math.inf), None
+
+    def _actualizar_nodo(self, s):
+        if self.g.get(s, math.inf) != self.rhs.get(s, math.inf):
+            self._poner(s)
+        else:
+            self.en_cola.pop(s, None)
+
+    def _mejor_rhs(self, s):
+        g = self.g
+        return min((c + g.get(v, math.inf) for v, c in self.sucesores[s].items()), default=math.inf)
+
+    def _calcular(self):
+        g, rhs = self.g, self.rhs
+        inf = math.inf
+        expandidos = 0
+        while True:
+            clave_vieja, u = self._tope()
+            if u is None:
+                break
+            inicio = self.inicio
+            if clave_vieja >= self._clave(inicio) and rhs.get(inicio, inf) <= g.get(inicio, inf):
+                break
+            heapq.heappop(self.cola)
+            clave_nueva = self._clave(u)
+            if clave_vieja < clave_nueva:
+                # la clave se calculo con un km viejo, se vuelve a formar
+                self._poner(u)
+                continue
+            expandidos += 1
+            g_u = g.get(u, inf)
+            if g_u > rhs.get(u, inf):
+                # bajo el costo: se confirma y se avisa a los predecesores
+                g[u] = g_u = rhs[u]
+                del self.en_cola[u]
+                for s, c in self.predecesores.get(u, {}).items():
+                    if s != self.objetivo and c + g_u < rhs.get(s, inf):
+                        rhs[s] = c + g_u
+                        self._actualizar_nodo(s)
+            else:
+                # subio el costo: se olvida g[u] y se recalcula a quien dependia de u
+                g[u] = inf
+                for s, c in list(self.predecesores.get(u, {}).items()) + [(u, None)]:
+                    if s != self.objetivo and (s == u or rhs.get(s, inf) == c + g_u):
+                        rhs[s] = self._mejor_rhs(s)
+                    self._actualizar_nodo(s)
+        self.estadisticas["expandidos"] += expandidos
+        self.estadisticas["planeaciones"] += 1
+
+    def planear(self):
+        # regresa (camino, costo) del inicio actual al objetivo, o (None, None)
+        self._calcular()
+        costo = self.rhs.get(self.inicio, math.inf)
+        if costo == math.inf:
+            return None, None
+        camino = [self.inicio]
+        g = self.g
+        while camino[-1] != self.objetivo and len(camino) <= len(self.sucesores):
+            s = camino[-1]
+            camino.append(min(self.sucesores[s].items(),
+                              key=lambda par: par[1] + g.get(par[0], math.inf))[0])
+        return camino, costo
+
+    def mover(self, nuevo_inicio):
+        # el agente avanzo; km guarda cuanto bajaron las heuristicas para no reordenar la cola
+        self.km += self.h(self.ultimo, nuevo_inicio)
+        self.inicio = self.ultimo = nuevo_inicio
+
+    def actualizar(self, cambios):
+        # cambios: lista de (u, v, costo_nuevo); costo_nuevo None = la arista ya no existe
+        # se aplican todos y luego se replanea una sola vez
+        # (se revisan antes de tocar nada, para no quedar a medias si uno esta mal)
+        for u, v, costo in cambios:
+            if costo is not None:
+                _revisar_costo(u, v, costo)
+        rhs, g = self.rhs, self.g
+        inf = math.inf
+        for u, v, costo in cambios:
+            costo = inf if costo is None else costo
+            viejo = self.sucesores.setdefault(u, {}).get(v, inf)
+            self.sucesores.setdefault(v, {})
+            if costo == viejo:
+                continue
+            if costo == inf:
+                del self.sucesores[u][v]
+                del self.predecesores[v][u]
+            else:
+                self.sucesores[u][v] = costo
+                self.predecesores.setdefault(v, {})[u] = costo
+            self.estadisticas["cambios"] += 1
+            if u == self.objetivo:
+                continue
+            if costo < viejo:
+                if costo + g.get(v, inf) < rhs.get(u, inf):
+                    rhs[u] = costo + g.get(v, inf)
+            elif rhs.get(u, inf) == viejo + g.get(v, inf):
+                rhs[u] = self._mejor_rhs(u)
+            self._actualizar_nodo(u)
+        return self.planear()
+
+
+def benchmark_dlite(lado=100, rondas=30, por_ronda=5, vista=10, semilla=0):
+    # un agente cruza una rejilla tipo calles; en cada ronda avanza un paso y ve
+    # cambios de costo (cierres y trafico) en por_ronda cruces de los siguientes
+    # `vista` lugares de su camino
+    # d* lite arregla su plan contra correr a_estrella desde cero cada vez
+    a_y_ao = cargar_script("10.Busquedas_A_y_AO.py", INFORMADA)
+    ucs = cargar_script("02.Busqueda_en_anchura_de_costo_uniforme.py")
+    grafo = ucs.grafo_rejilla_con_pesos(lado, semilla)
+    rnd = random.Random(semilla)
+    inicio, objetivo = (0, 0), (lado - 1, lado - 1)
+
+    def manhattan(a, b):  # los costos son de 1 a 10, asi que nunca se pasa
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    # la misma Heuristica (con su cache) para todas las corridas de a_estrella
+    h_objetivo = Heuristica(lambda v: manhattan(v, objetivo))
+
+    t0 = time.perf_counter()
+    plan = PlanificadorDLite(grafo, inicio, objetivo, manhattan)
+    camino, costo = plan.planear()
+    t_primera = time.perf_counter() - t0
+    expandidos_primera = plan.estadisticas["expandidos"]
+
+    t_dlite = t_a = 0
+    expandidos_a = 0
+    actual = inicio
+    for _ in range(rondas):
+        if camino is None or len(camino) < 2:
+            break
+        actual = camino[1]
+        plan.mover(actual)
+        cambios = []
+        cerca = camino[1:vista + 1]
+        for u in rnd.sample(cerca, min(por_ronda, len(cerca))):
+            for v in list(grafo[u]):
+                if rnd.random() < 0.3:
+                    nuevo = None if rnd.random() < 0.2 else rnd.randint(1, 30)
+                    cambios.append((u, v, nuevo))
+                    cambios.append((v, u, nuevo))
+        for u, v, nuevo in cambios:
+            if nuevo is None:
+                grafo[u].pop(v, None)
+            else:
+                grafo[u][v] = nuevo
+
+        t0 = time.perf_counter()
+        camino, costo = plan.actualizar(cambios)
+        t_dlite += time.perf_counter() - t0
+
+        est = {}
+        t0 = time.perf_counter()
+        _, costo_a = a_y_ao.a_estrella(grafo, h_objetivo, actual, objetivo,
+                                       estadisticas=est)
+        t_a += time.perf_counter() - t0
+        expandidos_a += est.get("expandidos", 0)
+        assert costo == costo_a, (costo, costo_a)
+
+    expandidos_dlite = plan.estadisticas["expandidos"] - expandidos_primera
+    print(f"rejilla {lado}x{lado}, {rondas} rondas con cambios en {por_ronda} cruces cerca del agente")
+    print(f"  plan inicial d* lite: {t_primera:.3f} s, {expandidos_primera:,} expandidos")
+    print(f"  replanear d* lite:    {t_dlite:.3f} s, {expandidos_dlite:,} expandidos")
+    print(f"  a* desde cero:        {t_a:.3f} s, {expandidos_a:,} expandidos")
+
+
+def benchmark_lrta(lado=40, intentos=20, profundidades=(1, 3, 8), tiempo_paso=0.0005, semilla=1):
+    # laberinto de rejilla (4 vecinos) con obstaculos; el agente no lo conoce
+    # (el peor tiempo por paso puede pasarse un poco de tiempo_paso por pausas del sistema)
+    # busqueda_online (primer vecino sin visitar) contra lrta* con la tabla guardada
+    # en disco entre intentos: cada intento deberia tardar menos pasos que el anterior
+    import busqueda_rejilla
+    rejilla = busqueda_rejilla.rejilla_con_obstaculos(lado, ocupado=0.3, semilla=semilla)
+    mundo = {}
+    for f in range(lado):
+        for c in range(lado):
+            if rejilla.libre((f, c)):
+                mundo[(f, c)] = [v for v in ((f - 1, c), (f + 1, c), (f, c - 1), (f, c + 1))
+                                 if rejilla.libre(v)]
+    # inicio en el primer lugar de la zona conectada mas grande;
+    # objetivo en el lugar alcanzable mas lejano (en pasos)
+    zona = {}
+    for semilla_zona in mundo:
+        if semilla_zona in zona:
+            continue
+        zona[semilla_zona] = semilla_zona
+        pendientes = [semilla_zona]
+        for u in pendientes:
+            for v in mundo[u]:
+                if v not in zona:
+                    zona[v] = semilla_zona
+                    pendientes.append(v)
+    tamanos = {}
+    for raiz in zona.values():
+        tamanos[raiz] = tamanos.get(raiz, 0) + 1
+    inicio = max(tamanos, key=tamanos.get)
+    distancia = {inicio: 0}
+    pendientes = [inicio]
+    for u in pendientes:
+        for v in mundo[u]:
+            if v not in distancia:
+                distancia[v] = distancia[u] + 1
+                pendientes.append(v)
+    objetivo = max(distancia, key=distancia.get)
+
+    def manhattan(v):
+        return abs(v[0] - objetivo[0]) + abs(v[1] - objetivo[1])
+
+    camino, _, exito = busqueda_online(inicio, objetivo, mundo, 100_000)
+    print(f"laberinto {lado}x{lado}, camino mas corto {distancia[objetivo]} pasos; "
+          f"busqueda_online: {len(camino) - 1} pasos, llego={exito}")
+    print("profundidad  pasos en cada intento (la tabla se guarda entre intentos)"
+          "                 prof. alcanzada  ms/paso  peor ms/paso")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for profundidad in profundidades:
+            ruta = os.path.join(carpeta, f"tabla_{profundidad}.json")
+            pasos, alcanzada, promedio, peor = [], 0, 0, 0
+            for _ in range(intentos):
+                est = {}
+                _, _, exito = busqueda_lrta(inicio, objetivo, mundo, 100_000, manhattan,
+                                            profundidad=profundidad, ruta_tabla=ruta,
+                                            tiempo_paso=tiempo_paso, estadisticas=est)
+                pasos.append(est["pasos"] if exito else None)
+                alcanzada += est["profundidad_promedio"] / intentos
+                promedio += est["tiempo_promedio_paso"] / intentos
+                peor = max(peor, est["peor_tiempo_paso"])
+            print(f"{profundidad:>11}  {' '.join(map(str, pasos)):<72} {alcanzada:>15.2f}  {promedio * 1000:>7.3f}  {peor * 1000:>12.2f}")
+
+
 if __name__ == "__main__":
     # mundo_real es el mapa verdadero
     # este grafo SI lo conoce el programa
@@ -131,4 +621,34 @@ if __name__ == "__main__":
 
     # - memoria_local guarda lo que el agente ha descubierto
     # - paso_online descubre vecinos del nodo actual
-    # - no planeamos todo desde el inicio, decidimos paso por paso
\ No newline at end of file
+    # - no planeamos todo desde el inicio, decidimos paso por paso
+
+    # d* lite: el mapa con costos se conoce, pero a medio camino se cierra una calle
+    calles = {
+        "A": {"B": 2, "C": 4},
+        "B": {"D": 2},
+        "C": {"D": 1, "E": 3},
+        "D": {"F": 3},
+        "E": {"F": 1},
+        "F": {},
+    }
+    plan = PlanificadorDLite(calles, "A", "F")
+    camino, costo = plan.planear()
+    print("\nd* lite, plan inicial:", camino, costo)
+    camino, costo = plan.actualizar([("B", "D", None)])
+    print("se cerro B->D:", camino, costo)
+    plan.mover("C")
+    camino, costo = plan.actualizar([("D", "F", None), ("C", "E", 2)])
+    print("ya en C, se cerro D->F y C->E bajo a 2:", camino, costo)
+    print("contadores:", plan.estadisticas)
+
+    # lrta*: en el mismo mapa de cuartos, pero aprendiendo una tabla de heuristicas
+    tabla = {}
+    camino, _, exito = busqueda_lrta("A", "F", mundo_real, 10, profundidad=2, tabla=tabla)
+    print("\nlrta*:", camino, "llego?:", exito, "aprendio:", tabla)
+
+    if "--bench" in sys.argv:
+        print()
+        benchmark_dlite()
+        print()
+        benchmark_lrta()
@@ -0,0 +1,491 @@
+# a* para rejillas (mapas de cuadritos libres / ocupados)
+# muchos mapas son rejillas donde uno se mueve a los 4 vecinos (arriba, abajo,
+# izquierda, derecha) o a los 8 (tambien en diagonal). convertirlas al formato
+# grafo_costos de a_estrella ({(fila, col): {vecino: costo}}) gasta muchisima
+# memoria y tiempo, asi que aqui se busca directo sobre la rejilla:
+# - la rejilla se guarda como un bytearray plano (0 = libre, 1 = ocupado)
+#   con una orilla de ocupados alrededor, asi nunca hay que revisar si me sali
+# - cada cuadrito es un numero i = fila * ancho + col
+# - con 8 vecinos se usa jump point search (jps): en lugar de meter a la cola
+#   cada cuadrito, se "salta" en linea recta o en diagonal hasta encontrar un
+#   punto donde de verdad hay que decidir (un obstaculo obliga a dar vuelta);
+#   solo esos puntos entran a la cola
+# - heuristica octil: max(df, dc) + (raiz(2) - 1) * min(df, dc)
+# - en diagonal solo se puede pasar si los dos cuadritos de los lados estan libres
+#   (no se cortan esquinas)
+#
+# la rejilla de entrada puede ser:
+#   - un arreglo de numpy de 2 dimensiones (bool o enteros, True / != 0 = ocupado)
+#   - una lista de filas (listas de 0/1 o True/False, o cadenas donde "#" es ocupado)
+#   - bytes / bytearray plano junto con ancho=
+# regresa (camino, costo) igual que a_estrella: camino con todos los cuadritos
+# (fila, col) de inicio a objetivo, o (None, None) si no se puede llegar
+
+import heapq
+import math
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+from pathlib import Path
+
+# cargar_scripts vive en la carpeta de busqueda no informada, igual que en 10
+sys.path.append(str(Path(__file__).resolve().parent.parent / "0.1Busqueda_no_informada"))
+
+from cargar_scripts import INFORMADA, cargar_script  # el benchmark compara contra 10
+
+RAIZ2 = math.sqrt(2)
+
+
+class Rejilla:
+    def __init__(self, datos, ancho=None):
+        # guarda la rejilla con una orilla de ocupados: ancho + 2 columnas, alto + 2 filas
+        if hasattr(datos, "shape") and hasattr(datos, "tobytes"):
+            # arreglo de numpy: se copia por filas sin recorrer cuadrito por cuadrito
+            alto, ancho = datos.shape
+            filas = [bytes(fila != 0) if fila.dtype != bool else fila.tobytes()
+                     for fila in datos]
+        elif isinstance(datos, (bytes, bytearray, memoryview)):
+            if not ancho:
+                raise ValueError("con bytes hay que decir el ancho de la rejilla")
+            datos = bytes(datos)
+            if len(datos) % ancho:
+                raise ValueError(f"{len(datos)} bytes no se pueden partir en filas de {ancho}")
+            alto = len(datos) // ancho
+            filas = [datos[f * ancho:(f + 1) * ancho] for f in range(alto)]
+        else:
+            filas = []
+            for fila in datos:
+                if isinstance(fila, str):
+                    filas.append(bytes(1 if c == "#" else 0 for c in fila))
+                else:
+                    filas.append(bytes(1 if c else 0 for c in fila))
+            alto = len(filas)
+            ancho = len(filas[0]) if filas else 0
+            if any(len(fila) != ancho for fila in filas):
+                raise ValueError("todas las filas de la rejilla deben tener el mismo ancho")
+
+        self.alto, self.ancho = alto, ancho
+        self.w = w = ancho + 2
+        celdas = bytearray(b"\x01") * (w * (alto + 2))
+        for f, fila in enumerate(filas):
+            inicio = (f + 1) * w + 1
+            # cualquier valor distinto de 0 cuenta como ocupado
+            celdas[inicio:inicio + ancho] = fila.translate(_A_UNO)
+        self.celdas = celdas
+        self._transpuesta = None
+
+    @property
+    def transpuesta(self):
+        # la misma rejilla por columnas (con su orilla); jps la usa para que los saltos
+        # verticales tambien sean busquedas dentro de una sola "fila" de bytes
+        if self._transpuesta is None:
+            w, alto_total = self.w, self.alto + 2
+            t = bytearray(w * alto_total)
+            for c in range(w):
+                t[c * alto_total:(c + 1) * alto_total] = self.celdas[c::w]
+            self._transpuesta = t
+        return self._transpuesta
+
+    def indice(self, celda):
+        f, c = celda
+        return (f + 1) * self.w + (c + 1)
+
+    def celda(self, i):
+        f, c = divmod(i, self.w)
+        return f - 1, c - 1
+
+    def libre(self, celda):
+        f, c = celda
+        return 0 <= f < self.alto and 0 <= c < self.ancho and not self.celdas[self.indice(celda)]
+
+
+# tabla para bytes.translate: 0 se queda en 0, todo lo demas se vuelve 1
+_A_UNO = bytes([0] + [1] * 255)
+
+
+def a_estrella_rejilla(rejilla, inicio, objetivo, diagonales=True, saltos=True, estadisticas=None):
+    # rejilla: Rejilla o cualquier cosa que acepte Rejilla(...)
+    # inicio, objetivo: (fila, col)
+    # diagonales: True = 8 vecinos (costo raiz(2) en diagonal), False = 4 vecinos
+    # saltos: con 8 vecinos usa jump point search; False = a* normal cuadrito por cuadrito
+    # estadisticas: diccionario opcional con "expandidos" y "max_frontera"
+    if not isinstance(rejilla, Rejilla):
+        rejilla = Rejilla(rejilla)
+    if not (rejilla.libre(inicio) and rejilla.libre(objetivo)):
+        return None, None
+    if inicio == objetivo:
+        return [inicio], 0
+
+    s, t = rejilla.indice(inicio), rejilla.indice(objetivo)
+    contador = {"expandidos": 0, "max_frontera": 0}
+    try:
+        if diagonales and saltos:
+            puntos = _jps(rejilla, s, t, contador)
+        else:
+            puntos = _a_estrella_plano(rejilla, s, t, diagonales, contador)
+    finally:
+        if estadisticas is not None:
+            estadisticas.update(contador)
+    if puntos is None:
+        return None, None
+    return _armar_camino(rejilla, puntos)
+
+
+def _octil(w, t):
+    # heuristica octil hacia t para indices planos con ancho w
+    tf, tc = divmod(t, w)
+    extra = RAIZ2 - 1
+
+    def h(i):
+        df, dc = divmod(i, w)
+        df = abs(df - tf)
+        dc = abs(dc - tc)
+        return df + dc + extra * min(df, dc) - min(df, dc)
+    return h
+
+
+def _manhattan(w, t):
+    tf, tc = divmod(t, w)
+
+    def h(i):
+        f, c = divmod(i, w)
+        return abs(f - tf) + abs(c - tc)
+    return h
+
+
+def _a_estrella_plano(rejilla, s, t, diagonales, contador):
+    # a* de siempre pero con todo en arreglos planos indexados por cuadrito
+    celdas, w = rejilla.celdas, rejilla.w
+    n = len(celdas)
+    g = array("d", [math.inf]) * n
+    padres = array("i", [-1]) * n
+    cerrados = bytearray(n)
+    rectos = (1, -1, w, -w)
+    diagonales_ = ((1, w), (1, -w), (-1, w), (-1, -w)) if diagonales else ()
+    h = _octil(w, t) if diagonales else _manhattan(w, t)
+
+    g[s] = 0
+    abiertos = [(h(s), s)]
+    max_frontera = 1
+    while abiertos:
+        _, i = heapq.heappop(abiertos)
+        if cerrados[i]:
+            continue
+        if i == t:
+            break
+        cerrados[i] = 1
+        contador["expandidos"] += 1
+        gi = g[i]
+        for d in rectos:
+            j = i + d
+            if not celdas[j] and not cerrados[j] and gi + 1 < g[j]:
+                g[j] = gi + 1
+                padres[j] = i
+                heapq.heappush(abiertos, (gi + 1 + h(j), j))
+        for a, b in diagonales_:
+            j = i + a + b
+            # sin cortar esquinas: los dos de los lados tienen que estar libres
+            if (not celdas[j] and not celdas[i + a] and not celdas[i + b]
+                    and not cerrados[j] and gi + RAIZ2 < g[j]):
+                g[j] = gi + RAIZ2
+                padres[j] = i
+                heapq.heappush(abiertos, (gi + RAIZ2 + h(j), j))
+        if len(abiertos) > max_frontera:
+            max_frontera = len(abiertos)
+    contador["max_frontera"] = max_frontera
+    if padres[t] == -1:
+        return None
+    puntos = [t]
+    while puntos[-1] != s:
+        puntos.append(padres[puntos[-1]])
+    puntos.reverse()
+    return puntos
+
+
+def _jps(rejilla, s, t, contador):
+    celdas, w = rejilla.celdas, rejilla.w
+
+    alto_total = rejilla.alto + 2
+    transpuesta = rejilla.transpuesta
+    tf, tc = divmod(t, w)
+    t_transpuesto = tc * alto_total + tf
+
+    def recto(i, d, lado):
+        # salto en linea recta desde i; d es +-1 (horizontal) o +-w (vertical)
+        # regresa el punto de salto o -1 si choca con un obstaculo
+        if lado == w:
+            return _saltar_en_fila(celdas, w, i, d, t)
+        # los verticales se hacen en la transpuesta y se regresan a indices normales
+        f, c = divmod(i, w)
+        j = _saltar_en_fila(transpuesta, alto_total, c * alto_total + f, 1 if d > 0 else -1, t_transpuesto)
+        if j == -1:
+            return -1
+        c, f = divmod(j, alto_total)
+        return f * w + c
+
+    def diagonal(i, dc, df):
+        # df es +-w y dc es +-1; antes de cada paso los dos lados tienen que estar libres
+        while True:
+            if celdas[i + dc] or celdas[i + df]:
+                return -1
+            i += dc + df
+            if celdas[i]:
+                return -1
+            if i == t:
+                return i
+            if recto(i, dc, w) != -1 or recto(i, df, 1) != -1:
+                return i
+
+    def direcciones(i, padre):
+        # direcciones (dc, df) que vale la pena seguir desde i, segun de donde vengo
+        if padre == -1:
+            todas = []
+            for dc, df in ((1, 0), (-1, 0), (0, w), (0, -w)):
+                if not celdas[i + dc + df]:
+                    todas.append((dc, df))
+            for dc in (1, -1):
+                for df in (w, -w):
+                    if not celdas[i + dc] and not celdas[i + df] and not celdas[i + dc + df]:
+                        todas.append((dc, df))
+            return todas
+        fi, ci = divmod(i, w)
+        fp, cp = divmod(padre, w)
+        dc = (ci > cp) - (ci < cp)
+        df = ((fi > fp) - (fi < fp)) * w
+        salida = []
+        if dc and df:
+            libre_f = not celdas[i + df]
+            libre_c = not celdas[i + dc]
+            if libre_f:
+                salida.append((0, df))
+            if libre_c:
+                salida.append((dc, 0))
+            if libre_f and libre_c:
+                salida.append((dc, df))
+        elif dc:
+            sigue = not celdas[i + dc]
+            arriba = not celdas[i - w]
+            abajo = not celdas[i + w]
+            if sigue:
+                salida.append((dc, 0))
+                if arriba:
+                    salida.append((dc, -w))
+                if abajo:
+                    salida.append((dc, w))
+            if arriba:
+                salida.append((0, -w))
+            if abajo:
+                salida.append((0, w))
+        else:
+            sigue = not celdas[i + df]
+            izquierda = not celdas[i - 1]
+            derecha = not celdas[i + 1]
+            if sigue:
+                salida.append((0, df))
+                if izquierda:
+                    salida.append((-1, df))
+                if derecha:
+                    salida.append((1, df))
+            if izquierda:
+                salida.append((-1, 0))
+            if derecha:
+                salida.append((1, 0))
+        return salida
+
+    h = _octil(w, t)
+    # solo los puntos de salto se guardan, por eso aqui si alcanza con diccionarios
+    g = {s: 0}
+    padres = {s: -1}
+    cerrados = set()
+    abiertos = [(h(s), s)]
+    max_frontera = 1
+    while abiertos:
+        _, i = heapq.heappop(abiertos)
+        if i in cerrados:
+            continue
+        if i == t:
+            break
+        cerrados.add(i)
+        contador["expandidos"] += 1
+        gi = g[i]
+        for dc, df in direcciones(i, padres[i]):
+            if dc and df:
+                j = diagonal(i, dc, df)
+            elif dc:
+                j = recto(i, dc, w)
+            else:
+                j = recto(i, df, 1)
+            if j == -1 or j in cerrados:
+                continue
+            fi, ci = divmod(i, w)
+            fj, cj = divmod(j, w)
+            a, b = abs(fj - fi), abs(cj - ci)
+            nuevo_g = gi + max(a, b) + (RAIZ2 - 1) * min(a, b)
+            if nuevo_g < g.get(j, math.inf):
+                g[j] = nuevo_g
+                padres[j] = i
+                heapq.heappush(abiertos, (nuevo_g + h(j), j))
+        if len(abiertos) > max_frontera:
+            max_frontera = len(abiertos)
+    contador["max_frontera"] = max_frontera
+    if t not in padres:
+        return None
+    puntos = [t]
+    while puntos[-1] != s:
+        puntos.append(padres[puntos[-1]])
+    puntos.reverse()
+    return puntos
+
+
+def _saltar_en_fila(celdas, w, i, d, t):
+    # salto horizontal desde i hacia d (+1 o -1) en una rejilla plana de ancho w
+    # en lugar de revisar cuadrito por cuadrito se buscan con find los patrones que detienen el salto:
+    # - el primer obstaculo de la fila (ahi se acaba el tramo libre)
+    # - un vecino forzado: arriba (o abajo) pasa de ocupado a libre en la direccion en que voy
+    # - el objetivo, si esta dentro del tramo
+    if d == 1:
+        fin = celdas.find(1, i + 1)
+        mejor = t if i < t < fin else fin
+        k = celdas.find(b"\x01\x00", i - w, mejor - w)
+        if k != -1:
+            mejor = k + 1 + w
+        k = celdas.find(b"\x01\x00", i + w, mejor + w)
+        if k != -1:
+            mejor = k + 1 - w
+        return -1 if mejor == fin else mejor
+    inicio = celdas.rfind(1, 0, i)
+    mejor = t if inicio < t < i else inicio
+    k = celdas.rfind(b"\x00\x01", mejor + 1 - w, i + 1 - w)
+    if k != -1:
+        mejor = k + w
+    k = celdas.rfind(b"\x00\x01", mejor + 1 + w, i + 1 + w)
+    if k != -1:
+        mejor = k - w
+    return -1 if mejor == inicio else mejor
+
+
+def _armar_camino(rejilla, puntos):
+    # entre dos puntos de salto se camina en linea recta o diagonal, cuadrito por cuadrito
+    w = rejilla.w
+    camino = [rejilla.celda(puntos[0])]
+    rectos = diagonales = 0
+    for a, b in zip(puntos, puntos[1:]):
+        fa, ca = divmod(a, w)
+        fb, cb = divmod(b, w)
+        df = (fb > fa) - (fb < fa)
+        dc = (cb > ca) - (cb < ca)
+        while (fa, ca) != (fb, cb):
+            fa += df if fa != fb else 0
+            ca += dc if ca != cb else 0
+            camino.append((fa - 1, ca - 1))
+    for (f1, c1), (f2, c2) in zip(camino, camino[1:]):
+        if f1 != f2 and c1 != c2:
+            diagonales += 1
+        else:
+            rectos += 1
+    # el costo se cuenta al final para que no dependa del orden de las sumas
+    return camino, rectos + diagonales * RAIZ2 if diagonales else rectos
+
+
+def rejilla_con_obstaculos(lado, ocupado=0.2, semilla=0):
+    # rejilla lado x lado con rectangulos ocupados al azar hasta cubrir mas o menos
+    # la fraccion `ocupado`; las esquinas (0, 0) y (lado-1, lado-1) quedan libres
+    rnd = random.Random(semilla)
+    celdas = bytearray(lado * lado)
+    tapado = 0
+    while tapado < ocupado * lado * lado:
+        alto = rnd.randint(1, max(1, lado // 20))
+        ancho = rnd.randint(1, max(1, lado // 20))
+        f, c = rnd.randrange(lado - alto + 1), rnd.randrange(lado - ancho + 1)
+        for fila in range(f, f + alto):
+            celdas[fila * lado + c:fila * lado + c + ancho] = b"\x01" * ancho
+        tapado += alto * ancho
+    celdas[0] = celdas[-1] = 0
+    return Rejilla(celdas, ancho=lado)
+
+
+def _como_grafo_costos(rejilla):
+    # lo que habia que hacer antes para usar a_estrella: un diccionario por cuadrito
+    grafo = {}
+    for f in range(rejilla.alto):
+        for c in range(rejilla.ancho):
+            if not rejilla.libre((f, c)):
+                continue
+            vecinos = {}
+            for df in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    v = (f + df, c + dc)
+                    if (df or dc) and rejilla.libre(v):
+                        if df and dc and not (rejilla.libre((f + df, c)) and rejilla.libre((f, c + dc))):
+                            continue
+                        vecinos[v] = RAIZ2 if df and dc else 1
+            grafo[(f, c)] = vecinos
+    return grafo
+
+
+def benchmark(lados=(256, 1024, 4096), lado_dict=256, lado_memoria=1024):
+    # jps contra a* normal en arreglos planos y contra a_estrella con grafo_costos
+    # el tiempo se mide sin tracemalloc (lo hace mucho mas lento); la memoria pico
+    # se mide en otra corrida, solo hasta lado_memoria
+    modulo = cargar_script("10.Busquedas_A_y_AO.py", INFORMADA)
+
+    print("lado   forma                 expandidos   tiempo(s)  memoria pico (MB)  costo")
+    for lado in lados:
+        t0 = time.perf_counter()
+        rejilla = rejilla_con_obstaculos(lado, semilla=lado)
+        print(f"{lado:<6} (armar la rejilla: {time.perf_counter() - t0:.2f} s, "
+              f"{len(rejilla.celdas) / 2**20:.1f} MB)")
+        inicio, objetivo = (0, 0), (lado - 1, lado - 1)
+        formas = [
+            ("jps", lambda est: a_estrella_rejilla(rejilla, inicio, objetivo, estadisticas=est)),
+            ("a* plano 8 vecinos", lambda est: a_estrella_rejilla(
+                rejilla, inicio, objetivo, saltos=False, estadisticas=est)),
+            ("a* plano 4 vecinos", lambda est: a_estrella_rejilla(
+                rejilla, inicio, objetivo, diagonales=False, estadisticas=est)),
+        ]
+        if lado <= lado_dict:
+            def con_diccionarios(est):
+                grafo = _como_grafo_costos(rejilla)
+                h = _octil(rejilla.w, rejilla.indice(objetivo))
+                return modulo.a_estrella(grafo, lambda v: h(rejilla.indice(v)), inicio, objetivo,
+                                         estadisticas=est)
+            formas.append(("a_estrella con dict", con_diccionarios))
+
+        costo_8 = None
+        for nombre, buscar in formas:
+            est = {}
+            t0 = time.perf_counter()
+            camino, costo = buscar(est)
+            t = time.perf_counter() - t0
+            pico = "-"
+            if lado <= lado_memoria:
+                tracemalloc.start()
+                buscar({})
+                pico = f"{tracemalloc.get_traced_memory()[1] / 2**20:.1f}"
+                tracemalloc.stop()
+            if costo is not None and "4 vecinos" not in nombre:
+                if costo_8 is None:
+                    costo_8 = costo
+                assert abs(costo - costo_8) < 1e-6, (nombre, costo, costo_8)
+            texto = "sin camino" if costo is None else f"{costo:.2f}"
+            print(f"{lado:<6} {nombre:<21} {est.get('expandidos', 0):>10,} {t:>11.2f} {pico:>18}  {texto}")
+
+
+if __name__ == "__main__":
+    # "#" = ocupado, "." = libre
+    mapa = [
+        "..........",
+        "....#.....",
+        "....#.....",
+        "....####..",
+        "..........",
+    ]
+    for diagonales in (True, False):
+        camino, costo = a_estrella_rejilla(mapa, (2, 1), (2, 7), diagonales=diagonales)
+        print("8 vecinos" if diagonales else "4 vecinos", round(costo, 3), camino)
+
+    if "--bench" in sys.argv:
+        print()
+        benchmark()
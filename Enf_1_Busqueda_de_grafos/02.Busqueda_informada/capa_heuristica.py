@@ -0,0 +1,194 @@
+# capa de heuristicas para las busquedas informadas (08, 09, 10)
+# antes las busquedas recibian un diccionario y hacian heuristica.get(v, inf)
+# pero las heuristicas de verdad casi siempre se calculan (haversine, landmarks, ...)
+# Heuristica acepta cualquiera de las dos cosas:
+#   Heuristica({"a": 3, "b": 1})          -> tabla, se consulta directo
+#   Heuristica(funcion)                   -> funcion(nodo) -> numero (o None si no sabe)
+#   Heuristica(funcion, lote=funcion_lote) -> ademas funcion_lote(lista_de_nodos) -> lista de numeros
+# con funcion, los resultados se guardan en una cache LRU con tamano maximo
+# (cuando se llena se tira lo que se uso hace mas tiempo)
+#
+# tiene .get(nodo, default) igual que un diccionario, asi que se puede pasar
+# directo a cualquier busqueda que ya usaba diccionarios
+# si a una busqueda se le pasa una funcion suelta, su cache dura solo esa busqueda;
+# para compartirla entre consultas se pasa la misma Heuristica (Heuristica(funcion))
+# evaluar_lote(vecinos) calcula todos los vecinos de un nodo en una sola llamada:
+# los que ya estan en cache no se recalculan y los demas van juntos a funcion_lote
+#
+# nota: aqui no usamos numpy, funcion_lote puede estar hecha como sea
+# (con numpy si se tiene instalado, o con listas como heuristica_haversine de abajo)
+
+import math
+import time
+from collections import OrderedDict
+
+INF = float("inf")
+_FALTA = object()  # marca de "no esta en la cache" (None ya significa "la funcion no sabe")
+
+
+class Heuristica:
+    def __init__(self, fuente, maximo=100_000, lote=None, default=INF):
+        # fuente: diccionario nodo -> valor, o funcion nodo -> valor
+        # maximo: cuantos valores guarda la cache (solo con funcion)
+        # lote: funcion opcional que recibe una lista de nodos y regresa sus valores
+        # default: valor para nodos que la tabla no tiene o donde la funcion regresa None
+        if callable(fuente) and not hasattr(fuente, "get"):
+            self.tabla = None
+            self.funcion = fuente
+        else:
+            self.tabla = fuente
+            self.funcion = None
+        self.lote = lote
+        self.maximo = maximo
+        self.default = default
+        self.cache = OrderedDict()
+        self.estadisticas = {"aciertos": 0, "calculados": 0, "llamadas_lote": 0}
+
+    def get(self, nodo, default=None):
+        if default is None:
+            default = self.default
+        if self.tabla is not None:
+            return self.tabla.get(nodo, default)
+
+        cache = self.cache
+        valor = cache.get(nodo, _FALTA)
+        if valor is not _FALTA:
+            cache.move_to_end(nodo)
+            self.estadisticas["aciertos"] += 1
+        else:
+            valor = self.funcion(nodo)
+            self.estadisticas["calculados"] += 1
+            self._guardar(nodo, valor)
+        return default if valor is None else valor
+
+    __call__ = get
+
+    def evaluar_lote(self, nodos):
+        # regresa una lista con el valor de cada nodo, en el mismo orden
+        if self.tabla is not None:
+            tabla, default = self.tabla, self.default
+            return [tabla.get(v, default) for v in nodos]
+        if self.lote is None:
+            return [self.get(v) for v in nodos]
+
+        cache, default = self.cache, self.default
+        valores = []
+        faltan = []  # (posicion, nodo) de los que no estaban en cache
+        for v in nodos:
+            valor = cache.get(v, _FALTA)
+            if valor is _FALTA:
+                faltan.append((len(valores), v))
+            else:
+                cache.move_to_end(v)
+                if valor is None:
+                    valor = default
+            valores.append(valor)
+        self.estadisticas["aciertos"] += len(nodos) - len(faltan)
+
+        if faltan:
+            calculados = self.lote([v for _, v in faltan])
+            self.estadisticas["calculados"] += len(faltan)
+            self.estadisticas["llamadas_lote"] += 1
+            for (i, v), valor in zip(faltan, calculados):
+                self._guardar(v, valor)
+                valores[i] = default if valor is None else valor
+        return valores
+
+    def _guardar(self, nodo, valor):
+        cache = self.cache
+        cache[nodo] = valor
+        if len(cache) > self.maximo:
+            cache.popitem(last=False)
+
+    def limpiar(self):
+        self.cache.clear()
+
+
+def como_heuristica(heuristica):
+    # las busquedas llaman esto al empezar, asi aceptan diccionario, funcion o Heuristica
+    # una funcion suelta se envuelve de nuevo en cada llamada: la funcion puede leer
+    # cosas que cambian entre busquedas (el objetivo actual, por ejemplo), asi que
+    # su cache no debe durar mas que la busqueda; para reusar la cache entre
+    # consultas hay que pasar la misma Heuristica
+    if isinstance(heuristica, Heuristica):
+        return heuristica
+    return Heuristica(heuristica)
+
+
+def haversine(lat1, lon1, lat2, lon2, radio=6371.0):
+    # distancia en km sobre la esfera entre dos puntos (grados)
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * radio * math.asin(math.sqrt(a))
+
+
+def heuristica_haversine(coordenadas, objetivo, maximo=100_000, radio=6371.0):
+    # coordenadas: diccionario nodo -> (latitud, longitud)
+    # regresa una Heuristica con la distancia en linea recta hasta objetivo
+    # la version por lote saca una sola vez los datos del objetivo
+    # y recorre la lista de nodos sin volver a llamar funciones por cada uno
+    lat_o, lon_o = coordenadas[objetivo]
+    p_o = math.radians(lat_o)
+    cos_o = math.cos(p_o)
+    l_o = math.radians(lon_o)
+    radians, sin, cos, asin, sqrt = math.radians, math.sin, math.cos, math.asin, math.sqrt
+
+    def una(nodo):
+        punto = coordenadas.get(nodo)
+        if punto is None:
+            return None
+        return haversine(punto[0], punto[1], lat_o, lon_o, radio)
+
+    def lote(nodos):
+        valores = []
+        for nodo in nodos:
+            punto = coordenadas.get(nodo)
+            if punto is None:
+                valores.append(None)
+                continue
+            p = radians(punto[0])
+            a = sin((p_o - p) / 2) ** 2 + cos(p) * cos_o * sin((l_o - radians(punto[1])) / 2) ** 2
+            valores.append(2 * radio * asin(sqrt(a)))
+        return valores
+
+    return Heuristica(una, maximo=maximo, lote=lote)
+
+
+if __name__ == "__main__":
+    # algunas ciudades con su (latitud, longitud)
+    coordenadas = {
+        "Guadalajara": (20.6597, -103.3496),
+        "Leon": (21.1250, -101.6860),
+        "Queretaro": (20.5888, -100.3899),
+        "Morelia": (19.7060, -101.1950),
+        "Toluca": (19.2826, -99.6557),
+        "CDMX": (19.4326, -99.1332),
+    }
+    h = heuristica_haversine(coordenadas, "CDMX", maximo=4)
+
+    print("distancia en linea recta a CDMX:")
+    for ciudad, km in zip(coordenadas, h.evaluar_lote(list(coordenadas))):
+        print(f"  {ciudad:<12} {km:8.1f} km")
+
+    # la segunda vez ya salen de la cache (menos los que se tiraron por el maximo)
+    h.evaluar_lote(list(coordenadas))
+    print("contadores:", h.estadisticas)
+
+    # una tabla se usa igual
+    tabla = Heuristica({"a": 2, "b": 0})
+    print("tabla:", tabla.get("a"), tabla.get("z"), tabla.evaluar_lote(["b", "a", "z"]))
+
+    # comparacion rapida: uno por uno contra por lote, con muchos nodos
+    puntos = {i: (19 + (i % 100) / 50, -103 + (i // 100) / 25) for i in range(10_000)}
+    puntos["meta"] = (19.4326, -99.1332)
+    nodos = list(puntos)
+    for nombre, evaluar in (
+        ("uno por uno", lambda hh: [hh.get(v) for v in nodos]),
+        ("por lote", lambda hh: hh.evaluar_lote(nodos)),
+    ):
+        hh = heuristica_haversine(puntos, "meta")
+        t0 = time.perf_counter()
+        evaluar(hh)
+        print(f"{nombre:<12} {len(nodos):,} nodos en {time.perf_counter() - t0:.4f} s")